@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# filename: benchmarks/conftest.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+'''Scaled inputs and throughput reporting for the benchmark suite.
+
+Sizes are numbers of records, set with the TOPS_BENCHMARK_SIZES
+environment variable, e.g. ``TOPS_BENCHMARK_SIZES=1000,100000,1000000``.
+Benchmarks are skipped when pytest-benchmark is not installed.'''
+
+import importlib
+import os
+
+import pytest
+
+from totalopenstation.formats import BUILTIN_INPUT_FORMATS
+from totalopenstation.output import BUILTIN_OUTPUT_FORMATS
+
+SIZES = [int(size) for size in os.environ.get('TOPS_BENCHMARK_SIZES', '1000').split(',')]
+
+# Sample file of each input format
+SAMPLES = {
+    'carlson_rw5': 'sample_data/carlson_rw5/Trav_19leg.rw5',
+    'landxml': 'sample_data/landxml.xml',
+    'leica_gsi': 'sample_data/leica_gsi/leica_gsi8_ertola.gsi',
+    'leica_tcr_705': 'sample_data/leica_tcr_705',
+    'leica_tcr_1205': 'sample_data/leica_tcr_1205',
+    'nikon_raw_v200': 'sample_data/nikon_raw_v200/nikon_raw_v200.tops',
+    'sokkia_sdr33': 'sample_data/sokkia_sdr33.tops',
+    'topcon_gts': 'sample_data/topcon_gts_229',
+    'trimble_are': 'sample_data/trimble/BSG-08-11-19.are',
+    'zeiss_r5': 'sample_data/zeiss_elta_r55/zeiss_elta_r55-R5.tops',
+    'zeiss_rec_500': 'sample_data/zeiss_elta_r55/zeiss_elta_r55-REC_500.tops',
+    }
+
+# Throughput of each benchmark, by test id
+_throughput = {}
+# Peak RSS of each memory benchmark, by test id
+_memory = {}
+_inputs = {}
+
+
+def input_class(informat):
+    mod, cls, name = BUILTIN_INPUT_FORMATS[informat]
+    return getattr(importlib.import_module('totalopenstation.formats.' + mod), cls)
+
+
+def output_class(outformat):
+    mod, cls, name = BUILTIN_OUTPUT_FORMATS[outformat]
+    return getattr(importlib.import_module('totalopenstation.output.' + mod), cls)
+
+
+def _split(informat, text):
+    '''Split a sample in head, repeatable body and tail.'''
+
+    if informat == 'landxml':
+        start = text.index('<Survey>') + len('<Survey>')
+        end = text.rindex('</Survey>')
+        return text[:start], text[start:end], text[end:]
+    if informat == 'zeiss_r5':
+        # parsing stops at the END record
+        end = text.index('\nEND') + 1
+        return '', text[:end], text[end:]
+    if not text.endswith('\n'):
+        text += '\n'
+    return '', text, ''
+
+
+def scaled_input(informat, records):
+    '''Return a text of about records points, repeating a sample.
+
+    Parsers which merge points of the same name (LandXML) give fewer
+    points, the throughput report has the actual number.
+    '''
+
+    key = (informat, records)
+    if key not in _inputs:
+        with open(SAMPLES[informat], encoding='latin-1') as f:
+            head, body, tail = _split(informat, f.read())
+        per_copy = len(input_class(informat)(head + body + tail).points)
+        copies = -(-records // per_copy)
+        _inputs[key] = head + body * copies + tail
+    return _inputs[key]
+
+
+def rounds(records):
+    '''Return the number of rounds of a benchmark, fewer for large inputs.'''
+
+    return max(1, min(10, 100000 // records))
+
+
+def report(benchmark, records, size):
+    '''Add records/s and MB/s to a finished benchmark.
+
+    Args:
+        records (int): The number of records processed by a round.
+        size (int): The number of bytes read or written by a round.
+    '''
+
+    mean = benchmark.stats.stats.mean
+    info = {
+        'records': records,
+        'bytes': size,
+        'records_per_s': records / mean,
+        'mb_per_s': size / mean / 1e6,
+        }
+    benchmark.extra_info.update(info)
+    _throughput[benchmark.name] = info
+
+
+def report_memory(benchmark, records, rss, budget, baseline):
+    '''Add the peak RSS and bytes/record to a finished benchmark.
+
+    Args:
+        records (int): The number of records processed.
+        rss (int): The peak RSS, in bytes.
+        budget (int): The highest peak RSS allowed, in bytes.
+        baseline (int): The peak RSS of an empty run, not counted in
+            bytes/record.
+    '''
+
+    info = {
+        'records': records,
+        'peak_rss': rss,
+        'budget': budget,
+        'bytes_per_record': max(rss - baseline, 0) / records,
+        }
+    benchmark.extra_info.update(info)
+    _memory[benchmark.name] = info
+
+
+def pytest_collection_modifyitems(config, items):
+    if not config.pluginmanager.hasplugin('benchmark'):
+        skip = pytest.mark.skip(reason='pytest-benchmark is not installed')
+        here = os.path.dirname(__file__)
+        for item in items:
+            if str(item.path).startswith(here):
+                item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _memory:
+        terminalreporter.section('memory')
+        width = max(len(name) for name in _memory)
+        terminalreporter.write_line('%s %12s %12s %12s %14s' % (
+            'name'.ljust(width), 'records', 'peak MB', 'budget MB', 'bytes/record'))
+        for name, info in sorted(_memory.items()):
+            terminalreporter.write_line('%s %12d %12.1f %12.1f %14.0f' % (
+                name.ljust(width), info['records'], info['peak_rss'] / 1e6,
+                info['budget'] / 1e6, info['bytes_per_record']))
+    if not _throughput:
+        return
+    terminalreporter.section('throughput')
+    width = max(len(name) for name in _throughput)
+    terminalreporter.write_line('%s %12s %14s %10s' % ('name'.ljust(width), 'records',
+                                                      'records/s', 'MB/s'))
+    for name, info in sorted(_throughput.items()):
+        terminalreporter.write_line('%s %12d %14.0f %10.2f' % (
+            name.ljust(width), info['records'], info['records_per_s'], info['mb_per_s']))
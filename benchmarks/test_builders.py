@@ -0,0 +1,26 @@
+import pytest
+
+from totalopenstation.output import BUILTIN_OUTPUT_FORMATS
+
+from .conftest import SIZES, input_class, output_class, report, rounds, scaled_input
+
+_features = {}
+
+
+def features(records):
+    '''Return records points and observations from Leica GSI data.'''
+
+    if records not in _features:
+        parser = input_class('leica_gsi')(scaled_input('leica_gsi', records))
+        _features[records] = parser.points[:records]
+    return _features[records]
+
+
+@pytest.mark.parametrize('records', SIZES)
+@pytest.mark.parametrize('outformat', sorted(BUILTIN_OUTPUT_FORMATS))
+def test_builder(benchmark, outformat, records):
+    benchmark.group = 'output-%d' % records
+    builder_class = output_class(outformat)
+    points = features(records)
+    output = benchmark.pedantic(lambda: builder_class(points).process(), rounds=rounds(records))
+    report(benchmark, len(points), len(output.encode('utf-8')))
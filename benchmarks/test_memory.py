@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from totalopenstation.utils.generator import Survey, write_survey
+
+from .conftest import SIZES, report_memory
+
+# Peak RSS budget of a conversion, whatever the size of the input:
+# features are streamed from the parser to the output file
+BUDGET = 128 * 1024 * 1024
+
+# Conversions, from a dialect of the generator to an output format
+CONVERSIONS = [
+    ('carlson_rw5', 'dxf'),
+    ('landxml', 'geojson'),
+    ('leica_gsi16', 'csv'),
+    ('nikon_raw_v200', 'landxml'),
+    ]
+
+# Converts a file in a new process and prints its peak RSS
+CONVERT = '''
+import sys
+from totalopenstation.utils.batch import Converter
+from totalopenstation.utils.profiling import peak_rss
+result = Converter(*sys.argv[1:3])(*sys.argv[3:5])
+print(result.status, result.count, peak_rss())
+'''
+
+
+def convert(informat, outformat, infile, outfile):
+    '''Return the status, points and peak RSS of a conversion.'''
+
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    output = subprocess.run([sys.executable, '-c', CONVERT, informat, outformat, infile, outfile],
+                            check=True, stdout=subprocess.PIPE, env=env).stdout
+    status, points, rss = output.split()
+    return status.decode(), int(points), None if rss == b'None' else int(rss)
+
+
+@pytest.fixture(scope='module')
+def baseline(tmp_path_factory):
+    '''The peak RSS of the conversion of a survey without sideshots.'''
+
+    infile = str(tmp_path_factory.mktemp('baseline') / 'survey')
+    with open(infile, 'w') as f:
+        informat = write_survey(Survey(points=0), 'leica_gsi16', f)
+    return convert(informat, 'csv', infile, infile + '.csv')[2]
+
+
+@pytest.mark.parametrize('records', SIZES)
+@pytest.mark.parametrize('dialect,outformat', CONVERSIONS)
+def test_peak_rss(benchmark, baseline, tmp_path, dialect, outformat, records):
+    benchmark.group = 'memory-%d' % records
+    infile = str(tmp_path / 'survey')
+    with open(infile, 'w') as f:
+        informat = write_survey(Survey(points=records), dialect, f)
+    outfile = str(tmp_path / 'output')
+    status, points, rss = benchmark.pedantic(
+        lambda: convert(informat, outformat, infile, outfile), rounds=1)
+    assert status == 'ok'
+    if rss is None:
+        pytest.skip('peak RSS is not available on this platform')
+    report_memory(benchmark, points, rss, BUDGET, baseline)
+    assert rss <= BUDGET, 'peak RSS %.1f MB over the budget of %.1f MB' % (rss / 1e6, BUDGET / 1e6)
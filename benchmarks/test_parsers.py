@@ -0,0 +1,51 @@
+import io
+
+import pytest
+
+from totalopenstation.formats.leica_gsi import FormatParser as GSIParser
+from totalopenstation.utils.generator import Survey, write_survey
+
+from .conftest import SAMPLES, SIZES, input_class, report, rounds, scaled_input
+
+# Formats whose parser handles raw data
+RAW_FORMATS = ('carlson_rw5', 'landxml', 'leica_gsi', 'nikon_raw_v200')
+
+# Lowest throughput of the Leica GSI tokenizer, in bytes/s
+GSI_TOKENIZE_TARGET = 50e6
+
+
+@pytest.mark.parametrize('records', SIZES)
+@pytest.mark.parametrize('informat', sorted(SAMPLES))
+def test_points(benchmark, informat, records):
+    benchmark.group = 'points-%d' % records
+    parser_class = input_class(informat)
+    text = scaled_input(informat, records)
+    points = benchmark.pedantic(lambda: parser_class(text).points, rounds=rounds(records))
+    assert points
+    report(benchmark, len(points), len(text))
+
+
+@pytest.mark.parametrize('records', SIZES)
+@pytest.mark.parametrize('informat', RAW_FORMATS)
+def test_raw(benchmark, informat, records):
+    benchmark.group = 'raw-%d' % records
+    parser_class = input_class(informat)
+    text = scaled_input(informat, records)
+    raw = benchmark.pedantic(lambda: parser_class(text).raw_line, rounds=rounds(records))
+    report(benchmark, len(raw), len(text))
+
+
+@pytest.mark.parametrize('records', SIZES)
+@pytest.mark.parametrize('dialect', ['leica_gsi8', 'leica_gsi16'])
+def test_gsi_tokenize(benchmark, dialect, records):
+    benchmark.group = 'tokenize-%d' % records
+    f = io.StringIO()
+    write_survey(Survey(points=records), dialect, f)
+    text = f.getvalue()
+    lines = text.splitlines()
+    tokenize = GSIParser('').tokenize
+    benchmark.pedantic(lambda: [tokenize(line) for line in lines], rounds=rounds(records),
+                       warmup_rounds=1)
+    report(benchmark, len(lines), len(text))
+    # the median: garbage collections left by other benchmarks skew the mean
+    assert len(text) / benchmark.stats.stats.median >= GSI_TOKENIZE_TARGET
@@ -0,0 +1,140 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# filename: totalopenstation-cli-generator.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+import sys
+import os
+import gettext
+
+from optparse import OptionParser
+
+from totalopenstation.utils.generator import DIALECTS, Survey, write_survey, write_truth
+
+
+t = gettext.translation('totalopenstation', './locale', fallback=True)
+_ = t.gettext
+
+usage = _("usage: %prog -d DIALECT [-n POINTS] [-o FILE] [--truth FILE]")
+
+parser = OptionParser(usage=usage)
+parser.add_option("-d",
+                "--dialect",
+                action="store",
+                type="string",
+                dest="dialect",
+                help=_("write data in DIALECT"),
+                metavar="DIALECT")
+parser.add_option("-n",
+                "--points",
+                action="store",
+                type="int",
+                dest="points",
+                default=1000,
+                help=_("number of sideshots (default: %default)"),
+                metavar="POINTS")
+parser.add_option(
+                "--per-station",
+                action="store",
+                type="int",
+                dest="per_station",
+                default=50,
+                help=_("number of sideshots of each station (default: %default)"),
+                metavar="N")
+parser.add_option(
+                "--seed",
+                action="store",
+                type="string",
+                dest="seed",
+                default="0",
+                help=_("seed of the random survey (default: %default)"),
+                metavar="SEED")
+parser.add_option("-o",
+                "--outfile",
+                action="store",
+                type="string",
+                dest="outfile",
+                help=_("select output FILE (do not specify for stdout)"),
+                metavar="FILE")
+parser.add_option(
+                "--truth",
+                action="store",
+                type="string",
+                dest="truth",
+                help=_("write the ground truth coordinates to FILE as CSV"),
+                metavar="FILE")
+parser.add_option(
+                "--overwrite",
+                action="store_true",
+                dest="overwrite",
+                default=False,
+                help=_("overwrite existing output files"))
+parser.add_option(
+    "--list",
+    action="store_true",
+    dest="list",
+    default=False,
+    help=_("list the available dialects"))
+
+
+(options, args) = parser.parse_args()
+
+
+def list_dialects():
+    '''Print a list of the available dialects.'''
+
+    mod_string = "List of available dialects:\n" + "-" * 30 + "\n"
+    for k, v in sorted(DIALECTS.items()):
+        mod_string += k.ljust(20) + v[2] + _(" (input format %s)") % v[0] + "\n"
+    mod_string += "\n"
+    return mod_string
+
+if options.list:
+    sys.stdout.write(list_dialects())
+    sys.exit()
+
+if not options.dialect:
+    sys.exit(_("Please specify a dialect"))
+if options.dialect not in DIALECTS:
+    sys.exit(_("\nError:\n%(message)s\n\n%(dialects)s") % {
+        'message': _('%s is not a valid dialect') % options.dialect,
+        'dialects': list_dialects()})
+if options.points < 0 or options.per_station < 1:
+    sys.exit(_("The number of points must be positive"))
+
+for path in (options.outfile, options.truth):
+    if path and os.path.exists(path) and not options.overwrite:
+        sys.exit(_("Specified output file %s already exists\n") % path)
+
+
+def main():
+    '''Write the survey, then its ground truth.'''
+
+    survey = Survey(points=options.points, per_station=options.per_station, seed=options.seed)
+    if options.outfile:
+        with open(options.outfile, 'w') as f:
+            write_survey(survey, options.dialect, f)
+    else:
+        write_survey(survey, options.dialect, sys.stdout)
+    if options.truth:
+        with open(options.truth, 'w') as f:
+            write_truth(survey, f)
+
+if __name__ == '__main__':
+    main()
@@ -22,21 +22,29 @@
 
 import sys
 import os
+import glob
 import gettext
 import importlib
 
 import logging
 
+from collections import Counter
 from optparse import OptionParser
 
 import totalopenstation.formats
 import totalopenstation.output
 
+from totalopenstation.formats.sniffer import AUTO, SNIFF_SIZE, sniff, sniff_file
+from totalopenstation.output import write_file
+from totalopenstation.utils.batch import Stream, convert_files, drop_z, find_files, input_class, streams
+from totalopenstation.utils.cache import CACHE_DIR, ParseCache, digest_file, digest_text
+from totalopenstation.utils import profiling
+
 
 t = gettext.translation('totalopenstation', './locale', fallback=True)
 _ = t.gettext
 
-usage = _("usage: %prog [option] arg1 [option] arg2 ...")
+usage = _("usage: %prog [option] arg1 [option] arg2 ... [FILE|DIR|PATTERN ...]")
 
 parser = OptionParser(usage=usage)
 parser.add_option("-i",
@@ -46,6 +54,12 @@ parser.add_option("-i",
                 dest="infile",
                 help=_("select input FILE  (do not specify for stdin)"),
                 metavar="FILE")
+parser.add_option(
+                "--mmap",
+                action="store_true",
+                dest="mmap",
+                default=False,
+                help=_("read the input file through a memory map (large files)"))
 parser.add_option("-o",
                 "--outfile",
                 action="store",
@@ -53,12 +67,27 @@ parser.add_option("-o",
                 dest="outfile",
                 help=_("select output FILE (do not specify for stdout)"),
                 metavar="FILE")
+parser.add_option(
+                "--outdir",
+                action="store",
+                type="string",
+                dest="outdir",
+                help=_("write output files to DIR (batch mode)"),
+                metavar="DIR")
+parser.add_option("-j",
+                "--jobs",
+                action="store",
+                type="int",
+                dest="jobs",
+                default=1,
+                help=_("convert N files at once (batch mode)"),
+                metavar="N")
 parser.add_option("-f",
                 "--input-format",
                 action="store",
                 type="string",
                 dest="informat",
-                help=_("select input FORMAT"),
+                help=_("select input FORMAT (auto to guess it)"),
                 metavar="FORMAT")
 parser.add_option("--2d",
                   action="store_true",
@@ -83,6 +112,45 @@ parser.add_option(
                 dest="overwrite",
                 default=False,
                 help=_("overwrite existing output file"))
+parser.add_option(
+                "--cache",
+                action="store_true",
+                dest="cache",
+                default=False,
+                help=_("read and store parsed data in the cache"))
+parser.add_option(
+                "--cache-dir",
+                action="store",
+                type="string",
+                dest="cache_dir",
+                help=_("keep parsed data in DIR, implies --cache (default: %s)") % CACHE_DIR,
+                metavar="DIR")
+parser.add_option(
+                "--profile",
+                action="store_true",
+                dest="profile",
+                default=False,
+                help=_("print the time spent in each stage to stderr"))
+parser.add_option(
+                "--memory",
+                action="store_true",
+                dest="memory",
+                default=False,
+                help=_("print the memory allocated in each stage to stderr"))
+parser.add_option(
+                "--pstats",
+                action="store",
+                type="string",
+                dest="pstats",
+                help=_("run cProfile and save its statistics to FILE"),
+                metavar="FILE")
+parser.add_option(
+                "--trace",
+                action="store",
+                type="string",
+                dest="trace",
+                help=_("save the stages to FILE as Chrome trace events"),
+                metavar="FILE")
 parser.add_option(
     "--list",
     action="store_true",
@@ -122,6 +190,7 @@ def list_formats():
     mod_string = "List of supported input formats:\n" + "-" * 30 + "\n"
     for k, v in sorted(totalopenstation.formats.BUILTIN_INPUT_FORMATS.items()):
         mod_string += k.ljust(20) + v[2] + "\n"
+    mod_string += AUTO.ljust(20) + _("Guess the input format") + "\n"
     mod_string += "\n\n"
 
     mod_string += "List of supported output formats:\n" + "-" * 30 + "\n"
@@ -138,7 +207,10 @@ def exit_with_error(message):
     sys.exit(_("\nError:\n%(message)s\n\n%(formats)s") % {'message': message,
                                                           'formats': list_formats()})
 
-if options.informat:
+if options.informat == AUTO:
+    # guessed from input data
+    inputclass = None
+elif options.informat:
     try:
         inputclass = totalopenstation.formats.BUILTIN_INPUT_FORMATS[options.informat]
     except KeyError as message:
@@ -168,52 +240,167 @@ if options.outformat:
             except ImportError as message:
                 exit_with_error(message)
 
-if options.infile:
-    infile = open(options.infile, 'r').read()
+batch_inputs = list(args)
+if options.infile and (os.path.isdir(options.infile) or glob.has_magic(options.infile)):
+    batch_inputs.append(options.infile)
+
+if batch_inputs:
+    if options.outfile:
+        sys.exit(_("Use --outdir instead of --outfile to convert many files"))
+    if not options.outformat:
+        sys.exit(_("Please specify an output format"))
+elif options.infile:
+    if options.mmap:
+        infile = totalopenstation.formats.MappedFile(options.infile)
+    else:
+        infile = open(options.infile, 'r')
 else:
+    if options.mmap:
+        sys.exit(_("--mmap needs an input file"))
     if sys.stdin.isatty():
         sys.exit(_('No input data!'))
     else:
-        infile = sys.stdin.read()
+        infile = sys.stdin
+
+
+def guess_input_class(infile):
+    '''Guess the input format, return its name, the parser class and the
+    input data.'''
+
+    if options.infile:
+        guesses = sniff_file(options.infile)
+    else:
+        infile = infile.read()
+        guesses = sniff(infile[:SNIFF_SIZE])
+    if not guesses:
+        sys.exit(_("The input format could not be guessed, please specify it"))
+    logger.info(_("Input format guessed as %s (confidence %.2f)") % guesses[0])
+    return guesses[0].format, input_class(guesses[0].format), infile
+
+informat = options.informat
+if inputclass is None and not batch_inputs:
+    informat, inputclass, infile = guess_input_class(infile)
+
+if options.cache or options.cache_dir:
+    cache_dir = options.cache_dir or CACHE_DIR
+else:
+    cache_dir = None
+
+
+def parse(parsed_data):
+    '''Parse input data, return the features.'''
+
+    if options.raw:
+        return parsed_data.raw_line
+    return parsed_data.points
 
 
 def main(infile):
     '''After setting up all parameters, finally try to process input data.'''
 
-    parsed_data = inputclass(infile)
-    if options.raw:
-        parsed_points = parsed_data.raw_line
-    else:
-        parsed_points = parsed_data.points
+    if options.outfile and os.path.exists(options.outfile) and not options.overwrite:
+        sys.exit(_("Specified output file already exists\n"))
+
+    with profiling.stage('parse'):
+        if cache_dir is None:
+            digest = None
+        elif options.infile:
+            digest = digest_file(options.infile)
+        elif isinstance(infile, str):
+            # standard input, already read to guess its format
+            digest = digest_text(infile)
+        else:
+            # standard input is parsed as it is read, without the cache
+            digest = None
+        parsed_data = inputclass(infile)
+        if streams(parsed_data, options.xy_only, digest is not None):
+            # parsed as the output is written, never held whole in memory
+            parsed_points = Stream(parsed_data, options.raw)
+        elif digest is None:
+            parsed_points = parse(parsed_data)
+        else:
+            parsed_points = ParseCache(cache_dir).parse(inputclass, informat, digest,
+                                                        lambda: parse(parsed_data),
+                                                        raw=options.raw)
+    if not isinstance(parsed_points, Stream):
+        profiling.count('parse', len(parsed_points))
 
     # processing options
     if options.xy_only:
-        for feature in parsed_points:
-            geom_cls = getattr(totalopenstation.formats, feature.geometry.geom_type)
-            try:
-                feature.geometry = geom_cls(feature.geometry.x, feature.geometry.y)
-            except:
-                feature.geometry = geom_cls([(p.x, p.y) for p in feature.geometry.geoms])
-    output = outputclass(parsed_points)
+        with profiling.stage('2d'):
+            drop_z(parsed_points)
+        profiling.count('2d', len(parsed_points))
 
-    def write_to_file(outfile):
-        e = open(outfile, 'w')
-        e.write(output.process())
-        e.close()
-
-    if options.outfile:
-        if not os.path.exists(options.outfile):
-            write_to_file(options.outfile)
-            logger.info(_("Downloaded data saved to out file %s") % options.outfile)
-        else:
-            if options.overwrite:
-                write_to_file(options.outfile)
+    # the output is written as it is built, never held whole in memory
+    builder = outputclass(parsed_points)
+    with profiling.stage('write'):
+        if options.outfile:
+            existed = os.path.exists(options.outfile)
+            size = write_file(builder, options.outfile)
+            if existed:
                 logger.info(_("Downloaded data saved to file %s,") % (options.outfile))
                 logger.info(_("overwriting the existing file"))
             else:
-                sys.exit(_("Specified output file already exists\n"))
+                logger.info(_("Downloaded data saved to out file %s") % options.outfile)
+        else:
+            builder.write_to(sys.stdout)
+            size = 0
+    if isinstance(parsed_points, Stream):
+        profiling.count('write', parsed_points.count, size)
     else:
-        sys.stdout.write(output.process())
+        profiling.count('write', len(parsed_points), size)
+
+def batch(paths):
+    '''Convert many files, printing the status of each one and a summary.
+
+    Returns the exit status, 1 if any file could not be converted.'''
+
+    files = find_files(paths)
+    if not files:
+        sys.exit(_("No input files found"))
+    if options.outdir and not os.path.isdir(options.outdir):
+        os.makedirs(options.outdir)
+    counts = Counter()
+    for result in convert_files(files, options.informat, options.outformat,
+                                outdir=options.outdir,
+                                jobs=options.jobs,
+                                raw=options.raw,
+                                xy_only=options.xy_only,
+                                overwrite=options.overwrite,
+                                mmap=options.mmap,
+                                cache_dir=cache_dir):
+        counts[result.status] += 1
+        if result.status == 'ok':
+            line = _("ok      %(infile)s -> %(outfile)s (%(informat)s, %(count)d features, %(seconds).2f s)")
+        else:
+            line = _("%(status)-7s %(infile)s: %(error)s")
+        sys.stdout.write(line % result._asdict() + "\n")
+        sys.stdout.flush()
+    sys.stdout.write(_("%(ok)d converted, %(skipped)d skipped, %(failed)d failed\n") % {
+        'ok': counts['ok'], 'skipped': counts['skipped'], 'failed': counts['failed']})
+    return 1 if counts['failed'] else 0
 
 if __name__ == '__main__':
-    main(infile)
+    if options.profile or options.memory or options.pstats or options.trace:
+        if batch_inputs and options.jobs > 1:
+            sys.exit(_("Profiling needs --jobs 1"))
+        profiler = profiling.Profiler(pstats=options.pstats, trace=options.trace,
+                                      memory=options.memory)
+    else:
+        profiler = profiling.idle()
+    with profiler:
+        if batch_inputs:
+            status = batch(batch_inputs)
+        else:
+            status = main(infile)
+    if options.profile:
+        sys.stderr.write(profiler.report())
+    if options.memory:
+        parsed = profiler.stages.get('parse')
+        sys.stderr.write(profiler.memory_report(parsed.records if parsed else None))
+        rss = profiling.peak_rss()
+        if rss is None:
+            sys.stderr.write(_("peak RSS: n/a\n"))
+        else:
+            sys.stderr.write(_("peak RSS: %.1f MB\n") % (rss / 1e6))
+    sys.exit(status)
@@ -35,7 +35,9 @@ import totalopenstation
 
 from totalopenstation.models import BUILTIN_MODELS
 from totalopenstation.formats import BUILTIN_INPUT_FORMATS
-from totalopenstation.output import BUILTIN_OUTPUT_FORMATS
+from totalopenstation.formats.incremental import IncrementalParser
+from totalopenstation.formats.sniffer import AUTO, SNIFF_SIZE, guess_format
+from totalopenstation.output import BUILTIN_OUTPUT_FORMATS, write_file
 from totalopenstation.utils.upref import UserPrefs
 
 t = gettext.translation('totalopenstation', './locale', fallback=True)
@@ -191,8 +193,10 @@ class ConnectDialog(tkinter.simpledialog.Dialog):
 
 class ProcessDialog(tkinter.simpledialog.Dialog):
 
-    def __init__(self, parent, data):
+    def __init__(self, parent, data, parsers):
         self.data = data
+        # IncrementalParser of the text, by input format
+        self.parsers = parsers
         self.format = ''
         tkinter.simpledialog.Dialog.__init__(self, parent)
 
@@ -232,6 +236,10 @@ class ProcessDialog(tkinter.simpledialog.Dialog):
         input_format_entry.menu = Menu(input_format_entry, tearoff=0)
         input_format_entry["menu"] = input_format_entry.menu
 
+        input_format_entry.menu.add_radiobutton(
+            label=_("Guess the input format"),
+            variable=self.input_format,
+            value=AUTO)
         for k, v in sorted(BUILTIN_INPUT_FORMATS.items()):
             input_format_entry.menu.add_radiobutton(
                 label=v[2],
@@ -268,7 +276,14 @@ class ProcessDialog(tkinter.simpledialog.Dialog):
     def apply(self):
         '''Export data in the required output format'''
 
-        inputclass = BUILTIN_INPUT_FORMATS[self.input_format.get()]
+        input_format = self.input_format.get()
+        if input_format == AUTO:
+            input_format = guess_format(self.data[:SNIFF_SIZE])
+            if input_format is None:
+                showwarning(_('Unknown format'),
+                            _('The input format could not be guessed, please choose it'))
+                return
+        inputclass = BUILTIN_INPUT_FORMATS[input_format]
 
         # import input format parser
         if isinstance(inputclass, tuple):
@@ -295,19 +310,20 @@ class ProcessDialog(tkinter.simpledialog.Dialog):
                             _('Error loading the required output module: %s' % msg))
 
         # no point in parsing before the output format has been imported
-        parsed_data = inputclass(self.data)
+        parsed_data = self.parsers.get(input_format)
+        if parsed_data is None:
+            parsed_data = self.parsers[input_format] = IncrementalParser(inputclass)
+        # only the edited lines are parsed again
+        parsed_data.update(self.data)
         parsed_points = parsed_data.points
         output = outputclass(parsed_points)
         sd = tkinter.filedialog.asksaveasfilename(defaultextension='.%s' % of_lower)
 
-        try:
-            sd_file = open(sd, 'w')
-        except TypeError:
+        if not sd:
             showwarning(_("No output file specified"),
                         _("No processing settings entered!\n"))
         else:
-            sd_file.write(output.process())
-            sd_file.close()
+            write_file(output, sd)
 
 class PreferencesDialog(tkinter.simpledialog.Dialog):
     '''A dialog to change preferences and options.'''
@@ -362,6 +378,9 @@ class Tops:
 
         self.myParent = parent
 
+        # parsed text, kept between processings
+        self.parsers = {}
+
         self.main_frame = Frame(parent) ###
         self.main_frame.pack(expand=YES, fill=BOTH)
 
@@ -772,7 +791,7 @@ class Tops:
 
     def process(self):
         data = self.text_area.get("1.0", END)
-        d = ProcessDialog(self.myParent, data)
+        d = ProcessDialog(self.myParent, data, self.parsers)
 
     def process_action(self, event):
         self.process()
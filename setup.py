@@ -10,7 +10,8 @@ setup(
     packages=find_packages(exclude=['ez_setup', 'examples', 'tests', 'gui']),
     scripts=['scripts/totalopenstation-gui.py',
              'scripts/totalopenstation-cli-parser.py',
-             'scripts/totalopenstation-cli-connector.py'],
+             'scripts/totalopenstation-cli-connector.py',
+             'scripts/totalopenstation-cli-generator.py'],
     url='https://tops.iosa.it/',
     license='GNU GPLv3',
     description='Download and export survey data from your total station',
@@ -31,6 +32,7 @@ setup(
         ],
     keywords='survey geodimeter',
     install_requires=['pyserial==3.4', 'pygeoif==0.7'],
+    extras_require={'numpy': ['numpy']},
     tests_require=['pytest>=5.1'],
     include_package_data = True,
     zip_safe = False,
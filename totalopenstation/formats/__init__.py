@@ -20,14 +20,28 @@
 # along with Total Open Station.  If not, see
 # <http://www.gnu.org/licenses/>.
 
+import codecs
+import locale
 import logging
+import mmap
+import os
+import re
 
 from pygeoif import geometry as g
 from math import pi
 
+from totalopenstation.utils import profiling
+
 
 logger = logging.getLogger(__name__).addHandler(logging.NullHandler())
 
+# Size in characters of the blocks read from files
+CHUNK_SIZE = 1 << 16
+
+# Size in bytes of the parts of a mapped file released once they are read
+MAPPED_WINDOW = 1 << 24
+
+
 class Point(g.Point):
     pass
 
@@ -71,25 +85,262 @@ class FeatureCollection(g.FeatureCollection):
     pass
 
 
-class Parser:
-    '''Parses a *single* string of raw data.
+def _line_size(line):
+    return len(line) + 1
+
+
+class RawData:
+    '''Give access to raw data, line by line or chunk by chunk.
+
+    Every iteration starts again from the beginning of the data, so that
+    parsers can walk through a file more than once without keeping a list
+    of its lines in memory.
+
+    Args:
+        data (str, file object, path-like or :class:`MappedFile`): A string
+            representing the whole file, an open text file object, the path
+            of the file or a memory-mapped file. A file object which is not
+            seekable (e.g. ``sys.stdin``) can be walked through only once.
+    '''
 
-    This means that if you plan to load data from a file you have to
-    pass the output of open(file).read() to this class.
+    NEWLINE = re.compile(r'\r\n|[\r\n]')
+
+    def __init__(self, data):
+        if isinstance(data, RawData):
+            data = data.data
+        self.data = data
+        self.start = None
+        if hasattr(data, 'seekable') and data.seekable():
+            self.start = data.tell()
+
+    @property
+    def once(self):
+        """True if the data can be walked through only once, like a pipe."""
+
+        return self.start is None and not isinstance(self.data, (str, os.PathLike, MappedFile))
+
+    def _open(self):
+        """Return a file object positioned at the beginning of the data,
+        and whether it should be closed after use."""
+
+        if isinstance(self.data, os.PathLike):
+            return open(self.data), True
+        if self.start is not None:
+            self.data.seek(self.start)
+        return self.data, False
+
+    def __iter__(self):
+        """Iterate over the lines, without line terminators."""
+
+        return profiling.iterate('read', self._lines(), _line_size)
+
+    def _lines(self):
+        if isinstance(self.data, MappedFile):
+            yield from self.data.lines()
+        elif isinstance(self.data, str):
+            data = self.data
+            start = 0
+            for m in self.NEWLINE.finditer(data):
+                yield data[start:m.start()]
+                start = m.end()
+            if start < len(data):
+                yield data[start:]
+        else:
+            f, close = self._open()
+            try:
+                for line in f:
+                    yield line.rstrip('\r\n')
+            finally:
+                if close:
+                    f.close()
+
+    def chunks(self, size=CHUNK_SIZE):
+        """Iterate over the data in chunks of at most ``size`` characters."""
+
+        return profiling.iterate('read', self._chunks(size), len)
+
+    def _chunks(self, size):
+        if isinstance(self.data, MappedFile):
+            yield from self.data.chunks(size)
+        elif isinstance(self.data, str):
+            for i in range(0, len(self.data), size):
+                yield self.data[i:i + size]
+        else:
+            f, close = self._open()
+            try:
+                chunk = f.read(size)
+                while chunk:
+                    yield chunk
+                    chunk = f.read(size)
+            finally:
+                if close:
+                    f.close()
+
+    def read(self):
+        """Return the whole data as a single string."""
+
+        if isinstance(self.data, str):
+            return self.data
+        return ''.join(self.chunks())
+
+
+class MappedFile:
+    '''A file read through a memory map, to be given to parsers as data.
+
+    Lines are found in the mapped bytes and only decoded when they are
+    used. Parts of the map which have been read are released, so memory
+    use does not grow with the size of the file.
+
+    The encoding must be compatible with ASCII for line endings, like
+    UTF-8 or Latin-1.
 
     Args:
-        data (str): A string representing the file to be parsed.
-            
+        path (str or path-like): The path of the file.
+        encoding (str): The encoding of the file, the same default as
+            :func:`open` if None.
+        errors (str): How decoding errors are handled, as for :func:`open`.
+    '''
+
+    def __init__(self, path, encoding=None, errors='strict'):
+        self.path = path
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.errors = errors
+
+    def _map(self):
+        '''Return a read-only map of the file, None for an empty file.'''
+
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mapped, 'madvise'):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        return mapped
+
+    @staticmethod
+    def _release(mapped, start, end):
+        '''Drop the pages of the map between start and end from memory.'''
+
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            start -= start % mmap.PAGESIZE
+            end -= end % mmap.PAGESIZE
+            if end > start:
+                mapped.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def lines(self):
+        '''Iterate over the lines, without line terminators.'''
+
+        mapped = self._map()
+        if mapped is None:
+            return
+        encoding, errors = self.encoding, self.errors
+        released = 0
+        with mapped:
+            size = len(mapped)
+            start = 0
+            while start < size:
+                end = mapped.find(b'\n', start)
+                if end < 0:
+                    end = size
+                line = mapped[start:end].decode(encoding, errors)
+                start = end + 1
+                if '\r' in line:
+                    # Windows or old Mac line endings
+                    yield from line.rstrip('\r').split('\r')
+                else:
+                    yield line
+                if start - released > MAPPED_WINDOW:
+                    self._release(mapped, released, start)
+                    released = start
+
+    def chunks(self, size=CHUNK_SIZE):
+        '''Iterate over the text in chunks of about ``size`` characters.'''
+
+        mapped = self._map()
+        if mapped is None:
+            return
+        decoder = codecs.getincrementaldecoder(self.encoding)(self.errors)
+        released = 0
+        with mapped:
+            for start in range(0, len(mapped), size):
+                chunk = decoder.decode(mapped[start:start + size])
+                if chunk:
+                    yield chunk
+                if start - released > MAPPED_WINDOW:
+                    self._release(mapped, released, start)
+                    released = start
+            chunk = decoder.decode(b'', final=True)
+            if chunk:
+                yield chunk
+
+    def read(self):
+        '''Return the whole file as a single string.'''
+
+        return ''.join(self.chunks())
+
+
+def iter_split(chunks, sep):
+    '''Split a stream of strings on a separator.
+
+    This yields the same items as ``''.join(chunks).split(sep)`` without
+    building the joined string.
+
+    Args:
+        chunks (iterable): The strings to be joined and split.
+        sep (str): The separator.
+    '''
+
+    tail = ''
+    for chunk in chunks:
+        items = (tail + chunk).split(sep)
+        tail = items.pop()
+        yield from items
+    yield tail
+
+
+class Parser:
+    '''Parses raw data from a string, a file object or a path.
+
+    Data is read lazily: :meth:`iter_points` and :meth:`iter_raw` yield
+    one :class:`formats.Feature` at a time while walking through the
+    source, so a file object or a path-like object can be parsed without
+    loading it in memory. :attr:`points` and :attr:`raw_line` build the
+    full list of features.
+
+    Results are computed once: :attr:`points` and :attr:`raw_line` keep
+    their list of features. Parsers which define :meth:`tokenize` keep the
+    tokenized records only when the source can be walked through once,
+    so that both views are built from the same records; otherwise each
+    view tokenizes the source as it walks through it, and records are
+    never held in memory. Call :meth:`invalidate` to parse the source
+    again on next access.
+
+    Args:
+        data (str, file object or path-like): A string representing the
+            file to be parsed, an open text file object or the path of the
+            file.
+
     Attributes:
-        data (str): A string representing the file to be parsed **could**
-            be overridden by the init method.
+        data (str): The data to be parsed, as given to the init method.
+        rows (:class:`formats.RawData`): The lines of the file.
+        tokenizes (bool): True for parsers which override :meth:`tokenize`.
+        resumes (bool): True for parsers which override :meth:`is_station`.
     '''
 
+    tokenizes = False
+    resumes = False
+
+    # Cached results
+    _points = None
+    _raw = None
+    _records = None
+
     def __init__(self, data):
-        """Init method which **should** be overridden in the child class
+        """Init method which **could** be overridden in the child class
         to have a working parser."""
 
         self.data = data
+        self.rows = RawData(data)
 
     def is_point(self, line):
         """Action for finding which parts of the source file are points.
@@ -114,6 +365,62 @@ class Parser:
 
         pass
 
+    def tokenize(self, line):
+        """Action for tokenizing a line of the source file in a record.
+
+        This method **could** be overridden in the child class, setting
+        :attr:`tokenizes`, then records are available through
+        :meth:`records`, and are kept once :attr:`points` or
+        :attr:`raw_line` have been accessed if the source can be walked
+        through only once.
+
+        Returns:
+            A record of any type, or None if the line must be skipped.
+        """
+
+        pass
+
+    def is_station(self, record):
+        """Action for finding which records are station setups.
+
+        This method **could** be overridden in the child class, setting
+        :attr:`resumes`, when the points following a station setup only
+        depend on the records from that station on, so that
+        :meth:`iter_points` can be run again from any station, see
+        :class:`formats.incremental.IncrementalParser`.
+
+        Returns:
+            A boolean
+        """
+
+        pass
+
+    def records(self):
+        """Iterate over the records of the source file.
+
+        Returns:
+            An iterator of records as returned by :meth:`tokenize`.
+        """
+
+        if self._records is not None:
+            return iter(self._records)
+        records = map(profiling.wrap('tokenize', self.tokenize), self.rows)
+        return (r for r in records if r is not None)
+
+    def _cache_records(self):
+        """Tokenize the whole source file once, if the parser can."""
+
+        if self._records is None and self.tokenizes:
+            self._records = list(self.records())
+
+    def invalidate(self):
+        """Drop the cached results, the source file will be parsed again
+        on next access."""
+
+        self._points = None
+        self._raw = None
+        self._records = None
+
     def split_points(self):
         """Action for splitting points.
 
@@ -122,7 +429,7 @@ class Parser:
 
         Override this method if the format is different."""
 
-        return self.data.splitlines()
+        return self.rows
 
     def build_linestring(self):
         '''Join all Point objects into a LineString.
@@ -133,40 +440,86 @@ class Parser:
 
         return LineString([f.geometry for f in self.points])
 
-    @property
-    def points(self):
+    def iter_points(self):
         """Action for parsing a source file and for finding points.
 
         This method **could** be overridden in the child class
         to have a working parser.
-        
-        Returns:
-            A list of GeoJSON-like Feature object representing points coordinates.
-        """
-
 
-        self.d = self.split_points()
+        Yields:
+            GeoJSON-like Feature objects representing points coordinates.
+        """
 
-        valid_lines = filter(self.is_point, self.d)
+        valid_lines = filter(self.is_point, self.split_points())
         fg_lines = map(self.get_point, valid_lines)
 
-        return [p for p in fg_lines if p is not None]
+        return (p for p in fg_lines if p is not None)
 
-    @property
-    def raw_line(self):
+    def iter_raw(self):
         """Action for parsing a source file and for retrieving raw data.
 
         This method **must** be overridden in the child class
         to have a working parser.
-        
-        Returns:
-            A list of GeoJSON-like Feature object representing
-            representing raw data i.e. polar coordinates and other
-            informations.
+
+        Yields:
+            GeoJSON-like Feature objects representing raw data i.e. polar
+            coordinates and other informations.
         """
 
         pass
 
+    def point_table(self, raw=False):
+        """Build a columnar table of the parsed features.
+
+        Features are added to the table as they are parsed, without
+        building a list first. NumPy is needed.
+
+        Args:
+            raw (bool): Use raw data instead of points coordinates.
+
+        Returns:
+            A :class:`formats.table.PointTable` object.
+        """
+
+        from .table import PointTable
+
+        if raw:
+            features = self._raw if self._raw is not None else self.iter_raw()
+        else:
+            features = self._points if self._points is not None else self.iter_points()
+        return PointTable.from_features(features)
+
+    @property
+    def points(self):
+        """A list of GeoJSON-like Feature object representing points
+        coordinates, as yielded by :meth:`iter_points`.
+
+        The list is computed on first access only.
+        """
+
+        if self._points is None:
+            if self.rows.once:
+                self._cache_records()
+            self._points = list(self.iter_points())
+        return self._points
+
+    @property
+    def raw_line(self):
+        """A list of GeoJSON-like Feature object representing raw data,
+        as yielded by :meth:`iter_raw`.
+
+        The list is computed on first access only. None if the format does
+        not handle raw data.
+        """
+
+        if self._raw is None:
+            if self.rows.once:
+                self._cache_records()
+            raw = self.iter_raw()
+            if raw is not None:
+                self._raw = list(raw)
+        return self._raw
+
 
 def check_coordorder(coordorder):
     '''Check if coordinates order is valid.
@@ -21,15 +21,50 @@
 
 import logging
 
-from totalopenstation.formats.conversion import horizontal_to_slope
-from . import Feature, Point, UNKNOWN_STATION, UNKNOWN_POINT
-from .polar import BasePoint, PolarPoint
+from collections import namedtuple
+
+from . import Feature, Parser, Point, UNKNOWN_STATION, UNKNOWN_POINT
+from .polar import BasePoint, BatchReducer
 
 # ussfeet = US Survey Feet
 #
 UNITS = {"angle": {"0": "dms", "1": "gon"},
          "distance": {"0": "feet", "1": "meter", "2": "ussfeet"}}
 
+# Polar observation records
+OBSERVATIONS = ('SS', 'TR', 'BD', 'BR', 'FD', 'FR')
+
+# Fields of horizontal angles other than azimuth: Bearing, Angle Right or
+# Left, Deflection Right or Left, in order of preference
+ANGLES = ('BR', 'AR', 'AL', 'DR', 'DL')
+
+# Fields of vertical angles: Zenith, Vertical angle or Change elevation
+Z_ANGLES = (('ZE', 'z'), ('VA', 'v'), ('CE', 'dh'))
+
+# Fields of distances: Slope or Horizontal distance
+DISTANCES = (('SD', 's'), ('HD', 'h'))
+
+Mode = namedtuple('Mode', 'type angle_unit dist_unit note')
+Mode.__doc__ = '''A MO record: the units of the job.'''
+
+Coordinates = namedtuple('Coordinates', 'type name x y z note')
+Coordinates.__doc__ = '''A SP (store point) or OC (occupy point) record.'''
+
+LineOfSight = namedtuple('LineOfSight', 'type ih th note')
+LineOfSight.__doc__ = '''A LS record: instrument and target heights.'''
+
+Backsight = namedtuple('Backsight', 'type name circle note')
+Backsight.__doc__ = '''A BK record: the backsight point and circle reading.'''
+
+Observation = namedtuple('Observation', 'type name azimuth angle angle_type '
+                         'z_angle z_angle_type dist dist_type note')
+Observation.__doc__ = '''A polar observation record (SS, TR, BD, BR, FD or FR).
+
+Angle, vertical angle and distance fields are resolved once: each value is
+None when the record has none of its fields, and its type tells which field
+was found, e.g. ``'AR'`` for an angle right or ``'z'`` for a zenith angle.
+'''
+
 logger = logging.getLogger(__name__)
 
 def _record(recstr):
@@ -50,31 +85,94 @@ def _record(recstr):
         record_fields['note'] = ''
     else:
         record_fields['note'] = record_fields['--']
-    logger.debug("record_fields : %s" % (record_fields))
+    logger.debug("record_fields : %s", record_fields)
     return record_fields
 
-class FormatParser:
+
+def _first(rec, fields):
+    '''Return the value and the type of the first field found in rec.'''
+
+    for field, kind in fields:
+        if field in rec:
+            return float(rec[field]), kind
+    return None, None
+
+
+def _mode(rec):
+    return Mode(rec['type'], UNITS["angle"][rec['AU']], UNITS["distance"][rec['UN']],
+                rec['note'])
+
+
+def _coordinates(rec):
+    name = rec['PN'] if rec['type'] == 'SP' else rec['OP']
+    # extra whitespace in northing and easting fields
+    return Coordinates(rec['type'], name, float(rec['E ']), float(rec['N ']), float(rec['EL']),
+                       rec['note'])
+
+
+def _line_of_sight(rec):
+    return LineOfSight(rec['type'], float(rec['HI']), float(rec['HR']), rec['note'])
+
+
+def _backsight(rec):
+    return Backsight(rec['type'], rec.get('BP'), rec.get('BC'), rec['note'])
+
+
+def _observation(rec):
+    azimuth = float(rec['AZ']) if 'AZ' in rec else None
+    angle, angle_type = _first(rec, ((field, field) for field in ANGLES))
+    z_angle, z_angle_type = _first(rec, Z_ANGLES)
+    dist, dist_type = _first(rec, DISTANCES)
+    return Observation(rec['type'], rec['FP'], azimuth, angle, angle_type,
+                       z_angle, z_angle_type, dist, dist_type, rec['note'])
+
+
+# Typed record of each record type
+RECORDS = {
+    'MO': _mode,
+    'SP': _coordinates,
+    'OC': _coordinates,
+    'LS': _line_of_sight,
+    'BK': _backsight,
+    }
+RECORDS.update((rectype, _observation) for rectype in OBSERVATIONS)
+
+
+class FormatParser(Parser):
     '''The FormatParser for Carlson RW5 data format.
 
+    The parser does not set :attr:`resumes`: feature ids are numbered
+    from the start of the file, the units of the MO record apply to all
+    the following records and a station setup can refer to an earlier OC
+    record, so points can not be computed again from a station alone.
+
     Args:
         data (str): A string representing the file to be parsed.
 
     Attributes:
-        rows (list): A list of each lines of the file being parsed which do not begin with '-- '.
+        rows (:class:`formats.RawData`): The lines of the file being parsed.
     '''
 
-    def __init__(self, data):
-        self.rows = (r for r in data.splitlines() if not r.startswith('-- '))
-        # Text comments, but not comment records ------------------------^
+    tokenizes = True
+
+    def tokenize(self, line):
+        """Split a line in a typed record, skipping text comments and
+        records of other types."""
+
+        # Text comments, but not comment records
+        if not line.startswith('-- '):
+            rec = _record(line)
+            typed = RECORDS.get(rec['type'])
+            if typed is not None:
+                return typed(rec)
 
-    @property
-    def points(self):
+    def iter_points(self):
         '''Extract all RW5 data.
 
         This parser is based on the information in :ref:`if_carlson_rw5`
 
-        Returns:
-            A list of GeoJSON-like Feature object representing points coordinates.
+        Yields:
+            GeoJSON-like Feature objects representing points coordinates.
 
         Raises:
 
@@ -83,48 +181,41 @@ class FormatParser:
         '''
         points_coord = {}
         base_points = {}
-        points = []
         pid = 0
+        batch = BatchReducer()
 
-        for row in self.rows:
-            rec = _record(row)
+        for rec in self.records():
             # Get angle and distance units
-            if rec['type'] == 'MO':
-                angle_unit = UNITS["angle"][rec['AU']]
-                dist_unit = UNITS["distance"][rec['UN']]
+            if rec.type == 'MO':
+                angle_unit = rec.angle_unit
+                dist_unit = rec.dist_unit
             # Look for point coordinates
-            if rec['type'] == 'SP':
-                point_name = rec['PN']
-                northing = float(rec['N '])  # extra whitespace
-                easting = float(rec['E '])  # extra whitespace
-                elevation = float(rec['EL'])
-                point = Point(easting, northing, elevation)
-                attrib = [rec['note']]
+            elif rec.type == 'SP':
+                point_name = rec.name
+                point = Point(rec.x, rec.y, rec.z)
+                attrib = [rec.note]
                 f = Feature(point,
                             desc='PT',
                             id=pid,
                             point_name=point_name,
                             dist_unit=dist_unit,
                             attrib=attrib)
-                points.append(f)
+                batch.append(f)
                 pid += 1
                 points_coord[point_name] = point
             # Look for station coordinates
-            if rec['type'] == 'OC':
-                station_name = rec['OP']
-                northing = float(rec['N '])  # extra whitespace
-                easting = float(rec['E '])  # extra whitespace
-                elevation = float(rec['EL'])
-                station_point = Point(easting, northing, elevation)
+            elif rec.type == 'OC':
+                station_name = rec.name
+                station_point = Point(rec.x, rec.y, rec.z)
                 points_coord[station_name] = station_point
-                bp = BasePoint(x=easting, y=northing, z=elevation, ih=0, b_zero_st=0.0)
+                bp = BasePoint(x=rec.x, y=rec.y, z=rec.z, ih=0, b_zero_st=0.0)
                 base_points[station_name] = bp
             # Look for line of sight values
             # Finalize station computing
-            if rec['type'] == 'LS':
-                ih = float(rec['HI'])
-                th = float(rec['HR'])
-                attrib = [rec['note']]
+            elif rec.type == 'LS':
+                ih = rec.ih
+                th = rec.th
+                attrib = [rec.note]
                 try:
                     station_point
                 except NameError:
@@ -143,101 +234,65 @@ class FormatParser:
                     last_stf
                 except NameError:
                     last_stf = stf
-                    points.append(stf)
+                    batch.append(stf)
                     pid += 1
                 else:
                     if stf.point_name != last_stf.point_name or \
                                     stf.geometry.x != last_stf.geometry.x or \
                                     stf.geometry.y != last_stf.geometry.y or \
                                     stf.geometry.z != last_stf.geometry.z:
-                        points.append(stf)
+                        batch.append(stf)
                         pid += 1
                         last_stf = stf
             # Look for polar data
-            if rec['type'] in ('SS', 'TR', 'BD', 'BR', 'FD', 'FR'):
-                point_name = rec['FP']
-                attrib = [rec['note']]
+            elif rec.type in OBSERVATIONS:
+                point_name = rec.name
                 # Angle is recorded as azimuth or horizontal angle
-                try:
-                    angle = float(rec['AZ'])
-                except KeyError:
-                    # Angle is either Bearing, Angle Right or Left, Deflection Right or Left
-                    try:
-                        angle = float(rec['BR'])
-                    except KeyError:
-                        try:
-                            angle = float(rec['AR'])
-                        except KeyError:
-                            try:
-                                angle = float(rec['AL'])
-                            except KeyError:
-                                try:
-                                    angle = float(rec['DR'])
-                                except KeyError:
-                                    try:
-                                        angle = float(rec['DL'])
-                                    except KeyError:
-                                        logger.info('There is no horizontal angle value')
-                # Vertical angle is either Zenith, Vertical angle or Change elevation
-                try:
-                    z_angle = float(rec['ZE'])
-                except KeyError:
-                    try:
-                        z_angle = float(rec['VA'])
-                    except KeyError:
-                        try:
-                            z_angle = float(rec['CE'])
-                        except KeyError:
-                            logger.info('There is no vertical angle value')
-                        else:
-                            z_angle_type = 'dh'
-                    else:
-                        z_angle_type = 'v'
+                if rec.azimuth is not None:
+                    angle = rec.azimuth
+                elif rec.angle is not None:
+                    angle = rec.angle
                 else:
-                    z_angle_type= 'z'
-                try:
-                    dist = float(rec['SD'])
-                except KeyError:
-                    try:
-                        dist = float(rec['HD'])
-                    except KeyError:
-                        logger.info('There is no distance value')
-                    else:
-                        dist_type = "h"
+                    logger.info('There is no horizontal angle value')
+                if rec.z_angle is not None:
+                    z_angle = rec.z_angle
+                    z_angle_type = rec.z_angle_type
                 else:
-                    dist_type = 's'
-                attrib = [rec['note']]
-                p = PolarPoint(angle_unit=angle_unit,
-                               z_angle_type=z_angle_type,
-                               dist_type=dist_type,
-                               dist=dist,
-                               angle=angle,
-                               z_angle=z_angle,
-                               th=th,
-                               base_point=bp,
-                               pid=pid,
-                               text=point_name,
-                               coordorder='ENZ')
-                point = p.to_point()
-                f = Feature(point,
+                    logger.info('There is no vertical angle value')
+                if rec.dist is not None:
+                    dist = rec.dist
+                    dist_type = rec.dist_type
+                else:
+                    logger.info('There is no distance value')
+                attrib = [rec.note]
+                f = Feature(None,
                             desc='PT',
                             id=pid,
                             point_name=point_name,
                             dist_unit=dist_unit,
                             attrib=attrib)
-                points.append(f)
+                batch.add_polar(f,
+                                angle_unit=angle_unit,
+                                z_angle_type=z_angle_type,
+                                dist_type=dist_type,
+                                dist=dist,
+                                angle=angle,
+                                z_angle=z_angle,
+                                th=th,
+                                base_point=bp,
+                                coordorder='ENZ')
                 pid += 1
-        logger.debug(points)
-        return points
+            if batch.full:
+                yield from batch.flush()
+        yield from batch.flush()
 
-    @property
-    def raw_line(self):
+    def iter_raw(self):
         '''Extract all Carlson RW5 data.
 
         This parser is based on the information in :ref:`if_carlson_rw5`
 
-        Returns:
-            A list of GeoJSON-like Feature object representing points coordinates.
+        Yields:
+            GeoJSON-like Feature objects representing points coordinates.
 
         Raises:
 
@@ -252,47 +307,39 @@ class FormatParser:
         '''
 
         points_coord = {}
-        points = []
         pid = 0
         station_id = 1
 
-        for row in self.rows:
-            rec = _record(row)
+        for rec in self.records():
             # Get angle and distance units
-            if rec['type'] == 'MO':
-                angle_unit = UNITS["angle"][rec['AU']]
-                dist_unit = UNITS["distance"][rec['UN']]
+            if rec.type == 'MO':
+                angle_unit = rec.angle_unit
+                dist_unit = rec.dist_unit
             # Look for point coordinates
-            if rec['type'] == 'SP':
-                point_name = rec['PN']
-                northing = float(rec['N '])  # extra whitespace
-                easting = float(rec['E '])  # extra whitespace
-                elevation = float(rec['EL'])
-                point = Point(easting, northing, elevation)
-                attrib = [rec['note']]
+            elif rec.type == 'SP':
+                point_name = rec.name
+                point = Point(rec.x, rec.y, rec.z)
+                attrib = [rec.note]
                 f = Feature(point,
                             desc='PT',
                             id=pid,
                             point_name=point_name,
                             dist_unit=dist_unit,
                             attrib=attrib)
-                points.append(f)
+                yield f
                 pid += 1
                 points_coord[point_name] = point
             # Look for station coordinates
-            if rec['type'] == 'OC':
-                station_name = rec['OP']
-                northing = float(rec['N '])  # extra whitespace
-                easting = float(rec['E '])  # extra whitespace
-                elevation = float(rec['EL'])
-                station_point = Point(easting, northing, elevation)
+            elif rec.type == 'OC':
+                station_name = rec.name
+                station_point = Point(rec.x, rec.y, rec.z)
                 points_coord[station_name] = station_point
             # Look for line of sight values
             # Finalize station computing
-            if rec['type'] == 'LS':
-                ih = float(rec['HI'])
-                th = float(rec['HR'])
-                attrib = [rec['note']]
+            elif rec.type == 'LS':
+                ih = rec.ih
+                th = rec.th
+                attrib = [rec.note]
                 try:
                     station_point
                 except NameError:
@@ -313,7 +360,7 @@ class FormatParser:
                     last_stf
                 except NameError:
                     last_stf = stf
-                    points.append(stf)
+                    yield stf
                     pid += 1
                 else:
                     if stf.point_name != last_stf.point_name or \
@@ -321,13 +368,13 @@ class FormatParser:
                                     stf.geometry.y != last_stf.geometry.y or \
                                     stf.geometry.z != last_stf.geometry.z or \
                                     stf.properties['ih'] != last_stf.properties['ih']:
-                        points.append(stf)
+                        yield stf
                         pid += 1
                         last_stf = stf
             # Look for back sight values
-            if rec['type'] == 'BK':
-                point_name = rec['BP']
-                circle = rec['BC']
+            elif rec.type == 'BK':
+                point_name = rec.name
+                circle = rec.circle
                 try:
                     point = points_coord[point_name]
                 except KeyError:
@@ -339,65 +386,27 @@ class FormatParser:
                             point_name=point_name,
                             angle_unit=angle_unit,
                             circle=circle)
-                points.append(f)
+                yield f
                 pid += 1
             # Look for polar data
-            if rec['type'] in ('SS', 'TR', 'BD', 'BR', 'FD', 'FR'):
-                point_name = rec['FP']
-                # Angle is recorded as azimuth or horizontal angle
-                try:
-                    azimuth = float(rec['AZ'])
-                except KeyError:
-                    azimuth = None
-                # Angle is either Bearing, Angle Right or Left, Deflection Right or Left
-                try:
-                    angle = float(rec['BR'])
-                except KeyError:
-                    try:
-                        angle = float(rec['AR'])
-                    except KeyError:
-                        try:
-                            angle = float(rec['AL'])
-                        except KeyError:
-                            try:
-                                angle = float(rec['DR'])
-                            except KeyError:
-                                try:
-                                    angle = float(rec['DL'])
-                                except KeyError:
-                                    logger.info('There is no horizontal angle value')
-                                    angle = None
-                # Vertical angle is either Zenith, Vertical angle or Change elevation
-                try:
-                    z_angle = float(rec['ZE'])
-                except KeyError:
-                    try:
-                        z_angle = float(rec['VA'])
-                    except KeyError:
-                        try:
-                            z_angle = float(rec['CE'])
-                        except KeyError:
-                            logger.info('There is no vertical angle value')
-                            z_angle = None
-                        else:
-                            z_angle_type = 'dh'
-                    else:
-                        z_angle_type = 'v'
+            elif rec.type in OBSERVATIONS:
+                point_name = rec.name
+                # Angle is recorded as azimuth and/or horizontal angle
+                azimuth = rec.azimuth
+                angle = rec.angle
+                if angle is None:
+                    logger.info('There is no horizontal angle value')
+                z_angle = rec.z_angle
+                if z_angle is None:
+                    logger.info('There is no vertical angle value')
                 else:
-                    z_angle_type = 'z'
-                try:
-                    dist = float(rec['SD'])
-                except KeyError:
-                    try:
-                        dist = float(rec['HD'])
-                    except KeyError:
-                        logger.info('There is no distance value')
-                        dist = None
-                    else:
-                        dist_type = 'h'
+                    z_angle_type = rec.z_angle_type
+                dist = rec.dist
+                if dist is None:
+                    logger.info('There is no distance value')
                 else:
-                    dist_type = 's'
-                attrib = [rec['note']]
+                    dist_type = rec.dist_type
+                attrib = [rec.note]
                 try:
                     point = points_coord[point_name]
                 except KeyError:
@@ -424,8 +433,6 @@ class FormatParser:
                             th=th,
                             station_name=station_name,
                             attrib=attrib)
-                points.append(f)
+                yield f
                 pid += 1
 
-        logger.debug(points)
-        return points
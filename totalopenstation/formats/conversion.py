@@ -21,185 +21,271 @@
 # along with Total Open Station.  If not, see
 # <http://www.gnu.org/licenses/>.
 
-from math import sin,cos, pi
+from math import sin, cos
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import UNITS_CIRCLE
 
 
 def deg_to_gon(angle):
     '''Convert degrees format to grade (gon) format.'''
-    return angle * 400 / 360
+    return convert(angle, 'deg', 'gon')
 
 
 def deg_to_rad(angle):
     '''Convert degrees format to radian format.'''
-    return angle * (2 * pi) / 360
+    return convert(angle, 'deg', 'rad')
 
 
 def deg_to_mil(angle):
-    return angle * 6400 / 360
+    '''Convert degrees format to mil (NATO) format.'''
+    return convert(angle, 'deg', 'mil')
 
 
 def deg_to_dms(angle):
-    d, m = divmod(angle, 1)
-    m, s = divmod(m * 100, 1)
-    return d + m * 60 / 10000 + s * 100 * 3600 / 100000000
+    '''Convert degrees format to degrees in DDD.MMSS format.'''
+    return convert(angle, 'deg', 'dms')
 
 
 def dms_to_deg(angle):
     '''Convert degrees in DDD.MMSS format to degree format.'''
-    d, m = divmod(angle, 1)
-    m, s = divmod(m * 100, 1)
-    return d + m / 60 + s * 100 / 3600
+    return convert(angle, 'dms', 'deg')
 
 
 def dms_to_gon(angle):
     '''Convert degrees in DDD.MMSS format to grade (gon) format.'''
-    angle = dms_to_deg(angle)
-    return deg_to_gon(angle)
+    return convert(angle, 'dms', 'gon')
 
 
 def dms_to_rad(angle):
     '''Convert degrees in DDD.MMSS format to radians format.'''
-    angle = dms_to_deg(angle)
-    return deg_to_rad(angle)
+    return convert(angle, 'dms', 'rad')
 
 
 def dms_to_mil(angle):
-    '''Convert degrees in DDD.MMSS format to radians format.'''
-    angle = dms_to_deg(angle)
-    return deg_to_mil(angle)
+    '''Convert degrees in DDD.MMSS format to mil (NATO) format.'''
+    return convert(angle, 'dms', 'mil')
 
 
 def rad_to_deg(angle):
-    return angle * 360 / (2 * pi)
+    '''Convert radian format to degrees format.'''
+    return convert(angle, 'rad', 'deg')
 
 
 def rad_to_dms(angle):
-    angle = rad_to_deg(angle)
-    return deg_to_dms(angle)
+    '''Convert radian format to degrees in DDD.MMSS format.'''
+    return convert(angle, 'rad', 'dms')
 
 
 def rad_to_gon(angle):
-    return angle * 400 / (2 * pi)
+    '''Convert radian format to grade (gon) format.'''
+    return convert(angle, 'rad', 'gon')
 
 
 def rad_to_mil(angle):
-    return angle * 6400 / (2* pi)
+    '''Convert radian format to mil (NATO) format.'''
+    return convert(angle, 'rad', 'mil')
 
 
 def mil_to_gon(angle):
     '''Convert degrees in mil (NATO) format to grade (gon) format.'''
-    return angle * 400 / 6400
+    return convert(angle, 'mil', 'gon')
 
 
 def mil_to_rad(angle):
     '''Convert degrees in mil (NATO) format to radian format.'''
-    return angle * (2 * pi) / 6400
+    return convert(angle, 'mil', 'rad')
 
 
 def mil_to_deg(angle):
-    return angle * 360 / 6400
+    '''Convert mil (NATO) format to degrees format.'''
+    return convert(angle, 'mil', 'deg')
 
 
 def mil_to_dms(angle):
-    angle = mil_to_deg(angle)
-    return deg_to_dms(angle)
+    '''Convert mil (NATO) format to degrees in DDD.MMSS format.'''
+    return convert(angle, 'mil', 'dms')
 
 
 def gon_to_rad(angle):
     '''Convert grade (gon) format to radian format.'''
-    return angle * (2 * pi) / 400
+    return convert(angle, 'gon', 'rad')
 
 
 def gon_to_deg(angle):
-    return angle * 360 / 400
+    '''Convert grade (gon) format to degrees format.'''
+    return convert(angle, 'gon', 'deg')
 
 
 def gon_to_dms(angle):
-    angle = gon_to_deg(angle)
-    return deg_to_dms(angle)
+    '''Convert grade (gon) format to degrees in DDD.MMSS format.'''
+    return convert(angle, 'gon', 'dms')
 
 
 def gon_to_mil(angle):
-    return angle * 6400 / 400
+    '''Convert grade (gon) format to mil (NATO) format.'''
+    return convert(angle, 'gon', 'mil')
 
 
 def to_rad(angle, angle_unit):
     '''Conversion function for angles to radian'''
-    if angle_unit == "dms":
-        return dms_to_rad(angle)
-    elif angle_unit == "mil":
-        return mil_to_rad(angle)
-    elif angle_unit == "deg":
-        return deg_to_rad(angle)
-    else:
-        return gon_to_rad(angle)
+    return convert(angle, angle_unit, 'rad')
 
 
 def to_deg(angle, angle_unit):
     '''Conversion function for angles to degree'''
-    if angle_unit == "dms":
-        return dms_to_deg(angle)
-    elif angle_unit == "mil":
-        return mil_to_deg(angle)
-    elif angle_unit == "rad":
-        return rad_to_deg(angle)
-    else:
-        return gon_to_deg(angle)
+    return convert(angle, angle_unit, 'deg')
 
 
 def to_gon(angle, angle_unit):
-    '''Conversion function for angles to degree'''
-    if angle_unit == "dms":
-        return dms_to_gon(angle)
-    elif angle_unit == "mil":
-        return mil_to_gon(angle)
-    elif angle_unit == "rad":
-        return rad_to_gon(angle)
-    else:
-        return deg_to_gon(angle)
+    '''Conversion function for angles to grade (gon)'''
+    return convert(angle, angle_unit, 'gon')
 
 
 def to_dms(angle, angle_unit):
-    '''Conversion function for angles to degree'''
-    if angle_unit == "gon" or angle_unit == "grads":
-        return gon_to_dms(angle)
-    elif angle_unit == "mil":
-        return mil_to_dms(angle)
-    elif angle_unit == "rad":
-        return rad_to_dms(angle)
-    else:
-        return deg_to_dms(angle)
+    '''Conversion function for angles to degrees in DDD.MMSS format'''
+    return convert(angle, angle_unit, 'dms')
 
 
 def to_mil(angle, angle_unit):
-    '''Conversion function for angles to degree'''
-    if angle_unit == "dms":
-        return dms_to_mil(angle)
-    elif angle_unit == "gon" or angle_unit == "grads":
-        return gon_to_mil(angle)
-    elif angle_unit == "rad":
-        return rad_to_mil(angle)
-    else:
-        return deg_to_mil(angle)
+    '''Conversion function for angles to mil (NATO)'''
+    return convert(angle, angle_unit, 'mil')
 
 
 def vertical_to_zenithal(angle, angle_unit):
     '''Convert angle from vertical (reference is horizontal) to
     zenithal (reference is north)'''
     if angle_unit == "dms":
-        return to_dms(90 - to_deg(angle, angle_unit), "deg")
-    elif angle_unit == "gon" or angle_unit == "grads":
-        return 100 - angle
-    elif angle_unit == "rad":
-        return (pi / 2) - angle
-    else:
-        return 90 - angle
+        return convert(90 - convert(angle, 'dms', 'deg'), 'deg', 'dms')
+    return UNITS_CIRCLE.get(angle_unit, 360) / 4 - angle
+
 
 def horizontal_to_slope(dist, angle, angle_unit, angle_type="z"):
     '''Convert distance to slope from horizontal
     Angle is considered zenithal by default'''
-    angle = to_rad(angle, angle_unit)
+    angle = convert(angle, angle_unit, 'rad')
     if angle_type == "z":
         return dist / sin (angle)
     else:
         return dist / cos (angle)
+
+
+# Angle units known by convert(), DDD.MMSS angles are converted through degrees
+ANGLE_UNITS = ('deg', 'dms', 'gon', 'mil', 'rad')
+
+UNIT_ALIASES = {'grads': 'gon'}
+
+# Rounding tolerance when splitting DDD.MMSS angles, e.g. 0.21 * 100 gives
+# 20.999999999999996 which must be read as 21 minutes
+DMS_EPSILON = 1e-9
+
+
+def _dms_to_deg(angle):
+    '''DDD.MMSS to degrees, for floats and NumPy arrays.'''
+
+    sign = 1 - 2 * (angle < 0)
+    d, m = divmod(abs(angle) + DMS_EPSILON, 1)
+    m, s = divmod((m - DMS_EPSILON) * 100 + DMS_EPSILON, 1)
+    s -= DMS_EPSILON
+    return sign * (d + m / 60 + s / 36)
+
+
+def _deg_to_dms(angle):
+    '''Degrees to DDD.MMSS, for floats and NumPy arrays.'''
+
+    sign = 1 - 2 * (angle < 0)
+    d, m = divmod(abs(angle), 1)
+    m, s = divmod(m * 60, 1)
+    return sign * (d + m / 100 + s * 60 / 10000)
+
+
+def _linear(factor):
+    def converter(angle):
+        return angle * factor
+    return converter
+
+
+def _compose(*converters):
+    def converter(angle):
+        for c in converters:
+            angle = c(angle)
+        return angle
+    return converter
+
+
+def _build_converters():
+    '''Build the (from_unit, to_unit) table of conversion functions.'''
+
+    converters = {}
+    for from_unit in ANGLE_UNITS:
+        for to_unit in ANGLE_UNITS:
+            factor = UNITS_CIRCLE[to_unit] / UNITS_CIRCLE[from_unit]
+            if from_unit == to_unit:
+                converters[from_unit, to_unit] = _linear(1.0)
+            elif from_unit == 'dms':
+                converters[from_unit, to_unit] = _compose(_dms_to_deg, _linear(factor))
+            elif to_unit == 'dms':
+                converters[from_unit, to_unit] = _compose(_linear(factor), _deg_to_dms)
+            else:
+                converters[from_unit, to_unit] = _linear(factor)
+    converters['dms', 'deg'] = _dms_to_deg
+    converters['deg', 'dms'] = _deg_to_dms
+    return converters
+
+
+# Conversion function of each (from_unit, to_unit) pair
+CONVERTERS = _build_converters()
+
+
+def converter(from_unit, to_unit):
+    '''Return the function converting angles from a unit to another.
+
+    The function accepts floats and NumPy arrays.
+
+    Raises:
+        ValueError: One of the units is unknown.
+    '''
+
+    from_unit = UNIT_ALIASES.get(from_unit, from_unit)
+    to_unit = UNIT_ALIASES.get(to_unit, to_unit)
+    try:
+        return CONVERTERS[from_unit, to_unit]
+    except KeyError:
+        raise ValueError('Unknown angle unit: %s or %s' % (from_unit, to_unit))
+
+
+def convert(angle, from_unit, to_unit):
+    '''Convert angles from a unit to another.
+
+    All units are handled in a single table, the functions above are
+    shortcuts for single pairs of units, and a whole sequence of angles is
+    converted at once. With NumPy, sequences
+    are converted with array operations, without a Python call per angle.
+    Negative DDD.MMSS angles are decomposed on their absolute value.
+
+    Args:
+        angle (float, sequence or numpy.ndarray): The angles to convert.
+        from_unit (str): The unit of angle, one of ``ANGLE_UNITS``.
+        to_unit (str): The unit to convert to, one of ``ANGLE_UNITS``.
+
+    Returns:
+        A float for a single angle, else a NumPy array, or a list if NumPy
+        is not installed.
+
+    Raises:
+        ValueError: One of the units is unknown.
+    '''
+
+    func = converter(from_unit, to_unit)
+    if isinstance(angle, (int, float)):
+        return float(func(float(angle)))
+    if np is not None:
+        array = np.asarray(angle, dtype=np.float64)
+        if array.ndim == 0:
+            return float(func(array))
+        return func(array)
+    return [func(float(a)) for a in angle]
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# filename: formats/incremental.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+'''Keep the parsed features of an edited text up to date.'''
+
+
+class IncrementalParser:
+    '''Parse a text again after each edit, doing as little work as possible.
+
+    Lines are tokenized with :meth:`formats.Parser.tokenize` and records are
+    kept by line, so an edit only tokenizes the changed lines again. When the
+    parser defines :meth:`formats.Parser.is_station`, the text is cut in
+    segments starting at each station setup and the points of each segment
+    are kept: after an edit, points are computed again from the nearest
+    station before the changed lines, up to the next station after them.
+    Only Leica GSI does so; other tokenizing parsers, like Carlson RW5 and
+    Nikon Raw, compute all points again from the kept records.
+
+    Parsers without :meth:`formats.Parser.tokenize` parse the whole text
+    again after each edit.
+
+    Features are shared between successive results, they must not be
+    modified.
+
+    Args:
+        parser_class (class): A :class:`formats.Parser` subclass.
+        text (str): The initial text.
+
+    Attributes:
+        lines (list): The lines of the text.
+        records (list): The record of each line, None for skipped lines.
+    '''
+
+    def __init__(self, parser_class, text=''):
+        self.parser_class = parser_class
+        self._parser = parser_class('')
+        self.tokenizes = self._parser.tokenizes
+        self.resumes = self.tokenizes and self._parser.resumes
+        self.lines = []
+        self.records = []
+        # True for lines holding a station setup
+        self._stations = []
+        # Points of each segment, by (start, end) line
+        self._segments = {}
+        self._points = None
+        self._raw = None
+        self.update(text)
+
+    def update(self, text):
+        '''Set the text, finding the changed lines.
+
+        The changed lines are those between the longest common head and
+        tail of the old and new lines.
+
+        Returns:
+            The (start, end, count) of the edit, see :meth:`replace`.
+        '''
+
+        lines = text.splitlines()
+        old = self.lines
+        size = min(len(old), len(lines))
+        start = 0
+        while start < size and old[start] == lines[start]:
+            start += 1
+        tail = 0
+        while tail < size - start and old[-1 - tail] == lines[-1 - tail]:
+            tail += 1
+        end = len(old) - tail
+        new_end = len(lines) - tail
+        if start == end == new_end:
+            return start, end, 0
+        self.replace(start, end, lines[start:new_end])
+        return start, end, new_end - start
+
+    def replace(self, start, end, lines):
+        '''Replace the lines from start to end (excluded) with lines.
+
+        Only the new lines are tokenized, points are computed again on next
+        access to :attr:`points`.
+        '''
+
+        if self.tokenizes:
+            tokenize = self._parser.tokenize
+            records = [tokenize(line) for line in lines]
+            self.records[start:end] = records
+            if self.resumes:
+                is_station = self._parser.is_station
+                self._stations[start:end] = [r is not None and is_station(r) for r in records]
+        self.lines[start:end] = lines
+        delta = len(lines) - (end - start)
+        segments = {}
+        for (first, last), features in self._segments.items():
+            if last <= start:
+                segments[first, last] = features
+            elif first >= end:
+                segments[first + delta, last + delta] = features
+        self._segments = segments
+        self._points = None
+        self._raw = None
+
+    def stations(self):
+        '''Return the index of the lines holding a station setup.'''
+
+        return [i for i, station in enumerate(self._stations) if station]
+
+    def _parser_for(self, start, end):
+        '''Return a parser for the lines from start to end (excluded).'''
+
+        parser = self.parser_class('')
+        parser._records = [r for r in self.records[start:end] if r is not None]
+        return parser
+
+    def _segment_points(self, start, end):
+        key = (start, end)
+        if key not in self._segments:
+            self._segments[key] = list(self._parser_for(start, end).iter_points())
+        return self._segments[key]
+
+    @property
+    def points(self):
+        '''The list of point features of the text.'''
+
+        if self._points is None:
+            if not self.tokenizes:
+                self._points = self.parser_class('\n'.join(self.lines)).points
+            elif not self.resumes:
+                self._points = self._segment_points(0, len(self.lines))
+            else:
+                bounds = [0] + self.stations() + [len(self.lines)]
+                segments = [(s, e) for s, e in zip(bounds, bounds[1:]) if s < e]
+                self._segments = {key: self._segments[key] for key in segments
+                                  if key in self._segments}
+                self._points = [f for s, e in segments for f in self._segment_points(s, e)]
+        return self._points
+
+    @property
+    def raw_line(self):
+        '''The list of raw data features of the text, None if the format
+        does not handle raw data.'''
+
+        if self._raw is None:
+            if self.tokenizes:
+                self._raw = self._parser_for(0, len(self.lines)).raw_line
+            else:
+                self._raw = self.parser_class('\n'.join(self.lines)).raw_line
+        return self._raw
@@ -25,9 +25,12 @@ import xml.etree.ElementTree as xml
 import time
 import re
 import os
+import shutil
+import tempfile
 
+from totalopenstation.utils import profiling
 from . import Feature, Parser, Point, UNKNOWN_STATION, UNKNOWN_POINT
-from .polar import BasePoint, PolarPoint
+from .polar import BasePoint, BatchReducer
 
 # Template string
 TEMPLATE = '''<?xml version="1.0"?>
@@ -41,6 +44,23 @@ TEMPLATE = '''<?xml version="1.0"?>
 
 DEFAULT_NS = "http://www.landxml.org/schema/LandXML-1.2"
 DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+# The end of a document written by LandXML.to_string
+SURVEY_END = "\n\t</Survey>\n</LandXML>"
+# Bytes of a section kept in memory by SurveyWriter before using a file
+SPOOL_SIZE = 1 << 20
+
+# Elements read by the parser, by their path from the root element
+PARSED = {
+    ('Units',): 'units',
+    ('Survey', 'CgPoints', 'CgPoint'): 'cgpoint',
+    ('Survey', 'CgPoints', 'Feature'): 'feature',
+    ('Survey', 'InstrumentSetup'): 'setup',
+    ('Survey', 'ObservationGroup'): 'group',
+    }
+# Elements read ahead when a CgPoint is given before its Feature
+CGFEATURES = {
+    ('Survey', 'CgPoints', 'Feature'): 'feature',
+    }
 
 
 def _indent(elem, level=0):
@@ -70,6 +90,172 @@ def _indent(elem, level=0):
     return elem
 
 
+def _cg_point(kwargs):
+    """
+    Return a CgPoint element and its Feature, None without attrib.
+
+    See :meth:`Survey.cg_point` for kwargs.
+    """
+
+    cgpoint = xml.Element("CgPoint")
+    feature = None
+    # Fill of CgPoint attributes
+    if "point_name" in kwargs:
+        cgpoint.set("name", str(kwargs["point_name"]))
+    if "pid" in kwargs:
+        cgpoint.set("pntRef", str(kwargs["pid"]))
+    if "x" in kwargs:
+        cgpoint.text = "%s %s" % (str(kwargs["x"]),
+                                     str(kwargs["y"]))
+        if "z" in kwargs:
+            cgpoint.text += " %s" % (str(kwargs["z"]))
+    # attrib is not mandatory in CgPoints so this is a feature
+    if "attrib" in kwargs:
+        cgpoint.set("featureRef", "feature%s" % (str(kwargs["point_name"])))
+        feature = xml.Element("Feature")
+        feature.set("name", "feature%s" % (str(kwargs["point_name"])))
+        # feature_property
+        for i in range(len(kwargs["attrib"])):
+            xml.SubElement(feature, "Property",
+                          label="attrib%s" % (i + 1),
+                          value=str(kwargs["attrib"][i]))
+    return cgpoint, feature
+
+
+def _instrument_setup(id, kwargs):
+    """
+    Return the InstrumentSetup and ObservationGroup elements of a setup.
+
+    See :meth:`Survey.setup` for kwargs.
+    """
+
+    # Creation of InstrumentSetup tag, subelement of Survey
+    instrument_setup = xml.Element("InstrumentSetup",
+                                   id="setup" + str(id),
+                                   stationName="",
+                                   instrumentHeight="")
+    # Fill of InstrumentSetup attributes
+    if "point_name" in kwargs:
+        instrument_setup.set("stationName", str(kwargs["point_name"]))
+    if "ih" in kwargs:
+        instrument_setup.set("instrumentHeight", str(kwargs["ih"]))
+    if "hz0" in kwargs:
+        instrument_setup.set("orientationAzimuth", str(kwargs["hz0"]))
+    # attrib is not mandatory in InstrumentSetup so this is a feature
+    if "attrib" in kwargs and kwargs["attrib"]:
+        feature = xml.SubElement(instrument_setup, "Feature")
+        # feature_property
+        for i in range(len(kwargs["attrib"])):
+            xml.SubElement(feature, "Property",
+                           label="attrib%s" % (i + 1),
+                           value=str(kwargs["attrib"][i]))
+
+    # Creation of InstrumentPoint tag, subelement of InstrumentSetup
+    instrument_point = xml.SubElement(instrument_setup, "InstrumentPoint")
+    # Fill of InstrumentPoint attributes
+    if "pid" in kwargs:
+        instrument_point.set("pntRef", str(kwargs["pid"]))
+    if "instru_x" in kwargs:
+        instrument_point.text = "%s %s %s" % (str(kwargs["instru_x"]),
+                                              str(kwargs["instru_y"]),
+                                              str(kwargs["instru_z"]))
+
+    # Creation of ObservationGroup tag, subelement of Survey
+    observation_group = xml.Element("ObservationGroup",
+                                    id="o" + str(id),
+                                    setupID="setup" + str(id))
+    # Creation of Backsight tag, subelement of ObservationGroup
+    if "circle" in kwargs or "back_x" in kwargs:
+        backsight = xml.SubElement(observation_group, "Backsight",
+                                   circle="0.")
+        # Fill of Backsight attributes
+        if "circle" in kwargs:
+            backsight.set("circle", str(kwargs["circle"]))
+        if "back_x" in kwargs:
+            # Creation of BacksightPoint tag, subelement of Backsight
+            backsight_point = xml.SubElement(backsight, "BacksightPoint")
+            # Fill of BacksightPoint attributes
+            if "back_name" in kwargs:
+                backsight_point.set("name", str(kwargs["back_name"]))
+            if "back_x" in kwargs:
+                backsight_point.text = "%s %s %s" % (str(kwargs["back_x"]),
+                                                     str(kwargs["back_y"]),
+                                                     str(kwargs["back_z"]))
+    return instrument_setup, observation_group
+
+
+def _raw_observation(kwargs):
+    """
+    Return a RawObservation element.
+
+    See :meth:`Survey.raw_observation` for kwargs.
+    """
+
+    # Creation of RawObservation tag, subelement of ObservationGroup
+    raw_observation = xml.Element("RawObservation")
+    # Fill of RawObservation attributes
+    if "th" in kwargs:
+        raw_observation.set("targetHeight", str(kwargs["th"]))
+    if "angle" in kwargs and kwargs["angle"] is not None:
+        raw_observation.set("horizAngle", str(kwargs["angle"]))
+    if "azimuth" in kwargs and kwargs["azimuth"] is not None:
+        raw_observation.set("azimuth", str(kwargs["azimuth"]))
+    if "z_angle" in kwargs and kwargs["z_angle"] is not None:
+        if kwargs["z_angle_type"] == "dh":
+            raw_observation.set("vertDistance", str(kwargs["z_angle"]))
+        if kwargs["z_angle_type"] == "z":
+            raw_observation.set("zenithAngle", str(kwargs["z_angle"]))
+        if kwargs["z_angle_type"] == "v":
+            raw_observation.set("zenithAngle", str(vertical_to_zenithal(kwargs["z_angle"],kwargs["angle_unit"])))
+    if "dist" in kwargs and kwargs["dist"] is not None:
+        if kwargs["dist_type"] == 's':
+            raw_observation.set("slopeDistance", str(kwargs["dist"]))
+        if kwargs["dist_type"] == 'h':
+            raw_observation.set("horizDistance", str(kwargs["dist"]))
+    # Creation of TargetPoint tag, subelement of RawObservation
+    target_point = xml.SubElement(raw_observation, "TargetPoint")
+    feature = None
+    # Fill of TargetPoint attributes
+    if "point_name" in kwargs:
+        target_point.set("desc", str(kwargs["point_name"]))
+    if "pid" in kwargs:
+        target_point.set("pntRef", str(kwargs["pid"]))
+    if "x" in kwargs:
+        target_point.text = "%s %s" % (str(kwargs["x"]),
+                                       str(kwargs["y"]))
+        if "z" in kwargs:
+            target_point.text += " %s" % (str(kwargs["z"]))
+    # targetHeight is not mandatory in RawObservation so this is a feature
+    if "ih" in kwargs and kwargs["ih"] is not None:
+        if feature is None:
+            feature = xml.SubElement(raw_observation, "Feature")
+        # feature_property
+        xml.SubElement(feature, "Property",
+                       label="instrumentHeight",
+                       value=str(kwargs["ih"]))
+    # ppm or prism_constant are not mandatory in RawObservation so this is a feature
+    if "ppm" in kwargs and kwargs["ppm"] is not None:
+        if feature is None:
+            feature = xml.SubElement(raw_observation, "Feature")
+        # feature_property
+        xml.SubElement(feature, "Property",
+                       label="edmAccuracyppm",
+                       value=str(kwargs["ppm"]))
+        xml.SubElement(feature, "Property",
+                       label="edmAccuracyConstant",
+                       value=str(kwargs["prism_constant"]))
+    # attrib is not mandatory in RawObservation so this is a feature
+    if "attrib" in kwargs:
+        if feature is None:
+            feature = xml.SubElement(raw_observation, "Feature")
+        # feature_property
+        for i in range(len(kwargs["attrib"])):
+            xml.SubElement(feature, "Property",
+                           label="attrib%s" % (i + 1),
+                           value=str(kwargs["attrib"][i]))
+    return raw_observation
+
+
 class Survey:
     """
     Populate the survey tag of LandXML.
@@ -83,16 +269,34 @@ class Survey:
         - ObservationGroup0
         - ObservationGroupX
 
+    The sections, the current ObservationGroup and the number of elements
+    are tracked as they are added, so that adding an element does not
+    search the tree. The Features of the CgPoints are kept apart and
+    appended after the CgPoints when :attr:`survey` is read.
     """
 
     def __init__(self):
         """
         Initialize the Survey header tag
         """
-        self.survey = xml.Element("Survey")
-        xml.SubElement(self.survey, "SurveyHeader",
+        self._survey = xml.Element("Survey")
+        xml.SubElement(self._survey, "SurveyHeader",
                        name="from TOPS")
         self.id = 0
+        self._equipment = False
+        self._cgpoints = None
+        self._cgpoint_count = 0
+        self._cgfeatures = []
+        self._group = None
+
+    @property
+    def survey(self):
+        """The Survey element."""
+
+        if self._cgfeatures:
+            self._cgpoints.extend(self._cgfeatures)
+            self._cgfeatures = []
+        return self._survey
 
     def _tag_position(self, tag):
         """
@@ -100,22 +304,21 @@ class Survey:
         """
         mainTags = ("SurveyHeader", "Equipment", "CgPoints", "InstrumentSetup")
         if tag in mainTags:
+            present = (True, self._equipment, self._cgpoints is not None)
             pos = 0
     
             for index in range(mainTags.index(tag)):
-                if self.survey.find("./%s" % mainTags[index]) is not None:
+                if present[index]:
                     pos += 1
                 else:
                     pos = 1
     
             if tag == "InstrumentSetup":
-                pos += len(self.survey.findall("./InstrumentSetup"))
+                pos += self.id
     
             return pos
         if tag == "CgPoint":
-            cgpoints = self.survey.find("CgPoints")
-            pos = len(cgpoints.findall("./CgPoint"))
-            return pos
+            return self._cgpoint_count
 
     def equipment(self, **kwargs):
         """
@@ -132,7 +335,8 @@ class Survey:
 
         # Creation of Equipment tag, subelement of Survey
         equipment = xml.Element("Equipment")
-        self.survey.insert(pos, equipment)
+        self._survey.insert(pos, equipment)
+        self._equipment = True
 
     def cg_point(self, **kwargs):
         """
@@ -156,35 +360,17 @@ class Survey:
         pos = self._tag_position('CgPoints')
 
         # Creation of CgPoints tag, subelement of Survey if it does not exist
-        cgpoints = self.survey.find("./CgPoints")
+        cgpoints = self._cgpoints
         if cgpoints is None:
-            cgpoints = xml.Element("CgPoints")
-            self.survey.insert(pos, cgpoints)
+            cgpoints = self._cgpoints = xml.Element("CgPoints")
+            self._survey.insert(pos, cgpoints)
 
         # Creation of CgPoint tag, subelement of CgPoints
-        cgpoint = xml.Element("CgPoint")
+        cgpoint, feature = _cg_point(kwargs)
         cgpoints.insert(self._tag_position('CgPoint'), cgpoint)
-        # Fill of CgPoint attributes
-        if "point_name" in kwargs:
-            cgpoint.set("name", str(kwargs["point_name"]))
-        if "pid" in kwargs:
-            cgpoint.set("pntRef", str(kwargs["pid"]))
-        if "x" in kwargs:
-            cgpoint.text = "%s %s" % (str(kwargs["x"]),
-                                         str(kwargs["y"]))
-            if "z" in kwargs:
-                cgpoint.text += " %s" % (str(kwargs["z"]))
-        # attrib is not mandatory in CgPoints so this is a feature
-        if "attrib" in kwargs:
-            cgpoint.set("featureRef", "feature%s" % (str(kwargs["point_name"])))
-            feature = xml.Element("Feature")
-            feature.set("name", "feature%s" % (str(kwargs["point_name"])))
-            # feature_property
-            for i in range(len(kwargs["attrib"])):
-                xml.SubElement(feature, "Property",
-                              label="attrib%s" % (i + 1),
-                              value=str(kwargs["attrib"][i]))
-            cgpoints.append(feature)
+        self._cgpoint_count += 1
+        if feature is not None:
+            self._cgfeatures.append(feature)
 
     def setup(self, **kwargs):
         """
@@ -216,61 +402,12 @@ class Survey:
         pos = self._tag_position('InstrumentSetup')
 
         # Creation of InstrumentSetup tag, subelement of Survey
-        instrument_setup = xml.Element("InstrumentSetup",
-                                       id="setup" + str(self.id),
-                                       stationName="",
-                                       instrumentHeight="")
-        # Fill of InstrumentSetup attributes
-        if "point_name" in kwargs:
-            instrument_setup.set("stationName", str(kwargs["point_name"]))
-        if "ih" in kwargs:
-            instrument_setup.set("instrumentHeight", str(kwargs["ih"]))
-        if "hz0" in kwargs:
-            instrument_setup.set("orientationAzimuth", str(kwargs["hz0"]))
-        # attrib is not mandatory in InstrumentSetup so this is a feature
-        if "attrib" in kwargs and kwargs["attrib"]:
-            if instrument_setup.find("./Feature") is None:
-                feature = xml.SubElement(instrument_setup, "Feature")
-            # feature_property
-            for i in range(len(kwargs["attrib"])):
-                xml.SubElement(feature, "Property",
-                               label="attrib%s" % (i + 1),
-                               value=str(kwargs["attrib"][i]))
-
-        # Creation of InstrumentPoint tag, subelement of InstrumentSetup
-        instrument_point = xml.SubElement(instrument_setup, "InstrumentPoint")
-        # Fill of InstrumentPoint attributes
-        if "pid" in kwargs:
-            instrument_point.set("pntRef", str(kwargs["pid"]))
-        if "instru_x" in kwargs:
-            instrument_point.text = "%s %s %s" % (str(kwargs["instru_x"]),
-                                                  str(kwargs["instru_y"]),
-                                                  str(kwargs["instru_z"]))
-        # instrument_setup.append(instrument_point)
-        self.survey.insert(pos, instrument_setup)
+        instrument_setup, observation_group = _instrument_setup(self.id, kwargs)
+        self._survey.insert(pos, instrument_setup)
 
         # Creation of ObservationGroup tag, subelement of Survey
-        observation_group = xml.Element("ObservationGroup",
-                                        id="o" + str(self.id),
-                                        setupID="setup" + str(self.id))
-        # Creation of Backsight tag, subelement of ObservationGroup
-        if "circle" in kwargs or "back_x" in kwargs:
-            backsight = xml.SubElement(observation_group, "Backsight",
-                                       circle="0.")
-            # Fill of Backsight attributes
-            if "circle" in kwargs:
-                backsight.set("circle", str(kwargs["circle"]))
-            if "back_x" in kwargs:
-                # Creation of BacksightPoint tag, subelement of Backsight
-                backsight_point = xml.SubElement(backsight, "BacksightPoint")
-                # Fill of BacksightPoint attributes
-                if "back_name" in kwargs:
-                    backsight_point.set("name", str(kwargs["back_name"]))
-                if "back_x" in kwargs:
-                    backsight_point.text = "%s %s %s" % (str(kwargs["back_x"]),
-                                                         str(kwargs["back_y"]),
-                                                         str(kwargs["back_z"]))
-        self.survey.insert(pos * 2, observation_group)
+        self._survey.insert(pos * 2, observation_group)
+        self._group = observation_group
 
         # ID can be raise
         self.id += 1
@@ -300,70 +437,11 @@ class Survey:
 
         # kwargs = {key: str(value) if value is not None else value for key,value in kwargs.items()}
         # When creating a RawObservation tag, it should verified that an ObservationGroup tag exists
-        if self.survey.find("./ObservationGroup[@id='o0']") is None:
+        if self._group is None:
             self.setup()
-        observation_group = self.survey.find("./ObservationGroup[@id='o%s']" % str(self.id - 1))
+        observation_group = self._group
         # Creation of RawObservation tag, subelement of ObservationGroup
-        raw_observation = xml.SubElement(observation_group, "RawObservation")
-        # Fill of RawObservation attributes
-        if "th" in kwargs:
-            raw_observation.set("targetHeight", str(kwargs["th"]))
-        if "angle" in kwargs and kwargs["angle"] is not None:
-            raw_observation.set("horizAngle", str(kwargs["angle"]))
-        if "azimuth" in kwargs and kwargs["azimuth"] is not None:
-            raw_observation.set("azimuth", str(kwargs["azimuth"]))
-        if "z_angle" in kwargs and kwargs["z_angle"] is not None:
-            if kwargs["z_angle_type"] == "dh":
-                raw_observation.set("vertDistance", str(kwargs["z_angle"]))
-            if kwargs["z_angle_type"] == "z":
-                raw_observation.set("zenithAngle", str(kwargs["z_angle"]))
-            if kwargs["z_angle_type"] == "v":
-                raw_observation.set("zenithAngle", str(vertical_to_zenithal(kwargs["z_angle"],kwargs["angle_unit"])))
-        if "dist" in kwargs and kwargs["dist"] is not None:
-            if kwargs["dist_type"] == 's':
-                raw_observation.set("slopeDistance", str(kwargs["dist"]))
-            if kwargs["dist_type"] == 'h':
-                raw_observation.set("horizDistance", str(kwargs["dist"]))
-        # Creation of TargetPoint tag, subelement of RawObservation
-        target_point = xml.SubElement(raw_observation, "TargetPoint")
-        # Fill of TargetPoint attributes
-        if "point_name" in kwargs:
-            target_point.set("desc", str(kwargs["point_name"]))
-        if "pid" in kwargs:
-            target_point.set("pntRef", str(kwargs["pid"]))
-        if "x" in kwargs:
-            target_point.text = "%s %s" % (str(kwargs["x"]),
-                                           str(kwargs["y"]))
-            if "z" in kwargs:
-                target_point.text += " %s" % (str(kwargs["z"]))
-        # targetHeight is not mandatory in RawObservation so this is a feature
-        if "ih" in kwargs and kwargs["ih"] is not None:
-            if raw_observation.find("./Feature") is None:
-                feature = xml.SubElement(raw_observation, "Feature")
-            # feature_property
-            xml.SubElement(feature, "Property",
-                           label="instrumentHeight",
-                           value=str(kwargs["ih"]))
-        # ppm or prism_constant are not mandatory in RawObservation so this is a feature
-        if "ppm" in kwargs and kwargs["ppm"] is not None:
-            if raw_observation.find("./Feature") is None:
-                feature = xml.SubElement(raw_observation, "Feature")
-            # feature_property
-            xml.SubElement(feature, "Property",
-                           label="edmAccuracyppm",
-                           value=str(kwargs["ppm"]))
-            xml.SubElement(feature, "Property",
-                           label="edmAccuracyConstant",
-                           value=str(kwargs["prism_constant"]))
-        # attrib is not mandatory in RawObservation so this is a feature
-        if "attrib" in kwargs:
-            if raw_observation.find("./Feature") is None:
-                feature = xml.SubElement(raw_observation, "Feature")
-            # feature_property
-            for i in range(len(kwargs["attrib"])):
-                xml.SubElement(feature, "Property",
-                               label="attrib%s" % (i + 1),
-                               value=str(kwargs["attrib"][i]))
+        observation_group.append(_raw_observation(kwargs))
 
     def to_string(self):
         """
@@ -396,49 +474,253 @@ class LandXML:
         return xml.tostring(pretty_xml).decode()
 
 
+class SurveyWriter:
+    """
+    Write a LandXML document with a survey to a file object, as the
+    elements of the survey are added.
+
+    The methods are those of :class:`Survey` and the document is the same
+    as :meth:`LandXML.to_string` of a :class:`Survey`, but no more than one
+    element is kept in memory. CgPoints are written as they are added; the
+    Features of the CgPoints, the InstrumentSetups and the
+    ObservationGroups follow them in the document, so they are spooled to
+    temporary files until :meth:`close`.
+
+    Args:
+        f: A text file object.
+        spool_size (int): Bytes of each spooled section kept in memory
+            before it is moved to a temporary file.
+    """
+
+    def __init__(self, f, spool_size=SPOOL_SIZE):
+        self.f = f
+        self.id = 0
+        self._cgpoints = False
+        self._cgfeatures = self._spool(spool_size)
+        self._setups = self._spool(spool_size)
+        self._groups = self._spool(spool_size)
+        self._group = None
+        self._observations = 0
+        document = LandXML()
+        document.append(Survey().survey)
+        head = document.to_string()
+        f.write(head[:-len(SURVEY_END)])
+
+    @staticmethod
+    def _spool(size):
+        return tempfile.SpooledTemporaryFile(size, mode='w+', encoding='utf-8', newline='')
+
+    @staticmethod
+    def _write(f, element, level):
+        """Write an element pretty printed at level, on a line of its own."""
+
+        _indent(element, level)
+        f.write("\n" + "\t" * level + xml.tostring(element).decode())
+
+    def _end_group(self):
+        group = self._group
+        if group is None:
+            return
+        if self._observations:
+            self._groups.write("\n\t\t</ObservationGroup>")
+        else:
+            self._write(self._groups, group, 2)
+        self._group = None
+        self._observations = 0
+
+    def cg_point(self, **kwargs):
+        """Write a CgPoint, see :meth:`Survey.cg_point`."""
+
+        cgpoint, feature = _cg_point(kwargs)
+        if not self._cgpoints:
+            self.f.write("\n\t\t<CgPoints>")
+            self._cgpoints = True
+        self._write(self.f, cgpoint, 3)
+        if feature is not None:
+            self._write(self._cgfeatures, feature, 3)
+
+    def setup(self, **kwargs):
+        """Write an InstrumentSetup and start its ObservationGroup, see
+        :meth:`Survey.setup`."""
+
+        instrument_setup, observation_group = _instrument_setup(self.id, kwargs)
+        self._write(self._setups, instrument_setup, 2)
+        self._end_group()
+        self._group = observation_group
+        self.id += 1
+
+    def raw_observation(self, **kwargs):
+        """Write a RawObservation in the current ObservationGroup, see
+        :meth:`Survey.raw_observation`."""
+
+        if self._group is None:
+            self.setup()
+        group = self._group
+        if not self._observations:
+            # the start tag of the group, then its Backsight
+            start = xml.Element(group.tag, group.attrib)
+            start = xml.tostring(start, short_empty_elements=False).decode()
+            self._groups.write("\n\t\t" + start[:-len("</%s>" % group.tag)])
+            for child in group:
+                self._write(self._groups, child, 3)
+        self._write(self._groups, _raw_observation(kwargs), 3)
+        self._observations += 1
+
+    def close(self):
+        """Write the spooled sections and the end of the document."""
+
+        self._end_group()
+        f = self.f
+        if self._cgpoints:
+            self._cgfeatures.seek(0)
+            shutil.copyfileobj(self._cgfeatures, f)
+            f.write("\n\t\t</CgPoints>")
+        for spool in (self._setups, self._groups):
+            spool.seek(0)
+            shutil.copyfileobj(spool, f)
+        f.write(SURVEY_END)
+        for spool in (self._cgfeatures, self._setups, self._groups):
+            spool.close()
+
+
+class _SurveyTarget:
+    """
+    An XML parser target building only the elements used by the parser.
+
+    Each parsed element is built as a tree of its own and added to
+    :attr:`elements` as a (kind, element) tuple when it ends. Other
+    elements, like Surfaces, Alignments or Parcels, are skipped without
+    being built.
+
+    Args:
+        parsed (dict): The kinds of the parsed elements, by their path
+            from the root element, see ``PARSED``.
+    """
+
+    def __init__(self, parsed=PARSED):
+        self.parsed = parsed
+        self.parsed_depth = 1 + max(len(path) for path in parsed)
+        self.path = []
+        self.builder = None
+        self.kind = None
+        self.depth = 0
+        self.elements = []
+
+    def start(self, tag, attrib):
+        path = self.path
+        path.append(tag.rpartition('}')[2])
+        if self.builder is None:
+            if len(path) > self.parsed_depth:
+                return
+            self.kind = self.parsed.get(tuple(path[1:]))
+            if self.kind is None:
+                return
+            self.builder = xml.TreeBuilder()
+            self.depth = len(path)
+        self.builder.start(tag, attrib)
+
+    def end(self, tag):
+        if self.builder is not None:
+            self.builder.end(tag)
+            if len(self.path) == self.depth:
+                self.elements.append((self.kind, self.builder.close()))
+                self.builder = None
+        self.path.pop()
+
+    def data(self, data):
+        if self.builder is not None:
+            self.builder.data(data)
+
+    def close(self):
+        pass
+
+
+def _properties(feature):
+    """Return the values of the properties of a Feature element."""
+
+    return [prop.attrib["value"] for prop in feature.findall("{*}Property")]
+
+
+def _location(element, points):
+    """
+    Return the Point of an InstrumentPoint or a TargetPoint element.
+
+    The point is given by its coordinates, else by the name of a CgPoint in
+    its pntRef attribute, looked up in points. None if it has neither.
+    """
+
+    if element.text and not element.text.isspace():
+        return Point(element.text.split())
+    ref = element.get("pntRef")
+    if ref is not None:
+        return points[ref]
+    return None
+
+
 class FormatParser(Parser):
     """
     A FormatParser for LandXML data format.
 
     As the model data is in LandXML format, only Survey tags is kept.
 
-    It doesn't inherit from the base Parser class because the internal
-    procedure is quite different, but it implements the same API so it
-    can work nicely with other parts of the library.
+    The document is read as a stream: only the units, the CgPoints, the
+    InstrumentSetup and the ObservationGroup elements of the survey are
+    built, one at a time, and features are given in the order of the
+    document.
     """
 
-    def __init__(self, data):
-        data = re.sub('(\\n|\\t)', '', data)
-        self.line = xml.fromstring(data) 
-
-    @property
-    def points(self):
+    def _elements(self, parsed=PARSED):
+        """Yield the parsed elements of the document as (kind, element)
+        tuples, see :class:`_SurveyTarget`."""
+
+        target = _SurveyTarget(parsed)
+        parser = xml.XMLParser(target=target)
+        feed = profiling.wrap('tokenize', parser.feed)
+        elements = target.elements
+        for chunk in self.rows.chunks():
+            feed(chunk)
+            if elements:
+                yield from elements
+                elements.clear()
+        parser.close()
+        yield from elements
+
+    def iter_points(self):
         '''Compute raw data to get points coordinates.
 
         This parser is based on the information in :ref:`if_landxml`
         
-        Returns:
-            A list of GeoJSON-like Feature object representing points coordinates.
+        Yields:
+            GeoJSON-like Feature objects representing points coordinates.
     
         Raises:
             KeyError: An error occured during computation, the data does not exist.
         
         Notes:
         '''
-        points = []
         stations = {}
-        pointsFeature = self.raw_line
+        # Use raw data if already computed
+        if self._raw is not None:
+            pointsFeature = self._raw
+        else:
+            pointsFeature = self.iter_raw()
 
+        batch = BatchReducer()
         for point in pointsFeature:
             if point.desc == 'PT':
-                points.append(point)
+                batch.append(point)
             if point.desc == 'ST':
                 stations[point.point_name] = point
             if point.desc == 'PO':
                 pp = point.properties
                 coords = stations[pp['station_name']].geometry
                 bp = BasePoint(x=coords.x, y=coords.y, z=coords.z, ih=pp['ih'], b_zero_st=0.0)
-                p = PolarPoint(angle_unit=pp['angle_unit'],
+                f = Feature(None,
+                            desc='PT',
+                            id=point.id,
+                            point_name=point.point_name)
+                batch.add_polar(f,
+                                angle_unit=pp['angle_unit'],
                                 z_angle_type=pp['z_angle_type'],
                                 dist_type=pp['dist_type'],
                                 dist=pp['dist'],
@@ -446,169 +728,177 @@ class FormatParser(Parser):
                                 z_angle=pp['z_angle'],
                                 th=pp['th'],
                                 base_point=bp,
-                                pid=point.id,
-                                text='',
                                 coordorder='ENZ')
-                f = Feature(p.to_point(),
-                            desc='PT',
-                            id=point.id,
-                            point_name=point.point_name)
-                points.append(f)
+            if batch.full:
+                yield from batch.flush()
+        yield from batch.flush()
 
-        return points
-
-    @property
-    def raw_line(self):
+    def iter_raw(self):
         '''Extract all LandXML data.
 
         This parser is based on the information in :ref:`if_landxml`
 
-        Returns:
-            A list of GeoJSON-like Feature object representing raw data
+        Yields:
+            GeoJSON-like Feature objects representing raw data
             i.e. polar coordinates and other informations.
 
         Raises:
 
         Notes:
+            CgPoint features are given as each CgPoint ends. The Feature
+            of a CgPoint can follow it: the Features of the CgPoints are
+            then read ahead, in a pass of their own over the document. Data
+            which can be read only once, like a pipe or an open file, is
+            not read twice: the attrib list is empty when the CgPoint is
+            given, and filled in when its Feature is read.
+
+            CgPoints are indexed by name and Features by name, so that
+            featureRef and pntRef references are resolved in constant time.
         '''
 
-        ns = {"default": DEFAULT_NS}
         stations = {}
-        points = []
-        points_coord = {}
+        # CgPoint name -> Point, for pntRef references
+        points = {}
+        # Feature name -> property values, for featureRef references
+        features = {}
+        # Feature name -> attrib lists of the CgPoints read before it
+        pending = {}
+        # a string, a path or a memory map can be read again at once
+        read_ahead = self.rows.start is None and not self.rows.once
         pid = 0
-        station_id = 1
-
-        # These values are mandatory by the LandXML schema
-        units = self.line.find("default:Units", ns)
-        dist_unit = units.find("default:Metric", ns).attrib["linearUnit"]
-        angle_unit = units.find("default:Metric", ns).attrib["angularUnit"]
-
-        survey = self.line.find("default:Survey", ns)
-        cgpoints = survey.find("default:CgPoints", ns)
-        point_id = 100
-        for cgpoint in cgpoints.findall("default:CgPoint", ns):
-            p = Point(cgpoint.text.split(" "))
-            try:
-                point_name = cgpoint.attrib["name"]
-            except KeyError:
-                point_name = "point_" + str(point_id)
-                point_id += 1
-            points_coord[point_name] = p
-            feature = cgpoints.find(f"""default:Feature[@name='{cgpoint.attrib["featureRef"]}']""", ns)
-            if feature is not None:
-               attrib = [prop.attrib["value"] for prop in feature.findall("default:Property", ns)]
-            f = Feature(p,
-                        desc='PT',
-                        id=pid,
-                        point_name=point_name,
-                        dist_unit=dist_unit,
-                        attrib=attrib)
-            points.append(f)
-            pid += 1
-        for station in survey.findall("default:InstrumentSetup", ns):
-            station_id = station.attrib["id"]
-            point_name = station.attrib["stationName"]
-            p = points_coord[point_name] 
-            ih = station.attrib["instrumentHeight"]
-            stations[station_id] = [point_name, ih]
-            try :
-                hz0 = station.attrib["orientationAzimuth"]
-            except KeyError:
-                try :
-                    hz0 = station.attrib["circleAzimuth"]
-                except KeyError:
-                    hz0 = None
-            feature = station.find("default:Feature", ns)
-            if feature is not None:
-                attrib = [prop.attrib["value"] for prop in feature.findall("default:Property", ns)]
-            f = Feature(p,
-                        desc='ST',
-                        id=pid,
-                        point_name=point_name,
-                        angle_unit=angle_unit,
-                        dist_unit=dist_unit,
-                        ih=ih,
-                        hz0=hz0,
-                        attrib=attrib)
-            points.append(f)
-            pid += 1
         point_id = 100
-        for observation in survey.findall("default:ObservationGroup", ns):
-            try:
-                station_id = observation.attrib["setupID"]
-            except:
-                station_id = ''
-            for rawobservation in observation.findall("default:RawObservation", ns):
-                if not station_id:
-                    try:
-                        station_id = rawobservation.attrib["setupID"]
-                    except:
-                        pass
-                target_point = rawobservation.find("default:TargetPoint", ns)
-                if target_point is not None:
-                    try:
-                        point_name = target_point.attrib["desc"]
-                    except KeyError:
-                        try:
-                            point_name = target_point.attrib["name"]
-                        except KeyError:
-                            point_name = "point_" + point_id
-                            point_id += 1
-                    p = Point(target_point.text.split(" "))
-                try:
-                    azimuth = rawobservation.attrib["azimuth"]
-                except KeyError:
-                    azimuth = None
-                try:
-                    angle = rawobservation.attrib["horizAngle"]
-                except KeyError:
-                    angle = None
+        target_id = 100
+
+        for kind, element in self._elements():
+            if kind == 'units':
+                # These values are mandatory by the LandXML schema
+                metric = element.find("{*}Metric")
+                dist_unit = metric.attrib["linearUnit"]
+                angle_unit = metric.attrib["angularUnit"]
+            elif kind == 'cgpoint':
+                p = Point(element.text.split())
                 try:
-                    z_angle = rawobservation.attrib["zenithAngle"]
-                    z_angle_type = 'z'
+                    point_name = element.attrib["name"]
                 except KeyError:
-                    z_angle = None
-                # dZ
-                #     z_angle = rawobservation.attrib["vertDistance"]
-                #     z_angle_type = 'dh'
+                    point_name = "point_" + str(point_id)
+                    point_id += 1
+                points[point_name] = p
+                feature_ref = element.get("featureRef")
+                attrib = features.get(feature_ref)
+                if attrib is None and feature_ref is not None and read_ahead:
+                    read_ahead = False
+                    for kind, feature in self._elements(CGFEATURES):
+                        features.setdefault(feature.get("name"), _properties(feature))
+                    attrib = features.get(feature_ref)
+                if attrib is None:
+                    attrib = []
+                    if feature_ref is not None:
+                        pending.setdefault(feature_ref, []).append(attrib)
+                f = Feature(p,
+                            desc='PT',
+                            id=pid,
+                            point_name=point_name,
+                            dist_unit=dist_unit,
+                            attrib=attrib)
+                yield f
+                pid += 1
+            elif kind == 'feature':
+                name = element.get("name")
+                if name not in features:
+                    features[name] = _properties(element)
+                    for attrib in pending.pop(name, ()):
+                        attrib.extend(features[name])
+            elif kind == 'setup':
+                station_id = element.attrib["id"]
+                point_name = element.attrib["stationName"]
+                instrument_point = element.find("{*}InstrumentPoint")
+                p = None
+                if instrument_point is not None:
+                    p = _location(instrument_point, points)
+                if p is None:
+                    p = points[point_name]
+                ih = element.attrib["instrumentHeight"]
+                stations[station_id] = [point_name, ih]
                 try:
-                    dist = rawobservation.attrib["slopeDistance"]
-                    dist_type = 's'
+                    hz0 = element.attrib["orientationAzimuth"]
                 except KeyError:
                     try:
-                        dist =  rawobservation.attrib["horizDistance"]
-                        dist_type = 'h'
+                        hz0 = element.attrib["circleAzimuth"]
                     except KeyError:
-                        dist = None
-                try:
-                    th = rawobservation.attrib["targetHeight"]
-                except KeyError:
-                    th = None
-                # ih is integrated in point values to simplify possible computation
-                ih = stations[station_id][1]
-                station_name = stations[station_id][0]
-                
-                feature = rawobservation.find("default:Feature", ns)
-                if feature is not None:
-                    attrib = [prop.attrib["value"] for prop in feature.findall("default:Property", ns)]
+                        hz0 = None
+                feature = element.find("{*}Feature")
+                attrib = _properties(feature) if feature is not None else []
                 f = Feature(p,
-                            desc='PO',
+                            desc='ST',
                             id=pid,
                             point_name=point_name,
                             angle_unit=angle_unit,
-                            z_angle_type=z_angle_type,
                             dist_unit=dist_unit,
-                            dist_type=dist_type,
-                            azimuth=azimuth,
-                            angle=angle,
-                            z_angle=z_angle,
-                            dist=dist,
                             ih=ih,
-                            th=th,
-                            station_name=station_name,
+                            hz0=hz0,
                             attrib=attrib)
-                points.append(f)
+                yield f
                 pid += 1
-
-        return points
\ No newline at end of file
+            elif kind == 'group':
+                station_id = element.get("setupID", '')
+                for rawobservation in element.findall("{*}RawObservation"):
+                    if not station_id:
+                        station_id = rawobservation.get("setupID", station_id)
+                    target_point = rawobservation.find("{*}TargetPoint")
+                    if target_point is not None:
+                        try:
+                            point_name = target_point.attrib["desc"]
+                        except KeyError:
+                            try:
+                                point_name = target_point.attrib["name"]
+                            except KeyError:
+                                try:
+                                    point_name = target_point.attrib["pntRef"]
+                                except KeyError:
+                                    point_name = "point_" + str(target_id)
+                                    target_id += 1
+                        p = _location(target_point, points)
+                    azimuth = rawobservation.get("azimuth")
+                    angle = rawobservation.get("horizAngle")
+                    try:
+                        z_angle = rawobservation.attrib["zenithAngle"]
+                        z_angle_type = 'z'
+                    except KeyError:
+                        z_angle = None
+                    # dZ
+                    #     z_angle = rawobservation.attrib["vertDistance"]
+                    #     z_angle_type = 'dh'
+                    try:
+                        dist = rawobservation.attrib["slopeDistance"]
+                        dist_type = 's'
+                    except KeyError:
+                        try:
+                            dist = rawobservation.attrib["horizDistance"]
+                            dist_type = 'h'
+                        except KeyError:
+                            dist = None
+                    th = rawobservation.get("targetHeight")
+                    # ih is integrated in point values to simplify possible computation
+                    ih = stations[station_id][1]
+                    station_name = stations[station_id][0]
+
+                    feature = rawobservation.find("{*}Feature")
+                    attrib = _properties(feature) if feature is not None else []
+                    f = Feature(p,
+                                desc='PO',
+                                id=pid,
+                                point_name=point_name,
+                                angle_unit=angle_unit,
+                                z_angle_type=z_angle_type,
+                                dist_unit=dist_unit,
+                                dist_type=dist_type,
+                                azimuth=azimuth,
+                                angle=angle,
+                                z_angle=z_angle,
+                                dist=dist,
+                                ih=ih,
+                                th=th,
+                                station_name=station_name,
+                                attrib=attrib)
+                    yield f
+                    pid += 1
@@ -20,22 +20,130 @@
 # <http://www.gnu.org/licenses/>.
 
 import logging
- 
+import re
+
 from . import Feature, Parser, Point, UNKNOWN_STATION, UNKNOWN_POINT
-from .polar import BasePoint, PolarPoint
+from .polar import BasePoint, BatchReducer
 
 # Distance units depend of the last digit
 # 0, 6 and 8 are in mm, 1/10mm and 1/100mm
 # 1 and 7 are in ft and 1/10000ft converted in m
-UNITS = {"angle": {'21', '22', '25'},
-         "distance": {'31', '32', '33', '81', '84', '87', '88'},
-         "2": "gon", "3": "deg", "4": "dms", "5": "mil",
+UNITS = {"2": "gon", "3": "deg", "4": "dms", "5": "mil",
          "0": "meter", "1": "feet", "6": "dmeter", "7": "dfeet", "8": "mmeter",
          "gon": 100000, "deg": 100000, "dms": 100000, "mil": 10000,
          "meter": 1000, "feet": 1000, "dmeter": 10000, "dfeet": 10000, "mmeter": 100000}
 
+# Words holding an angle or a distance, in the order they are looked up to
+# find the units of a line
+ANGLE_WORDS = ('21', '22', '25')
+DISTANCE_WORDS = ('31', '32', '33', '81', '84', '87', '88', '82', '83', '85', '86')
+
+# Divider of numeric words, by Word Index and unit digit
+DIVIDERS = dict([(wi, {digit: UNITS[UNITS[digit]] for digit in '2345'}) for wi in ANGLE_WORDS] +
+                [(wi, {digit: UNITS[UNITS[digit]] for digit in '01678'}) for wi in DISTANCE_WORDS])
+
+# Words holding the three coordinates, by Word Index of the first one
+COORDINATE_WORDS = {'81': ('81', '82', '83'), '84': ('84', '85', '86')}
+
+# Words 1 to 9 holding texts, by their first digit
+TEXT_WORDS = {first: tuple('%d%d' % (first, i) for i in range(1, 10)) for first in (4, 7)}
+
+# Width of a word: Word Index, info, unit digit, sign and data. Words are
+# separated by a space
+GSI8_WIDTH = 15
+GSI16_WIDTH = 23
+
+# Most layouts of lines kept, see layout()
+MAX_LAYOUTS = 1024
+
+WORD = re.compile(r'\S+')
+
 logger = logging.getLogger(__name__)
 
+# Shared layouts, by width of words
+_layouts = {GSI8_WIDTH: {}, GSI16_WIDTH: {}}
+
+
+def layout(line, start, width):
+    '''Return the slice of each word of a line, by Word Index.
+
+    Words of GSI8 and GSI16 lines have a fixed width and are separated by
+    a space, so the Word Indexes are found at fixed offsets. Lines of a
+    file mostly have the same words, in the same order: their slices are
+    computed once and shared.
+
+    Args:
+        line (str): The line.
+        start (int): The offset of the first word, after the ``*`` of GSI16.
+        width (int): The width of a word.
+
+    Returns:
+        A dictionary of slices. Words of a line which does not have the
+        fixed layout are found between spaces, and their slices are not
+        shared.
+    '''
+
+    step = width + 1
+    words = (len(line) - start + 1) // step
+    if (len(line) - start + 1) % step < 2 and not line[start + width::step].strip():
+        layouts = _layouts[width]
+        key = line[start::step] + line[start + 1::step]
+        try:
+            return layouts[key]
+        except KeyError:
+            pass
+        slices = {}
+        for i in range(words):
+            offset = start + i * step
+            slices[key[i] + key[words + i]] = slice(offset, offset + width)
+        if len(layouts) >= MAX_LAYOUTS:
+            layouts.clear()
+        layouts[key] = slices
+        return slices
+    return {m.group()[:2]: slice(m.start(), m.end()) for m in WORD.finditer(line, start)}
+
+
+class Record:
+    '''The words of a GSI8 or GSI16 line.
+
+    The line is kept as it is: a word is sliced from the line at its fixed
+    offset only when it is used, so that no list of words is built for each
+    line, see :func:`layout`.
+
+    Args:
+        line (str): The line.
+        slices (dict): The slice of each word, by Word Index.
+    '''
+
+    __slots__ = ('line', 'slices')
+
+    def __init__(self, line, slices):
+        self.line = line
+        self.slices = slices
+
+    def get(self, wi, default=None):
+        '''Return the word of Word Index wi, default if there is none.'''
+
+        s = self.slices.get(wi)
+        if s is None:
+            return default
+        return self.line[s]
+
+    def __contains__(self, wi):
+        return wi in self.slices
+
+    def __getitem__(self, wi):
+        return self.line[self.slices[wi]]
+
+    def __iter__(self):
+        '''Iterate over the Word Indexes, in order.'''
+
+        return iter(self.slices)
+
+    def __repr__(self):
+        return '<Record %s>' % self.line.strip()
+
+
 class FormatParser(Parser):
     '''The FormatParser for Leica GSI data format.
 
@@ -43,93 +151,192 @@ class FormatParser(Parser):
         data (str): A string representing the file to be parsed.
             
     Attributes:
-        line (list): A list of each lines of the file being parsed.
+        rows (:class:`formats.RawData`): The lines of the file being parsed.
     '''
 
-    def __init__(self, data):
-        self.rows = data.splitlines()
+    tokenizes = True
+    resumes = True
 
-    def _get_comments(self):
+    def tokenize(self, line):
         """
-        Get all comments of the parsed line
+        Give access to the words of a line by their Word Index
+
+        GSI8 and GSI16 words have a fixed width: Word Index, info, unit
+        digit, sign and 8 or 16 characters of data. Words are sliced from
+        the line when they are used and decoded by offset, see
+        :meth:`_get_value`.
+
+        Returns:
+            A :class:`Record`, None for an empty line
+        """
+        if line[:1] == '*':
+            # GSI16, some files also start each word with *
+            if ' *' in line:
+                line = line.replace(' *', ' ')
+            start, width = 1, GSI16_WIDTH
+        else:
+            start, width = 0, GSI8_WIDTH
+        if len(line) <= start or line.isspace():
+            return None
+        return Record(line, layout(line, start, width))
+
+    def is_station(self, record):
+        """
+        Tell if a record is a station setup for :meth:`iter_points`
+
+        Stations have their own coordinates and units, so points can be
+        computed again from any station.
+        """
+        return ('11' in record
+                and '84' in record and '85' in record and '86' in record and '88' in record
+                and not ('81' in record and '82' in record and '83' in record)
+                and not ('21' in record and '22' in record and '87' in record))
+
+    def _get_units(self, record):
+        """
+        Get the angle and distance units of the parsed line
+
+        Returns:
+            The units of the first angle and distance words, or None
+        """
+        get = record.get
+        angle_unit = dist_unit = None
+        for wi in ANGLE_WORDS:
+            word = get(wi)
+            if word is not None:
+                angle_unit = UNITS[word[5]]
+                break
+        for wi in DISTANCE_WORDS:
+            word = get(wi)
+            if word is not None:
+                dist_unit = UNITS[word[5]]
+                break
+
+        return angle_unit, dist_unit
+
+    def _get_texts(self, record, first):
+        """
+        Get the data of consecutive words 1 to 9, e.g. comments or attributes
         
         Returns:
-            A list of comments or an empty list
+            A list of texts or an empty list
         """
-        comments = []
-        for i in range(1, 10):
-            try:
-                comments.append(self.tdict['4%s' % i]['data'].lstrip('0'))
-            except KeyError:
+        texts = []
+        for wi in TEXT_WORDS[first]:
+            word = record.get(wi)
+            if word is None:
                 break
+            texts.append(word[7:].lstrip('0'))
 
-        return comments
+        return texts
 
-    def _get_attrib(self):
+    def _get_comments(self, record):
+        """
+        Get all comments of the parsed line
+        
+        Returns:
+            A list of comments or an empty list
+        """
+        return self._get_texts(record, 4)
+
+    def _get_attrib(self, record):
         """
         Get all attributes or remarks of the parsed line
         
         Returns:
             A list of attributes and remarks or an empty list
         """
-        attrib = []
-        for i in range(1, 10):
-            try:
-                attrib.append(self.tdict['7%s' % i]['data'].lstrip('0'))
-            except KeyError:
-                break
+        return self._get_texts(record, 7)
+
+    def _get_value(self, record, wi):
+        """
+        Get an angle or a distance of the parsed line
 
-        return attrib
+        The value is scaled with the unit digit of its word, angles are
+        given in the unit of the word and distances in meters.
 
-    def _get_coordinates(self, first_coor, unit):
+        Returns:
+            A floating number, None if the word does not exist
+        """
+        word = record.get(wi)
+        if word is None:
+            return None
+        return float(word[6:]) / DIVIDERS[wi][word[5]]
+
+    def _get_coordinates(self, record, first_coor):
         """
         Get all coordinates of the parsed line
         
         Args:
             first_coor (str): The Word Index of the first coordinate.
                 Could be 81 or 84
-            unit (int): The divider corresponding to the coordinate unit.
 
         Returns:
             All three coordinates in the forme of X, Y, Z
             If these coordinates do not exist, return None
         """
-        second_coor = str(int(first_coor) + 1)
-        third_coor = str(int(first_coor) + 2)
-        try:
-            x_sign, x_data = self.tdict[first_coor]['sign'], self.tdict[first_coor]['data']
-            y_sign, y_data = self.tdict[second_coor]['sign'], self.tdict[second_coor]['data']
-            z_sign, z_data = self.tdict[third_coor]['sign'], self.tdict[third_coor]['data']
-        except KeyError:
-            x = None
-            y = None
-            z = None
-        else:
-            x = float(x_sign + x_data) / unit
-            y = float(y_sign + y_data) / unit
-            z = float(z_sign + z_data) / unit
+        first_coor, second_coor, third_coor = COORDINATE_WORDS[first_coor]
+        x = self._get_value(record, first_coor)
+        if x is not None:
+            y = self._get_value(record, second_coor)
+            z = self._get_value(record, third_coor)
+            if y is not None and z is not None:
+                return x, y, z
 
-        return x, y, z
+        return None, None, None
 
-    def _get_angle(self, angle, unit):
+    def _get_station(self, record):
         """
-        Get an angle of the parsed line
-        
+        Get the coordinates and the instrument height of a station
+
         Returns:
-            A floating number representing the angle
-            If this angle does not exist, return None
-            
+            X, Y, Z and the instrument height
+            If one of these values does not exist, return None
         """
-        try:
-            angle_sign, angle_data = self.tdict[angle]['sign'], self.tdict[angle]['data']
-        except KeyError:
-            angle = None
-        else:
-            angle = float(angle_sign + angle_data) / unit
+        x, y, z = self._get_coordinates(record, "84")
+        if x is not None:
+            ih = self._get_value(record, '88')
+            if ih is not None:
+                return x, y, z, ih
+
+        return None, None, None, None
+
+    def _get_polar(self, record):
+        """
+        Get the angles and the target height of a polar observation
+
+        Returns:
+            The horizontal angle, the zenithal angle and the target height
+            If one of these values does not exist, return None
+        """
+        angle = self._get_value(record, '21')
+        if angle is not None:
+            z_angle = self._get_value(record, '22')
+            th = self._get_value(record, '87')
+            if z_angle is not None and th is not None:
+                return angle, z_angle, th
 
-        return angle
+        return None, None, None
 
-    def _get_edm_accuracy(self, ldata):
+    def _get_distance(self, record):
+        """
+        Get the distance of a polar observation, slope (31) or horizontal (32)
+
+        Returns:
+            The distance and its type, 's' or 'h'
+            If there is no distance, return None
+        """
+        dist = self._get_value(record, '31')
+        if dist is not None:
+            return dist, 's'
+        dist = self._get_value(record, '32')
+        if dist is not None:
+            return dist, 'h'
+        logger.info('There is no distance value')
+
+        return None, None
+
+    def _get_edm_accuracy(self, record):
         """
         Get the ppm and the prism constant of the parsed line
         
@@ -137,53 +344,31 @@ class FormatParser(Parser):
             Two floating numbers representing ppm and prism constant
             If these values do not exist, return None
         """
-        try:
-            ppm_sign, ppm_data = self.tdict['51']['sign'], self.tdict['51']['data'][:ldata-4]
-            pc_sign, pc_data = self.tdict['51']['data'][ldata-4], self.tdict['51']['data'][ldata-3:]
-        except KeyError:
+        word = record.get('51')
+        if word is None:
             try:
-                ppm_sign, ppm_data = self.tdict['59']['sign'], self.tdict['59']['data']
-                pc_sign, pc_data = self.tdict['58']['sign'], self.tdict['58']['data']
+                ppm = float(record['59'][6:])
+                prism_constant = float(record['58'][6:])
             except KeyError:
                 ppm = None
                 prism_constant = None
-            else:
-                ppm = float(ppm_sign + ppm_data)
-                prism_constant = float(pc_sign + pc_data)
         else:
-            ppm = float(ppm_sign + ppm_data)
-            prism_constant = float(pc_sign + pc_data)
+            # ppm and prism constant share the data of the word
+            ldata = len(word) - 7
+            ppm = float(word[6:ldata + 3])
+            prism_constant = float(word[ldata + 3:])
 
         return ppm, prism_constant
 
-    def _get_value(self, value, unit):
-        """
-        Get a value of the parsed line
-        
-        Returns:
-            A string value or None
-        """
-        try:
-            value_sign, value_data = self.tdict[value]['sign'], self.tdict[value]['data']
-        except KeyError:
-            value = None
-        else:
-            value = float(value_sign + value_data) / unit
-
-        return value
-
-    @property
-    def points(self):
+    def iter_points(self):
         '''Extract all GSI data.
 
         This parser is based on the information in :ref:`if_leica_gsi`
         
-        Returns:
-            A list of GeoJSON-like Feature object representing points coordinates.
+        Yields:
+            GeoJSON-like Feature objects representing points coordinates.
     
         Raises:
-            KeyError: An error occured during line read, this line could not be 
-                computed as the WI does not exist.
             KeyError: An error occured during computation, the data does not exist.
         
         Notes:
@@ -194,135 +379,86 @@ class FormatParser(Parser):
             Angles are considered as zenithal
         '''
         
-        points = []
         bp = None
-        for row in self.rows:
-            tokens = row.split()
-            self.tdict = {}
-            for t in tokens:
-                t = t.lstrip('*')
-                data = {
-                    'wordindex': t[0:2],
-                    'info': t[2:6],
-                    'sign': t[6],
-                    'data': t[7:],
-                }
-                self.tdict[data['wordindex']] = data
-
-            try:
-                pid = int(self.tdict['11']['info'])
-                text = self.tdict['11']['data'].lstrip('0')
-            except KeyError:
-                pass
+        batch = BatchReducer()
+        for record in self.records():
+            word = record.get('11')
+            if word is None:
+                continue
+            pid = int(word[2:6])
+            text = word[7:].lstrip('0')
+            # Get angle and distance units
+            line_angle_unit, line_dist_unit = self._get_units(record)
+            if line_angle_unit is not None:
+                angle_unit = line_angle_unit
+            if line_dist_unit is not None:
+                dist_unit = line_dist_unit
+            # Beginning of the parsing, each word is looked up once
+            x, y, z = self._get_coordinates(record, "81")
+            if x is None:
+                angle, z_angle, th = self._get_polar(record)
+            if x is not None:
+                # Point coordinates
+                p = Point(x, y, z)
+                f = Feature(p,
+                            desc='PT',
+                            id=pid,
+                            point_name=text)
+                batch.append(f)
+            elif angle is not None:
+                # Polar data
+                z_angle_type = 'z'
+                # 31 or/and 32
+                dist, line_dist_type = self._get_distance(record)
+                if line_dist_type is not None:
+                    dist_type = line_dist_type
+                # Polar data may have instrument height
+                ih = self._get_value(record, '88')
+                if ih is None:
+                    ih = 0.0
+                if bp is None:
+                    bp = BasePoint(x=0.0, y=0.0, z=0.0, ih=ih, b_zero_st=0.0)
+                f = Feature(None,
+                            desc='PT',
+                            id=pid,
+                            point_name=text)
+                batch.add_polar(f,
+                                angle_unit=angle_unit,
+                                z_angle_type=z_angle_type,
+                                dist_type=dist_type,
+                                dist=dist,
+                                angle=angle,
+                                z_angle=z_angle,
+                                th=th,
+                                base_point=bp,
+                                coordorder='ENZ')
             else:
-                # Get angle and distance units
-                try:
-                    angle_code = list(UNITS['angle'] & set(self.tdict.keys()))[0]
-                    angle_unit = UNITS[self.tdict[angle_code]['info'][3]]
-                except IndexError:
-                    pass
-                try:
-                    dist_code = list(UNITS['distance'] & set(self.tdict.keys()))[0]
-                    dist_unit = UNITS[self.tdict[dist_code]['info'][3]]
-                except IndexError:
-                    pass
-                # Beginning of the parsing
-                try:
-                    # Look for point coordinates
-                    x, y, z = self.tdict['81'], self.tdict['82'], self.tdict['83']
-                except KeyError:
-                    try:
-                        angle, z_angle = self.tdict['21'], self.tdict['22']
-                        z_angle_type = 'z'
-                        # 31 or/and 32
-                        try:
-                            dist = self.tdict['31']
-                        except KeyError:
-                            try:
-                                dist = self.tdict['32']
-                            except KeyError:
-                                logger.info('There is no distance value')
-                                dist = None
-                            else:
-                                dist_type = 'h'
-                        else:
-                            dist_type = 's'
-                        th = self.tdict['87']
-                    except KeyError:
-                        try:
-                            # Look for a station
-                            x, y, z = self.tdict['84'], self.tdict['85'], self.tdict['86']
-                            ih = self.tdict['88']
-                        except KeyError:
-                            pass
-                        else:
-                            # Compute station data
-                            x, y, z = self._get_coordinates("84", UNITS[dist_unit])
-                            ih = self._get_value("88", UNITS[dist_unit])
-                            bp = BasePoint(x=x, y=y, z=z, ih=ih, b_zero_st=0.0)
-                            p = Point(x, y, z)
-                            f = Feature(p,
-                                        desc='ST',
-                                        id=pid,
-                                        point_name=text,
-                                        dist_unit=dist_unit)
-                            points.append(f)
-                    else:
-                        angle = self._get_angle("21", UNITS[angle_unit])
-                        z_angle = self._get_angle("22", UNITS[angle_unit])
-                        if dist_type == 's':
-                            dist = self._get_value("31", UNITS[dist_unit])
-                        else:
-                            dist = self._get_value("32", UNITS[dist_unit])
-                        th = self._get_value("87", UNITS[dist_unit])
-                        # Polar data may have point coordinates (not used)
-                        x, y, z = self._get_coordinates("81", UNITS[dist_unit])
-                        # Polar data may have instrument height
-                        ih = self._get_value("88", UNITS[dist_unit])
-                        if ih is None:
-                            ih = 0.0
-                        if bp is None:
-                            bp = BasePoint(x=0.0, y=0.0, z=0.0, ih=ih, b_zero_st=0.0)
-                        p = PolarPoint(angle_unit=angle_unit,
-                                       z_angle_type=z_angle_type,
-                                       dist_type=dist_type,
-                                       dist=dist,
-                                       angle=angle,
-                                       z_angle=z_angle,
-                                       th=th,
-                                       base_point=bp,
-                                       pid=pid,
-                                       text=text,
-                                       coordorder='ENZ')
-                        f = Feature(p.to_point(),
-                                    desc='PT',
-                                    id=pid,
-                                    point_name=text)
-                        points.append(f)
-                else:
-                    x, y, z = self._get_coordinates("81", UNITS[dist_unit])
-                    p = Point(x, y, z)
-                    f = Feature(p,
-                                desc='PT',
-                                id=pid,
-                                point_name=text)
-                    points.append(f)
-        logger.debug(points)
-        return points
-
-    @property
-    def raw_line(self):
+                x, y, z, ih = self._get_station(record)
+                if x is None:
+                    continue
+                # Station data
+                bp = BasePoint(x=x, y=y, z=z, ih=ih, b_zero_st=0.0)
+                p = Point(x, y, z)
+                f = Feature(p,
+                            desc='ST',
+                            id=pid,
+                            point_name=text,
+                            dist_unit=dist_unit)
+                batch.append(f)
+            if batch.full:
+                yield from batch.flush()
+        yield from batch.flush()
+
+    def iter_raw(self):
         '''Extract all GSI data.
 
         This parser is based on the information in :ref:`if_leica_gsi`
         
-        Returns:
-            A list of GeoJSON-like Feature object representing raw data
+        Yields:
+            GeoJSON-like Feature objects representing raw data
                 i.e. polar coordinates and other informations.
     
         Raises:
-            KeyError: An error occured during line read, this line could not be 
-                computed as the WI does not exist.
             KeyError: An error occured during computation, the data does not exist.
         
         Notes:
@@ -333,179 +469,120 @@ class FormatParser(Parser):
             Angles are considered as zenithal
         '''
 
-        points = []
-        # GSI files handles 8 or 16 bits data block. This will check the size
-        ldata = len(self.rows[0].split()[0].lstrip('*')[7:])
         station_id = 1
 
-        for row in self.rows:
-            tokens = row.split()
-            self.tdict = {}
-            for t in tokens:
-                t = t.lstrip('*')
-                data = {
-                    'wordindex': t[0:2],
-                    'info': t[2:6],
-                    'sign': t[6],
-                    'data': t[7:],
-                }
-                self.tdict[data['wordindex']] = data
+        for record in self.records():
+            word = record.get('11')
+            if word is None:
+                if '41' not in record:
+                    logger.info("The line will not be computed as the codes '%s' are not known"\
+                          % (list(record)))
+                continue
+            pid = int(word[2:6])
+            point_name = word[7:].lstrip('0')
+            # Get angle and distance units
+            line_angle_unit, line_dist_unit = self._get_units(record)
+            if line_angle_unit is not None:
+                angle_unit = line_angle_unit
+            if line_dist_unit is not None:
+                dist_unit = line_dist_unit
+            # Beginning of the parsing, each word is looked up once
+            x, y, z, ih = self._get_station(record)
+            if x is None:
+                angle, z_angle, th = self._get_polar(record)
+            if x is not None:
+                # Compute station data
+                # Station data may have an azimuth angle
+                hz0 = self._get_value(record, '25')
+                # Station data may have remarks or attributes
+                attrib = self._get_attrib(record)
+
+                if x:
+                    p = Point(x, y, z)
+                    station_name = point_name
+                else:
+                    logger.info('There is no known station')
+                    p = UNKNOWN_STATION
+                    station_name = "station_" + str(station_id)
+                    station_id += 1
+                f = Feature(p,
+                            desc='ST',
+                            id=pid,
+                            point_name=point_name,
+                            angle_unit=angle_unit,
+                            dist_unit=dist_unit,
+                            ih=ih,
+                            hz0=hz0,
+                            attrib=attrib)
+                yield f
+            elif angle is not None:
+                # Compute polar data
+                z_angle_type = 'z'
+                # 31 or/and 32
+                dist, line_dist_type = self._get_distance(record)
+                if line_dist_type is not None:
+                    dist_type = line_dist_type
+                # Polar data may have point coordinates
+                x, y, z = self._get_coordinates(record, "81")
+                # Polar data may have instrument height
+                ih = self._get_value(record, '88')
+                # Polar data may have constant data
+                ppm, prism_constant = self._get_edm_accuracy(record)
+                # Polar data may have remarks or attributes
+                attrib = self._get_attrib(record)
+
+                if x:
+                    p = Point(x, y, z)
+                else:
+                    logger.info('There is no known point')
+                    p = UNKNOWN_POINT
 
-            try:
-                pid = int(self.tdict['11']['info'])
-                point_name = self.tdict['11']['data'].lstrip('0')
-            except KeyError:
                 try:
-                    comments = self.tdict['41']
-                except KeyError:
-                    logger.info("The line %s will not be computed as the code '%s' is not known"\
-                          % (pid, row[0:2]))
-                else:
-                    # Compute comments
-                    comments = self._get_comments()
+                    station_name
+                except UnboundLocalError:
+                    logger.info('There is no known station')
+                    station_name = 'station_' + str(station_id)
+                    station_id += 1
+                f = Feature(p,
+                            desc='PO',
+                            id=pid,
+                            point_name=point_name,
+                            angle_unit=angle_unit,
+                            z_angle_type=z_angle_type,
+                            dist_unit=dist_unit,
+                            dist_type=dist_type,
+                            angle=angle,
+                            z_angle=z_angle,
+                            dist=dist,
+                            th=th,
+                            ih=ih,
+                            ppm=ppm,
+                            prism_constant=prism_constant,
+                            st_name=station_name,
+                            attrib=attrib)
+                yield f
             else:
-                # Get angle and distance units
-                try:
-                    angle_code = list(UNITS['angle'] & set(self.tdict.keys()))[0]
-                    angle_unit = UNITS[self.tdict[angle_code]['info'][3]]
-                except IndexError:
-                    pass
-                try:
-                    dist_code = list(UNITS['distance'] & set(self.tdict.keys()))[0]
-                    dist_unit = UNITS[self.tdict[dist_code]['info'][3]]
-                except IndexError:
-                    pass
-                # Beginning of the parsing
-                try:
-                    # Look for a station
-                    x, y, z = self.tdict['84'], self.tdict['85'], self.tdict['86']
-                    ih = self.tdict['88']
-                except KeyError:
-                    # Otherwise look for polar data
-                    try:
-                        angle, z_angle = self.tdict['21'], self.tdict['22']
-                        # 31 or/and 32
-                        try:
-                            dist = self.tdict['31']
-                        except KeyError:
-                            try:
-                                dist = self.tdict['32']
-                            except KeyError:
-                                logger.info('There is no distance value')
-                                dist = None
-                            else:
-                                dist_type = 'h'
-                        else:
-                            dist_type = 's'
-                        th = self.tdict['87']
-                    except KeyError:
-                        # Otherwise look for point coordinates only
-                        try:
-                            x, y, z = self.tdict['81'], self.tdict['82'], self.tdict['83']
-                        except KeyError:
-                            # Otherwise look for Remark or Attrib
-                            try:
-                                attrib = self.tdict['71']
-                            except KeyError:
-                                # No more possibilities
-                                logger.info("These data can not be compute : %s" % (self.tdict))
-                            else:
-                                # Compute remark or Attrib
-                                attrib = self._get_attrib()
-                        else:
-                            # Compute point coordinates
-                            x, y, z = self._get_coordinates("81", UNITS[dist_unit])
-                            # Point coordinates may have remarks or attributes
-                            attrib = self._get_attrib()
-
-                            if x:
-                                p = Point(x, y, z)
-                            else:
-                                logger.info('There is no known point')
-                                p = UNKNOWN_POINT
-                            f = Feature(p,
-                                        desc='PT',
-                                        id=pid,
-                                        point_name=point_name,
-                                        dist_unit=dist_unit,
-                                        attrib=attrib)
-                            points.append(f)
-                    else:
-                        # Compute polar data
-                        angle = self._get_angle("21", UNITS[angle_unit])
-                        z_angle = self._get_angle("22", UNITS[angle_unit])
-                        z_angle_type = 'z'
-                        if dist_type == 's':
-                            dist = self._get_value("31", UNITS[dist_unit])
-                        else:
-                            dist = self._get_value("32", UNITS[dist_unit])
-                        th = self._get_value("87", UNITS[dist_unit])
-                        # Polar data may have point coordinates
-                        x, y, z = self._get_coordinates("81",UNITS[dist_unit])
-                        # Polar data may have instrument height
-                        ih = self._get_value("88", UNITS[dist_unit])
-                        # Polar data may have constant data
-                        ppm, prism_constant = self._get_edm_accuracy(ldata)
-                        # Polar data may have remarks or attributes
-                        attrib = self._get_attrib()
-
-                        if x:
-                            p = Point(x, y, z)
-                        else:
-                            logger.info('There is no known point')
-                            p = UNKNOWN_POINT
-
-                        try:
-                            station_name
-                        except UnboundLocalError:
-                            logger.info('There is no known station')
-                            station_name = 'station_' + str(station_id)
-                            station_id += 1
-                        f = Feature(p,
-                                    desc='PO',
-                                    id=pid,
-                                    point_name=point_name,
-                                    angle_unit=angle_unit,
-                                    z_angle_type=z_angle_type,
-                                    dist_unit=dist_unit,
-                                    dist_type=dist_type,
-                                    angle=angle,
-                                    z_angle=z_angle,
-                                    dist=dist,
-                                    th=th,
-                                    ih=ih,
-                                    ppm=ppm,
-                                    prism_constant=prism_constant,
-                                    st_name=station_name,
-                                    attrib=attrib)
-                        points.append(f)
-                else:
-                    # Compute station data
-                    x, y, z = self._get_coordinates("84", UNITS[dist_unit])
-                    ih = self._get_value("88", UNITS[dist_unit])
-                    # Station data may have an azimuth angle
-                    hz0 = self._get_angle("25", UNITS[angle_unit])
-                    # Station data may have remarks or attributes
-                    attrib = self._get_attrib()
+                x, y, z = self._get_coordinates(record, "81")
+                if x is not None:
+                    # Compute point coordinates
+                    # Point coordinates may have remarks or attributes
+                    attrib = self._get_attrib(record)
 
                     if x:
                         p = Point(x, y, z)
-                        station_name = point_name
                     else:
-                        logger.info('There is no known station')
-                        p = UNKNOWN_STATION
-                        station_name = "station_" + str(station_id)
-                        station_id += 1
+                        logger.info('There is no known point')
+                        p = UNKNOWN_POINT
                     f = Feature(p,
-                                desc='ST',
+                                desc='PT',
                                 id=pid,
                                 point_name=point_name,
-                                angle_unit=angle_unit,
                                 dist_unit=dist_unit,
-                                ih=ih,
-                                hz0=hz0,
                                 attrib=attrib)
-                    points.append(f)
-
-        logger.debug(points)
-        return points
+                    yield f
+                elif '71' in record:
+                    # Remark or Attrib
+                    attrib = self._get_attrib(record)
+                else:
+                    # No more possibilities
+                    logger.info("These data can not be compute : %s" % (record))
@@ -19,9 +19,12 @@
 # <http://www.gnu.org/licenses/>.
 
 import logging
+import re
 
-from . import Feature, Point, UNITS_CIRCLE, UNKNOWN_STATION, UNKNOWN_POINT, check_coordorder
-from .polar import BasePoint, PolarPoint
+from collections import namedtuple
+
+from . import Feature, Parser, Point, UNITS_CIRCLE, UNKNOWN_STATION, UNKNOWN_POINT, check_coordorder
+from .polar import BasePoint, BatchReducer
 
 # ussfeet = US Survey Feet
 # Angular Mil is not present as the code is not known
@@ -29,30 +32,385 @@ UNITS = {"angle": {"DDDMMSS": "dms", "Gons": "gon", "Degrees": "deg"},
          "distance": {"Feet": "feet", "Metres": "meter", "Feet US": "ussfeet"}
          }
 
+# Comments used by the parser: settings, and the fast station setup of
+# Trimble M3 (circle hold and instrument height input)
+COMMENTS = re.compile(r'(?P<coordorder>Coord Order:)|(?P<angle_unit>Angle Units:)'
+                      r'|(?P<dist_unit>Dist Units:)|(?P<circle>TI  HOLD|TI  Hz)'
+                      r'|(?P<ih>TI  INPUT)')
+
+# Uploaded point, Manually input point, Calculated coordinate, Resection
+# point and Multiple coordinates records
+COORDINATES = ('UP', 'MP', 'CC', 'RE', 'MC')
+
+Comment = namedtuple('Comment', 'type kind value')
+Comment.__doc__ = '''A CO record setting a value, like the angle unit.
+
+The value is None for an instrument height input without height.
+'''
+
+Coordinates = namedtuple('Coordinates', 'type name x y z attrib')
+Coordinates.__doc__ = '''A point coordinates record, x and y in the order of the file.'''
+
+Station = namedtuple('Station', 'type name ih backsight azimuth circle')
+Station.__doc__ = '''A ST record, with its backsight azimuth and circle reading.'''
+
+Observation = namedtuple('Observation', 'type name th dist angle z_angle attrib')
+Observation.__doc__ = '''A SS, F1, F2, SO or CP record.
+
+Attrib is a list for SS, F1 and F2 records, the code of a CP record and
+None for a SO record.
+'''
+
 logger = logging.getLogger(__name__)
 
 
-class FormatParser:
+def _comment(text):
+    match = COMMENTS.match(text)
+    if match is None:
+        return None
+    kind = match.lastgroup
+    if kind == 'coordorder':
+        value = check_coordorder(text.split(':')[-1].strip())
+    elif kind == 'angle_unit':
+        value = UNITS["angle"][text.split(':')[1].strip()]
+    elif kind == 'dist_unit':
+        value = UNITS["distance"][text.split(':')[1].strip()]
+    elif kind == 'circle':
+        value = text.split('Hz')[1].strip().split()[0]
+    else:
+        try:
+            value = text.split('ih')[1].strip().split()[0]
+        except IndexError:
+            value = None
+    return Comment('CO', kind, value)
+
+
+def _coordinates(fs):
+    return Coordinates(fs[0], fs[1], fs[3], fs[4], float(fs[5]), fs[6])
+
+
+def _station(fs):
+    return Station(fs[0], fs[1], float(fs[5]), fs[3], fs[6], fs[7])
+
+
+def _shot(fs):
+    # Missing values are 0
+    return Observation(fs[0], fs[1], float(fs[2] or 0), float(fs[3] or 0), float(fs[4] or 0),
+                       float(fs[5] or 0), [fs[7]] if len(fs) > 7 else [])
+
+
+def _stakeout(fs):
+    return Observation(fs[0], fs[1], float(fs[3]), float(fs[4]), float(fs[5]), float(fs[6]),
+                       None)
+
+
+def _control(fs):
+    return Observation(fs[0], fs[1], float(fs[3]), float(fs[4]), float(fs[5]), float(fs[6]),
+                       fs[8])
+
+
+# Typed record of each record type, but comments
+RECORDS = {
+    'ST': _station,
+    'SS': _shot,
+    'F1': _shot,
+    'F2': _shot,
+    'SO': _stakeout,
+    'CP': _control,
+    }
+RECORDS.update((rectype, _coordinates) for rectype in COORDINATES)
+
+
+class _Reader:
+    '''The state of the parser while walking through the records.
+
+    Each record type has its handler in :attr:`handlers`. Comments and
+    point coordinates are handled the same way for points and raw data.
+    '''
+
+    def __init__(self):
+        self.points_coord = {}
+        self.pid = 0
+        self.st = 0
+        self.cocircle = self.coih = False
+        self.handlers = {'CO': self.comment, 'ST': self.station, 'SS': self.shot,
+                         'F1': self.shot, 'F2': self.shot, 'SO': self.stakeout,
+                         'CP': self.control}
+        self.handlers.update((rectype, self.coordinates) for rectype in COORDINATES)
+
+    def comment(self, rec):
+        kind = rec.kind
+        if kind == 'circle':
+            self.cocircle = True
+        elif kind == 'ih':
+            # Keep the last height if none is given
+            if rec.value is not None:
+                self.ih = rec.value
+            self.coih = True
+        else:
+            setattr(self, kind, rec.value)
+        # For fast setting, Trimble M3 can use comments for station
+        if self.cocircle and self.coih:
+            self.station_name = "st{}".format(self.st)
+            try:
+                station_point = self.points_coord[self.station_name]
+            except KeyError:
+                logger.info('There is no known station')
+                station_point = UNKNOWN_STATION
+                self.points_coord[self.station_name] = station_point
+            self.comment_station(station_point)
+            self.st += 1
+            self.pid += 1
+            self.cocircle = self.coih = False
+
+    def point(self, rec):
+        easting = rec.x
+        northing = rec.y
+        if self.coordorder == "NEZ":
+            easting, northing = northing, easting
+        point = Point(easting, northing, rec.z)
+        self.points_coord[rec.name] = point
+        return Feature(point,
+                       desc='PT',
+                       id=self.pid,
+                       point_name=rec.name,
+                       dist_unit=self.dist_unit,
+                       attrib=[rec.attrib])
+
+    def station_point(self, rec):
+        self.station_name = rec.name
+        try:
+            return self.points_coord[rec.name]
+        except KeyError:
+            logger.info('There is no known station')
+            self.points_coord[rec.name] = UNKNOWN_STATION
+            return UNKNOWN_STATION
+
+
+class _PointReader(_Reader):
+    '''Compute points, polar observations being reduced by batches.
+
+    Points observed in the current batch are known by their feature until
+    the batch is computed, then only their geometry is kept.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.batch = BatchReducer()
+        self.observed = []
+
+    def flush(self):
+        '''Compute the batch and return its features.'''
+
+        features = self.batch.flush()
+        points_coord = self.points_coord
+        for name in self.observed:
+            point = points_coord[name]
+            if isinstance(point, Feature):
+                points_coord[name] = point.geometry
+        self.observed = []
+        return features
+
+    def geometry(self, station_point):
+        if isinstance(station_point, Feature):
+            # Computed from a polar observation of this batch
+            return self.batch.geometry(station_point)
+        return station_point
+
+    def comment_station(self, station_point):
+        station_point = self.geometry(station_point)
+        f = Feature(station_point,
+                    desc='ST',
+                    id=self.pid,
+                    point_name=self.station_name,
+                    dist_unit=self.dist_unit,
+                    ih=self.ih)
+        self.batch.append(f)
+        self.bp = BasePoint(x=station_point.x, y=station_point.y, z=station_point.z,
+                            ih=self.ih, b_zero_st=0.0)
+
+    def coordinates(self, rec):
+        self.batch.append(self.point(rec))
+        self.pid += 1
+
+    def station(self, rec):
+        station_point = self.geometry(self.station_point(rec))
+        # Look for back sight values in station values
+        # Treat only one backsight or the last one
+        if rec.backsight != '':
+            b_zero_st = (float(rec.azimuth) - float(rec.circle)) % UNITS_CIRCLE[self.angle_unit]
+        else:
+            b_zero_st = 0.0
+        f = Feature(station_point,
+                    desc='ST',
+                    id=self.pid,
+                    point_name=rec.name,
+                    dist_unit=self.dist_unit,
+                    ih=rec.ih,
+                    b_zero_st=b_zero_st)
+        self.batch.append(f)
+        self.pid += 1
+        self.bp = BasePoint(x=station_point.x, y=station_point.y, z=station_point.z,
+                            ih=rec.ih, b_zero_st=b_zero_st)
+
+    def polar(self, rec, f):
+        self.batch.add_polar(f,
+                             angle_unit=self.angle_unit,
+                             z_angle_type='v',
+                             dist_type='s',
+                             dist=rec.dist,
+                             angle=rec.angle,
+                             z_angle=rec.z_angle,
+                             th=rec.th,
+                             base_point=self.bp,
+                             coordorder=self.coordorder)
+        self.pid += 1
+
+    def shot(self, rec):
+        f = Feature(None,
+                    desc='PT',
+                    id=self.pid,
+                    point_name=rec.name,
+                    dist_unit=self.dist_unit,
+                    attrib=rec.attrib)
+        self.polar(rec, f)
+        self.points_coord[rec.name] = f
+        self.observed.append(rec.name)
+
+    def stakeout(self, rec):
+        f = Feature(None,
+                    desc='PT',
+                    id=self.pid,
+                    point_name=rec.name,
+                    dist_unit=self.dist_unit)
+        self.polar(rec, f)
+        self.points_coord[self.station_name] = f
+        self.observed.append(self.station_name)
+
+    def control(self, rec):
+        f = Feature(None,
+                    desc='PT',
+                    id=self.pid,
+                    point_name=rec.name,
+                    dist_unit=self.dist_unit,
+                    attrib=[rec.attrib])
+        self.polar(rec, f)
+        self.points_coord[self.station_name] = f
+        self.observed.append(self.station_name)
+
+
+class _RawReader(_Reader):
+    '''Collect raw data in :attr:`features`, record after record.'''
+
+    def __init__(self):
+        super().__init__()
+        self.features = []
+
+    def comment_station(self, station_point):
+        f = Feature(station_point,
+                    desc='ST',
+                    id=self.pid,
+                    point_name=self.station_name,
+                    dist_unit=self.dist_unit,
+                    ih=self.ih)
+        self.features.append(f)
+
+    def coordinates(self, rec):
+        self.features.append(self.point(rec))
+        self.pid += 1
+
+    def station(self, rec):
+        f = Feature(self.station_point(rec),
+                    desc='ST',
+                    id=self.pid,
+                    point_name=rec.name,
+                    dist_unit=self.dist_unit,
+                    ih=rec.ih)
+        self.features.append(f)
+        self.pid += 1
+        if rec.backsight != '':
+            try:
+                point = self.points_coord[rec.backsight]
+            except KeyError:
+                logger.info('There is no known point')
+                point = UNKNOWN_POINT
+            f = Feature(point,
+                        desc='BS',
+                        id=self.pid,
+                        point_name=rec.backsight,
+                        angle_unit=self.angle_unit,
+                        circle=rec.circle,
+                        azimuth=rec.azimuth)
+            self.features.append(f)
+            self.pid += 1
+
+    def polar(self, rec, **attrib):
+        try:
+            point = self.points_coord[rec.name]
+        except KeyError:
+            logger.info('There is no known point')
+            point = UNKNOWN_POINT
+        f = Feature(point,
+                    desc='PO',
+                    id=self.pid,
+                    point_name=rec.name,
+                    angle_unit=self.angle_unit,
+                    z_angle_type='v',
+                    dist_unit=self.dist_unit,
+                    dist_type='s',
+                    azimuth=None,
+                    angle=rec.angle,
+                    z_angle=rec.z_angle,
+                    dist=rec.dist,
+                    th=rec.th,
+                    **attrib)
+        self.features.append(f)
+        self.pid += 1
+
+    def shot(self, rec):
+        self.polar(rec, attrib=rec.attrib)
+
+    def stakeout(self, rec):
+        self.polar(rec)
+
+    control = shot
+
+
+class FormatParser(Parser):
     '''The FormatParser for Nikon Raw v2.00 data.
 
+    The parser does not set :attr:`resumes`: feature ids are numbered
+    from the start of the file and a station setup can refer to any
+    earlier point by name, so points can not be computed again from a
+    station alone.
+
     Args:
         data (str): A string representing the file to be parsed.
 
     Attributes:
-        rows (list): A list of each lines of the file being parsed.
+        rows (:class:`formats.RawData`): The lines of the file being parsed.
     '''
 
-    def __init__(self, data):
-        self.rows = data.splitlines()
+    tokenizes = True
+
+    def tokenize(self, line):
+        """Split a line in a typed record, skipping the comments and the
+        record types which are not used."""
+
+        fs = line.split(',')
+        if fs[0] == 'CO':
+            return _comment(fs[1])
+        typed = RECORDS.get(fs[0])
+        if typed is not None:
+            return typed(fs)
 
-    @property
-    def points(self):
+    def iter_points(self):
         '''Extract all Nikon RAW data format V2.00.
 
         This parser is based on the information in :ref:`if_nikon_raw`
 
-        Returns:
-            A list of GeoJSON-like Feature object representing points coordinates.
+        Yields:
+            GeoJSON-like Feature objects representing points coordinates.
 
         Raises:
 
@@ -62,205 +420,23 @@ class FormatParser:
             Angles are considered as vertical
             Distances are slope distances
         '''
-        points_coord = {}
-        base_points = {}
-        points = []
-        pid = 0
-        st = 0
-        cocircle = coih = False
-        
-        for row in self.rows:
-            fs = row.split(',')
-            # Get angle and distance units
-            if fs[0] == 'CO':
-                if fs[1].startswith('Coord Order:'):
-                    coordorder = check_coordorder(fs[1].split(':')[-1].strip())
-                if fs[1].startswith('Angle Units:'):
-                    angle_unit = UNITS["angle"][fs[1].split(':')[1].strip()]
-                if fs[1].startswith('Dist Units:'):
-                    dist_unit = UNITS["distance"][fs[1].split(':')[1].strip()]
-                # For fast setting, Trimble M3 can use comments for station
-                if fs[1].startswith('TI  HOLD') or fs[1].startswith('TI  Hz'):
-                    circle = fs[1].split('Hz')[1].strip().split()[0]
-                    cocircle = True
-                if fs[1].startswith('TI  INPUT'):
-                    try:
-                        ih = fs[1].split('ih')[1].strip().split()[0]
-                    except IndexError:
-                        ih = ih
-                    coih = True
-                if cocircle and coih:
-                    station_name = "st{}".format(st)
-                    try:
-                        station_point = points_coord[station_name]
-                    except KeyError:
-                        logger.info('There is no known station')
-                        station_point = UNKNOWN_STATION
-                        points_coord[station_name] = station_point
-                    f = Feature(station_point,
-                            desc='ST',
-                            id=pid,
-                            point_name=station_name,
-                            dist_unit=dist_unit,
-                            ih=ih)
-                    points.append(f)
-                    b_zero_st = 0.0
-                    bp = BasePoint(x=station_point.x, y=station_point.y, z=station_point.z, ih=ih, b_zero_st=b_zero_st)
-                    base_points[station_name] = bp
-                    st += 1
-                    pid += 1
-                    cocircle = coih = False
-
-            # Look for point coordinates
-            if fs[0] in ('UP','MP', 'CC', 'RE', 'MC'):
-                point_name = fs[1]
-                easting = fs[3]
-                northing = fs[4]
-                if coordorder == "NEZ":
-                    easting, northing = northing, easting
-                elevation = float(fs[5])
-                point = Point(easting, northing, elevation)
-                attrib = [fs[6]]
-                f = Feature(point,
-                            desc='PT',
-                            id=pid,
-                            point_name=point_name,
-                            dist_unit=dist_unit,
-                            attrib=attrib)
-                points.append(f)
-                pid += 1
-                points_coord[point_name] = point
-            # Look for station coordinates
-            if fs[0] == 'ST':
-                station_name = fs[1]
-                ih = float(fs[5])
-                if ih == '':
-                    ih = 0
-                try:
-                    station_point = points_coord[station_name]
-                except KeyError:
-                    logger.info('There is no known station')
-                    station_point = UNKNOWN_STATION
-                    points_coord[station_name] = station_point
-                # Look for back sight values in station values
-                # Treat only one backsight or the last one
-                if fs[3] != '':
-                    b_zero_st = (float(fs[6]) - float(fs[7])) % UNITS_CIRCLE[angle_unit]
-                else:
-                    b_zero_st = 0.0
-                f = Feature(station_point,
-                            desc='ST',
-                            id=pid,
-                            point_name=station_name,
-                            dist_unit=dist_unit,
-                            ih=ih,
-                            b_zero_st=b_zero_st)
-                points.append(f)
-                pid += 1
-                bp = BasePoint(x=station_point.x, y=station_point.y, z=station_point.z, ih=ih, b_zero_st=b_zero_st)
-                base_points[station_name] = bp
-            # Look for Sideshot, Face 1 and Face 2
-            if fs[0] in ('SS', 'F1', 'F2'):
-                for i in (2, 3, 4, 5):
-                    if fs[i] == '':
-                        fs[i] = 0
-                point_name = fs[1]
-                th = float(fs[2])
-                dist = float(fs[3])
-                angle = float(fs[4])
-                z_angle = float(fs[5])
-                try:
-                    attrib = [fs[7]]
-                except IndexError:
-                    attrib = []
-                p = PolarPoint(angle_unit=angle_unit,
-                               z_angle_type='v',
-                               dist_type='s',
-                               dist=dist,
-                               angle=angle,
-                               z_angle=z_angle,
-                               th=th,
-                               base_point=bp,
-                               pid=pid,
-                               text=point_name,
-                               coordorder=coordorder)
-                point = p.to_point()
-                f = Feature(point,
-                            desc='PT',
-                            id=pid,
-                            point_name=point_name,
-                            dist_unit=dist_unit,
-                            attrib=attrib)
-                points.append(f)
-                pid += 1
-                points_coord[point_name] = point
-            # Look for Stakeout
-            if fs[0] == 'SO':
-                point_name = fs[1]
-                th = float(fs[3])
-                dist = float(fs[4])
-                angle = float(fs[5])
-                z_angle = float(fs[6])
-                p = PolarPoint(angle_unit=angle_unit,
-                               z_angle_type='v',
-                               dist_type='s',
-                               dist=dist,
-                               angle=angle,
-                               z_angle=z_angle,
-                               th=th,
-                               base_point=bp,
-                               pid=pid,
-                               text=point_name,
-                               coordorder=coordorder)
-                point = p.to_point()
-                f = Feature(point,
-                            desc='PT',
-                            id=pid,
-                            point_name=point_name,
-                            dist_unit=dist_unit)
-                points.append(f)
-                pid += 1
-                points_coord[station_name] = point
-            # Look for Control point
-            if fs[0] == 'CP':
-                point_name = fs[1]
-                th = float(fs[3])
-                dist = float(fs[4])
-                angle = float(fs[5])
-                z_angle = float(fs[6])
-                attrib = [fs[8]]
-                p = PolarPoint(angle_unit=angle_unit,
-                               z_angle_type='v',
-                               dist_type='s',
-                               dist=dist,
-                               angle=angle,
-                               z_angle=z_angle,
-                               th=th,
-                               base_point=bp,
-                               pid=pid,
-                               text=point_name,
-                               coordorder=coordorder)
-                point = p.to_point()
-                f = Feature(point,
-                            desc='PT',
-                            id=pid,
-                            point_name=point_name,
-                            dist_unit=dist_unit,
-                            attrib=attrib)
-                points.append(f)
-                pid += 1
-                points_coord[station_name] = point
-        logger.debug(points)
-        return points
-
-    @property
-    def raw_line(self):
+        reader = _PointReader()
+        handlers = reader.handlers
+        batch = reader.batch
+
+        for rec in self.records():
+            handlers[rec.type](rec)
+            if batch.full:
+                yield from reader.flush()
+        yield from reader.flush()
+
+    def iter_raw(self):
         '''Extract all Nikon Raw v2.00 data.
 
         This parser is based on the information in :ref:`if_nikon_raw`
 
-        Returns:
-            A list of GeoJSON-like Feature object representing points coordinates.
+        Yields:
+            GeoJSON-like Feature objects representing points coordinates.
 
         Raises:
 
@@ -278,207 +454,12 @@ class FormatParser:
            Angles are considered as vertical
            Distances are slope distances
         '''
-        points_coord = {}
-        points = []
-        pid = 0
-        st = 0
-        cocircle = coih = False
-
-        for row in self.rows:
-            fs = row.split(',')
-            # Get angle and distance units
-            if fs[0] == 'CO':
-                if fs[1].startswith('Coord Order:'):
-                    coordorder = check_coordorder(fs[1].split(':')[-1].strip())
-                if fs[1].startswith('Angle Units:'):
-                    angle_unit = UNITS["angle"][fs[1].split(':')[1].strip()]
-                if fs[1].startswith('Dist Units:'):
-                    dist_unit = UNITS["distance"][fs[1].split(':')[1].strip()]
-                # For fast setting, Trimble M3 can use comments for station
-                if fs[1].startswith('TI  HOLD') or fs[1].startswith('TI  Hz'):
-                    circle = fs[1].split('Hz')[1].strip().split()[0]
-                    cocircle = True
-                if fs[1].startswith('TI  INPUT'):
-                    try:
-                        ih = fs[1].split('ih')[1].strip().split()[0]
-                    except IndexError:
-                        ih = ih
-                    coih = True
-            if cocircle and coih:
-                station_name = "st{}".format(st)
-                try:
-                    station_point = points_coord[station_name]
-                except KeyError:
-                    logger.info('There is no known station')
-                    station_point = UNKNOWN_STATION
-                    points_coord[station_name] = station_point
-                f = Feature(station_point,
-                        desc='ST',
-                        id=pid,
-                        point_name=station_name,
-                        dist_unit=dist_unit,
-                        ih=ih)
-                points.append(f)
-                st += 1
-                pid += 1
-                cocircle = coih = False
-
-            # Look for point coordinates
-            if fs[0] in ('UP','MP', 'CC', 'RE', 'MC'):
-                point_name = fs[1]
-                easting = fs[3]
-                northing = fs[4]
-                if coordorder == "NEZ":
-                    easting, northing = northing, easting
-                elevation = float(fs[5])
-                point = Point(easting, northing, elevation)
-                attrib = [fs[6]]
-                f = Feature(point,
-                            desc='PT',
-                            id=pid,
-                            point_name=point_name,
-                            dist_unit=dist_unit,
-                            attrib=attrib)
-                points.append(f)
-                pid += 1
-                points_coord[point_name] = point
-            # Look for station coordinates
-            if fs[0] == 'ST':
-                station_name = fs[1]
-                ih = float(fs[5])
-                if ih == '':
-                    ih = 0
-                try:
-                    station_point = points_coord[station_name]
-                except KeyError:
-                    logger.info('There is no known station')
-                    station_point = UNKNOWN_STATION
-                    points_coord[station_name] = station_point
-                f = Feature(station_point,
-                            desc='ST',
-                            id=pid,
-                            point_name=station_name,
-                            dist_unit=dist_unit,
-                            ih=ih)
-                points.append(f)
-                pid += 1
-                # Look for back sight values in station values
-                # Treat only one backsight or the last one
-                if fs[3] != '':
-                    b_zero_st = (float(fs[6]) - float(fs[7])) % UNITS_CIRCLE[angle_unit]
-                else:
-                    b_zero_st = 0.0
-                if fs[3] != '':
-                    point_name = fs[3]
-                    azimuth = fs[6]
-                    circle = fs[7]
-                    try:
-                        point = points_coord[point_name]
-                    except KeyError:
-                        logger.info('There is no known point')
-                        point = UNKNOWN_POINT
-                    f = Feature(point,
-                                desc='BS',
-                                id=pid,
-                                point_name=point_name,
-                                angle_unit=angle_unit,
-                                circle=circle,
-                                azimuth=azimuth)
-                    points.append(f)
-                    pid += 1
-            # Look for Sideshot, Face 1 and Face 2
-            if fs[0] in ('SS', 'F1', 'F2'):
-                for i in (2, 3, 4, 5):
-                    if fs[i] == '':
-                        fs[i] = 0
-                point_name = fs[1]
-                th = float(fs[2])
-                dist = float(fs[3])
-                angle = float(fs[4])
-                z_angle = float(fs[5])
-                try:
-                    attrib = [fs[7]]
-                except IndexError:
-                    attrib = []
-                azimuth = None
-                try:
-                    point = points_coord[point_name]
-                except KeyError:
-                    logger.info('There is no known point')
-                    point = UNKNOWN_POINT
-                f = Feature(point,
-                            desc='PO',
-                            id=pid,
-                            point_name=point_name,
-                            angle_unit=angle_unit,
-                            z_angle_type='v',
-                            dist_unit=dist_unit,
-                            dist_type='s',
-                            azimuth=azimuth,
-                            angle=angle,
-                            z_angle=z_angle,
-                            dist=dist,
-                            th=th,
-                            attrib=attrib)
-                points.append(f)
-                pid += 1
-            # Look for Stakeout
-            if fs[0] == 'SO':
-                point_name = fs[1]
-                th = float(fs[3])
-                dist = float(fs[4])
-                angle = float(fs[5])
-                z_angle = float(fs[6])
-                azimuth = None
-                try:
-                    point = points_coord[point_name]
-                except KeyError:
-                    logger.info('There is no known point')
-                    point = UNKNOWN_POINT
-                f = Feature(point,
-                            desc='PO',
-                            id=pid,
-                            point_name=point_name,
-                            angle_unit=angle_unit,
-                            z_angle_type='v',
-                            dist_unit=dist_unit,
-                            dist_type='s',
-                            azimuth=azimuth,
-                            angle=angle,
-                            z_angle=z_angle,
-                            dist=dist,
-                            th=th)
-                points.append(f)
-                pid += 1
-            # Look for Control point
-            if fs[0] == 'CP':
-                point_name = fs[1]
-                th = float(fs[3])
-                dist = float(fs[4])
-                angle = float(fs[5])
-                z_angle = float(fs[6])
-                attrib = fs[8]
-                azimuth = None
-                try:
-                    point = points_coord[point_name]
-                except KeyError:
-                    logger.info('There is no known point')
-                    point = UNKNOWN_POINT
-                f = Feature(point,
-                            desc='PO',
-                            id=pid,
-                            point_name=point_name,
-                            angle_unit=angle_unit,
-                            z_angle_type='v',
-                            dist_unit=dist_unit,
-                            dist_type='s',
-                            azimuth=azimuth,
-                            angle=angle,
-                            z_angle=z_angle,
-                            dist=dist,
-                            th=th,
-                            attrib=attrib)
-                points.append(f)
-                pid += 1
-        logger.debug(points)
-        return points
+        reader = _RawReader()
+        handlers = reader.handlers
+        features = reader.features
+
+        for rec in self.records():
+            handlers[rec.type](rec)
+            if features:
+                yield from features
+                features.clear()
@@ -21,9 +21,18 @@
 
 from math import cos, sin, tan
 
-from totalopenstation.formats.conversion import to_rad
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from totalopenstation.formats.conversion import converter
+from totalopenstation.utils import profiling
 from . import Feature, Point, UNITS_CIRCLE
 
+# Number of features computed together by a BatchReducer
+BATCH_SIZE = 4096
+
 
 def polar_to_cartesian(angle_unit, z_angle_type, dist_type, base_x, base_y, base_z, dist, azimuth, z_angle, ih, th):
     '''Convert polar coordinates to cartesian.
@@ -36,27 +45,28 @@ def polar_to_cartesian(angle_unit, z_angle_type, dist_type, base_x, base_y, base
     - the horizontal ``angle`` is hardcoded with zero azimuth at North
     '''
 
+    to_rad = converter(angle_unit, 'rad')
     if z_angle_type == 'dh':
         dZ = z_angle
     if z_angle_type == 'v':
         if dist_type == 'h':
-            dZ = dist * tan(to_rad(z_angle, angle_unit))
+            dZ = dist * tan(to_rad(z_angle))
         else:
-            dZ = dist * sin(to_rad(z_angle, angle_unit))
+            dZ = dist * sin(to_rad(z_angle))
     if z_angle_type == 'z':
         if dist_type == 'h':
-            dZ = dist / tan(to_rad(z_angle, angle_unit))
+            dZ = dist / tan(to_rad(z_angle))
         else:
-            dZ = dist * cos(to_rad(z_angle, angle_unit))
+            dZ = dist * cos(to_rad(z_angle))
     if dist_type == 's':
         if z_angle_type == 'dh':
             dist = (dist ** 2 - z_angle ** 2) ** (0.5)
         if z_angle_type == 'v':
-            dist = dist * cos(to_rad(z_angle, angle_unit))
+            dist = dist * cos(to_rad(z_angle))
         if z_angle_type == 'z':
-            dist = dist *  sin(to_rad(z_angle, angle_unit))
-    dX = dist * sin(to_rad(azimuth, angle_unit))
-    dY = dist * cos(to_rad(azimuth, angle_unit))
+            dist = dist *  sin(to_rad(z_angle))
+    dX = dist * sin(to_rad(azimuth))
+    dY = dist * cos(to_rad(azimuth))
 
     target_x = base_x + dX
     target_y = base_y + dY
@@ -65,6 +75,117 @@ def polar_to_cartesian(angle_unit, z_angle_type, dist_type, base_x, base_y, base
     return dict(x=target_x, y=target_y, z=target_z)
 
 
+def _reduce_group(angle_unit, z_angle_type, dist_type, coordorder,
+                  angle, z_angle, dist, th, stations):
+    '''Vectorized polar_to_cartesian for observations of the same kind.'''
+
+    base_x, base_y, base_z, ih, b_zero_st = stations.T
+    if coordorder == "NEZ":
+        base_x, base_y = base_y, base_x
+    to_rad = converter(angle_unit, 'rad')
+    azimuth = np.remainder(b_zero_st + angle, UNITS_CIRCLE[angle_unit])
+    if z_angle_type != 'dh':
+        z_rad = to_rad(z_angle)
+
+    if z_angle_type == 'dh':
+        dZ = z_angle
+    if z_angle_type == 'v':
+        if dist_type == 'h':
+            dZ = dist * np.tan(z_rad)
+        else:
+            dZ = dist * np.sin(z_rad)
+    if z_angle_type == 'z':
+        if dist_type == 'h':
+            dZ = dist / np.tan(z_rad)
+        else:
+            dZ = dist * np.cos(z_rad)
+    if dist_type == 's':
+        if z_angle_type == 'dh':
+            dist = (dist ** 2 - z_angle ** 2) ** (0.5)
+        if z_angle_type == 'v':
+            dist = dist * np.cos(z_rad)
+        if z_angle_type == 'z':
+            dist = dist * np.sin(z_rad)
+    azimuth = to_rad(azimuth)
+    target_x = base_x + dist * np.sin(azimuth)
+    target_y = base_y + dist * np.cos(azimuth)
+    target_z = base_z + ih + dZ - th
+
+    if coordorder == "NEZ":
+        target_x, target_y = target_y, target_x
+    return target_x, target_y, target_z
+
+
+def polar_to_cartesian_batch(kinds, kind, angle, z_angle, dist, th, station, stations):
+    '''Convert many polar coordinates to cartesian at once.
+
+    Observations are grouped by kind and each group is computed in a single
+    NumPy pass, giving the same results as :func:`polar_to_cartesian`.
+    Without NumPy, observations are converted one by one.
+
+    Args:
+        kinds (list): The distinct kinds of observations, as tuples of
+            (angle_unit, z_angle_type, dist_type, coordorder).
+        kind (sequence): The index in kinds of each observation.
+        angle (sequence): The horizontal angles.
+        z_angle (sequence): The vertical angles (or height differences).
+        dist (sequence): The distances.
+        th (sequence): The target heights.
+        station (sequence): The index in stations of each observation.
+        stations (sequence): The stations as rows of
+            (x, y, z, ih, b_zero_st). For NEZ observations, x and y are
+            given in the NEZ order, like for :class:`PolarPoint`.
+
+    Returns:
+        Three sequences of x, y and z coordinates.
+    '''
+
+    if np is None:
+        return _polar_to_cartesian_loop(kinds, kind, angle, z_angle, dist, th, station, stations)
+
+    kind = np.asarray(kind, dtype=np.intp)
+    angle = np.asarray(angle, dtype=np.float64)
+    z_angle = np.asarray(z_angle, dtype=np.float64)
+    dist = np.asarray(dist, dtype=np.float64)
+    th = np.asarray(th, dtype=np.float64)
+    station = np.asarray(station, dtype=np.intp)
+    stations = np.asarray(stations, dtype=np.float64).reshape(-1, 5)
+
+    x = np.empty(len(kind))
+    y = np.empty(len(kind))
+    z = np.empty(len(kind))
+    for k in np.unique(kind):
+        group = np.flatnonzero(kind == k)
+        x[group], y[group], z[group] = _reduce_group(*kinds[k],
+                                                     angle[group],
+                                                     z_angle[group],
+                                                     dist[group],
+                                                     th[group],
+                                                     stations[station[group]])
+    return x, y, z
+
+
+def _polar_to_cartesian_loop(kinds, kind, angle, z_angle, dist, th, station, stations):
+    '''Pure Python fallback of polar_to_cartesian_batch.'''
+
+    x, y, z = [], [], []
+    for i in range(len(kind)):
+        angle_unit, z_angle_type, dist_type, coordorder = kinds[kind[i]]
+        base_x, base_y, base_z, ih, b_zero_st = stations[station[i]]
+        if coordorder == "NEZ":
+            base_x, base_y = base_y, base_x
+        azimuth = (b_zero_st + angle[i]) % UNITS_CIRCLE[angle_unit]
+        coords = polar_to_cartesian(angle_unit, z_angle_type, dist_type,
+                                    base_x, base_y, base_z,
+                                    dist[i], azimuth, z_angle[i], ih, th[i])
+        if coordorder == "NEZ":
+            coords['x'], coords['y'] = coords['y'], coords['x']
+        x.append(coords['x'])
+        y.append(coords['y'])
+        z.append(coords['z'])
+    return x, y, z
+
+
 class PolarPoint:
     '''A point geometry defined by polar coordinates.'''
 
@@ -149,3 +270,101 @@ class BasePoint:
         self.z = float(z)
         self.ih = float(ih)
         self.b_zero_st = float(b_zero_st)
+
+
+class BatchReducer:
+    '''Compute the coordinates of polar observations by batches.
+
+    Parsers give their features in order: features which are already
+    computed with :meth:`append` and polar observations with
+    :meth:`add_polar`. Geometries of polar observations are computed
+    together by :func:`polar_to_cartesian_batch` and the features are given
+    back in the same order by :meth:`flush`.
+
+    Args:
+        size (int): The number of features of a full batch.
+    '''
+
+    def __init__(self, size=BATCH_SIZE):
+        self.size = size
+        self.features = []
+        self.pending = []
+        self.kinds = []
+        self.kind_index = {}
+        self.stations = []
+        self.last_station = None
+
+    def __len__(self):
+        return len(self.features)
+
+    @property
+    def full(self):
+        '''True if the batch should be flushed.'''
+
+        return len(self.features) >= self.size
+
+    def append(self, feature):
+        '''Add a feature which geometry is already known.'''
+
+        self.features.append(feature)
+
+    def _station(self, base_point):
+        '''Return the index of a base point in the station table.'''
+
+        # Base points can be modified by parsers, like a PolarPoint the
+        # values are taken when the observation is added
+        row = (base_point.x, base_point.y, base_point.z, base_point.ih, base_point.b_zero_st)
+        if row != self.last_station:
+            self.stations.append(row)
+            self.last_station = row
+        return len(self.stations) - 1
+
+    def add_polar(self, feature, angle_unit, z_angle_type, dist_type,
+                  dist, angle, z_angle, th, base_point, coordorder):
+        '''Add a feature which geometry is given by a polar observation.
+
+        Arguments are the same as for :class:`PolarPoint`, the geometry of
+        the feature is set when the batch is computed.
+        '''
+
+        key = (angle_unit, z_angle_type, dist_type, coordorder)
+        try:
+            kind = self.kind_index[key]
+        except KeyError:
+            kind = self.kind_index[key] = len(self.kinds)
+            self.kinds.append(key)
+        self.pending.append((feature, kind, float(angle), float(z_angle),
+                             float(dist), float(th), self._station(base_point)))
+        self.features.append(feature)
+
+    def compute(self):
+        '''Set the geometry of all pending polar observations.'''
+
+        if not self.pending:
+            return
+        with profiling.stage('reduce'):
+            features, kind, angle, z_angle, dist, th, station = zip(*self.pending)
+            x, y, z = polar_to_cartesian_batch(self.kinds, kind, angle, z_angle,
+                                               dist, th, station, self.stations)
+            if np is not None:
+                x, y, z = x.tolist(), y.tolist(), z.tolist()
+            for feature, fx, fy, fz in zip(features, x, y, z):
+                feature.geometry = Point(fx, fy, fz)
+            profiling.count('reduce', len(features))
+        self.pending = []
+        self.stations = self.stations[-1:]
+
+    def geometry(self, feature):
+        '''Return the geometry of a feature, computing it if needed.'''
+
+        if feature.geometry is None:
+            self.compute()
+        return feature.geometry
+
+    def flush(self):
+        '''Compute the batch and return all its features, in order.'''
+
+        self.compute()
+        features = self.features
+        self.features = []
+        return features
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# filename: formats/sniffer.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+'''Guess the input format of data from its first lines.
+
+Each format of ``BUILTIN_INPUT_FORMATS`` has a signature function giving a
+score between 0 and 1 to the head of the data, with cheap checks on headers
+and record patterns only. Nothing is parsed.'''
+
+import re
+
+from collections import namedtuple
+
+# Name of the input format to guess, for user interfaces
+AUTO = 'auto'
+
+# Bytes read from the start of a file
+SNIFF_SIZE = 4096
+
+# Lines checked against record patterns
+SNIFF_LINES = 40
+
+# Guesses with a lower score are discarded
+MIN_CONFIDENCE = 0.2
+
+Guess = namedtuple('Guess', 'format confidence')
+
+GSI_LINE = re.compile(r'\*?\d\d[\d.]{4}[+-]\S+( +\*?\d\d[\d.]{4}[+-]\S+)* *$')
+RW5_RECORD = re.compile(r'(--)?[A-Z][A-Z0-9],')
+NIKON_RECORD = re.compile(r'(CO|ST|SS|F1|BS|CP|MO|XB|DS|CT),')
+SDR_RECORD = re.compile(r'\d\d[A-Z]{2}')
+GTS_OBSERVATION = re.compile(r'_\+[^_]*_ ?\?[+-]\d+m\d+[+-]\d+')
+ARE_RECORD = re.compile(r'\d+=')
+ZEISS_RECORD = re.compile(r'For [A-Z]\d\|')
+REC_500_SEQUENCE = re.compile(r' *\d{4} ')
+TCR_705_POINT = re.compile(r' *\w+, *-?[\d.]+, *-?[\d.]+, *-?[\d.]+,')
+
+
+def _share(lines, pattern):
+    '''Return the share of lines matching pattern.'''
+
+    if not lines:
+        return 0.0
+    return sum(1 for line in lines if pattern.match(line)) / len(lines)
+
+
+def carlson_rw5(head, lines):
+    if 'MO,AD' in head:
+        return 1.0
+    return 0.8 * _share(lines, RW5_RECORD)
+
+
+def landxml(head, lines):
+    if '<LandXML' in head or 'landxml.org/schema' in head:
+        return 1.0
+    if head.lstrip().startswith('<?xml'):
+        return 0.3
+    return 0.0
+
+
+def leica_gsi(head, lines):
+    return _share(lines, GSI_LINE)
+
+
+def leica_tcr_705(head, lines):
+    if 'INS. TYPE.' in head and 'TCR' in head:
+        return 1.0
+    if 'SETUP SN' in head:
+        return 0.8
+    return 0.4 * _share(lines, TCR_705_POINT)
+
+
+def leica_tcr_1205(head, lines):
+    if 'System 1200 Data Export' in head:
+        return 1.0
+    if 'TPS Measurements' in head or 'TPS Station' in head:
+        return 0.8
+    return 0.0
+
+
+def nikon_raw_v200(head, lines):
+    if 'CO,Nikon RAW' in head:
+        return 1.0
+    return 0.7 * _share(lines, NIKON_RECORD)
+
+
+def sokkia_sdr33(head, lines):
+    if '00NMSDR' in head:
+        return 1.0
+    return 0.5 * _share(lines, SDR_RECORD)
+
+
+def topcon_gts(head, lines):
+    if GTS_OBSERVATION.search(head):
+        return 0.9
+    return 0.0
+
+
+def trimble_are(head, lines):
+    score = _share(lines, ARE_RECORD)
+    if score and '\n37=' in head and '\n38=' in head:
+        return max(score, 0.9)
+    return 0.7 * score
+
+
+def zeiss_r5(head, lines):
+    score = _share(lines, ZEISS_RECORD)
+    if score and '|Adr ' in head:
+        return score
+    return 0.5 * score
+
+
+def zeiss_rec_500(head, lines):
+    score = _share(lines, REC_500_SEQUENCE)
+    if score and ('OR.COOR' in head or 'POLAR' in head):
+        return max(score, 0.9)
+    return 0.6 * score
+
+
+SIGNATURES = {
+    'carlson_rw5': carlson_rw5,
+    'landxml': landxml,
+    'leica_gsi': leica_gsi,
+    'leica_tcr_705': leica_tcr_705,
+    'leica_tcr_1205': leica_tcr_1205,
+    'nikon_raw_v200': nikon_raw_v200,
+    'sokkia_sdr33': sokkia_sdr33,
+    'topcon_gts': topcon_gts,
+    'trimble_are': trimble_are,
+    'zeiss_r5': zeiss_r5,
+    'zeiss_rec_500': zeiss_rec_500,
+    }
+
+
+def sniff(head):
+    '''Rank input formats by how well they match the head of some data.
+
+    Args:
+        head (str): The first few KB of data. A last line which is not
+            complete should be removed.
+
+    Returns:
+        A list of :class:`Guess` (format, confidence) with a confidence of
+        at least ``MIN_CONFIDENCE``, best first.
+    '''
+
+    lines = [line for line in head.splitlines() if line.strip()][:SNIFF_LINES]
+    guesses = []
+    for name, signature in SIGNATURES.items():
+        confidence = signature(head, lines)
+        if confidence >= MIN_CONFIDENCE:
+            guesses.append(Guess(name, round(confidence, 3)))
+    guesses.sort(key=lambda guess: guess.confidence, reverse=True)
+    return guesses
+
+
+def read_head(path, size=SNIFF_SIZE):
+    '''Return the first size bytes of a file as text, complete lines only.
+
+    Bytes are decoded as Latin-1, which never fails: signatures are ASCII.
+    '''
+
+    with open(path, 'rb') as f:
+        data = f.read(size + 1)
+    if len(data) > size:
+        end = data.rfind(b'\n', 0, size)
+        data = data[:end if end > 0 else size]
+    return data.decode('latin-1')
+
+
+def sniff_file(path, size=SNIFF_SIZE):
+    '''Rank input formats for a file, see :func:`sniff`.'''
+
+    return sniff(read_head(path, size))
+
+
+def guess_format(head):
+    '''Return the best input format for the head of some data, or None.'''
+
+    guesses = sniff(head)
+    if guesses:
+        return guesses[0].format
+    return None
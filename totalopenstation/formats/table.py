@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# filename: formats/table.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+from array import array
+from math import isnan
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import Feature, Point
+
+# Observation values, stored as float64 columns
+FLOAT_COLUMNS = ('angle', 'z_angle', 'dist', 'th', 'ih')
+
+# Text values, stored as interned columns
+TEXT_COLUMNS = ('point_name', 'angle_unit', 'z_angle_type', 'dist_type', 'dist_unit')
+
+# Properties holding the station name of an observation
+STATION_PROPERTIES = ('station_name', 'st_name')
+
+
+def _to_float(value):
+    '''Return value as a float, NaN if it is not a number.'''
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+class InternedColumn:
+    '''A column of strings stored as integer codes.
+
+    Each distinct value is stored once in ``labels``, rows only hold the
+    index of their value, -1 for missing values.
+
+    Args:
+        codes (numpy.ndarray): The int32 code of each row.
+        labels (list): The distinct values.
+    '''
+
+    def __init__(self, codes, labels):
+        self.codes = codes
+        self.labels = labels
+
+    @classmethod
+    def from_values(cls, values):
+        '''Build a column from an iterable of values.'''
+
+        index = {}
+        codes = array('i')
+        for value in values:
+            if value is None:
+                codes.append(-1)
+            else:
+                codes.append(index.setdefault(value, len(index)))
+        return cls(np.frombuffer(codes, dtype=np.int32), list(index))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        code = self.codes[index]
+        if code < 0:
+            return None
+        return self.labels[code]
+
+    def __iter__(self):
+        labels = self.labels
+        for code in self.codes.tolist():
+            yield labels[code] if code >= 0 else None
+
+
+class PointTable:
+    '''A columnar table of points, backed by NumPy arrays.
+
+    Coordinates and observations are stored in contiguous float64 arrays,
+    missing values being NaN. Texts are stored as :class:`InternedColumn`.
+    This uses much less memory than a list of :class:`formats.Feature` and
+    allows computations on whole columns.
+
+    The table is also a sequence of :class:`formats.Feature`, created on
+    access without copying the columns, so it can be used wherever a list
+    of features is expected. Only the properties stored in columns are
+    available on these features.
+
+    NumPy is an optional dependency of Total Open Station, which is needed
+    to use this class.
+
+    Args:
+        x (numpy.ndarray): The x coordinates.
+        y (numpy.ndarray): The y coordinates.
+        z (numpy.ndarray): The z coordinates, NaN for 2D points.
+        id (numpy.ndarray): The point ids, int64 if all ids are integers.
+        desc (:class:`InternedColumn`): The feature descriptions.
+        station (numpy.ndarray): The int32 index of the station of each
+            observation in ``stations``, -1 if there is none.
+        stations (list): The station names.
+        **columns: The other columns, named as in ``FLOAT_COLUMNS`` and
+            ``TEXT_COLUMNS``.
+    '''
+
+    def __init__(self, x, y, z, id, desc, station, stations, **columns):
+        if np is None:
+            raise ImportError('NumPy is needed to use a PointTable')
+        self.x = x
+        self.y = y
+        self.z = z
+        self.id = id
+        self.desc = desc
+        self.station = station
+        self.stations = stations
+        for name in FLOAT_COLUMNS:
+            setattr(self, name, columns[name])
+        for name in TEXT_COLUMNS:
+            setattr(self, name, columns[name])
+
+    @classmethod
+    def from_features(cls, features):
+        '''Build a table from an iterable of :class:`formats.Feature`.
+
+        Features are read one at a time, so a parser generator can be given
+        without building a list first.
+
+        Raises:
+            TypeError: A feature geometry is not a Point, or is missing.
+        '''
+
+        if np is None:
+            raise ImportError('NumPy is needed to use a PointTable')
+        coords = {'x': array('d'), 'y': array('d'), 'z': array('d')}
+        floats = {name: array('d') for name in FLOAT_COLUMNS}
+        texts = {name: [] for name in TEXT_COLUMNS}
+        ids = []
+        desc = []
+        station = []
+        nan = float('nan')
+
+        for feature in features:
+            geom = feature.geometry
+            if geom is None or geom.geom_type != 'Point':
+                raise TypeError('A PointTable only holds Point geometries')
+            c = geom.coords[0]
+            coords['x'].append(c[0])
+            coords['y'].append(c[1])
+            coords['z'].append(c[2] if len(c) > 2 else nan)
+            ids.append(feature.id)
+            properties = feature.properties
+            desc.append(properties.get('desc'))
+            for name in FLOAT_COLUMNS:
+                floats[name].append(_to_float(properties.get(name)))
+            for name in TEXT_COLUMNS:
+                texts[name].append(properties.get(name))
+            for name in STATION_PROPERTIES:
+                if properties.get(name) is not None:
+                    station.append(properties[name])
+                    break
+            else:
+                station.append(None)
+
+        if all(type(i) is int for i in ids):
+            id_column = np.array(ids, dtype=np.int64)
+        else:
+            id_column = np.array(ids, dtype=object)
+        station = InternedColumn.from_values(station)
+        columns = {name: np.frombuffer(values, dtype=np.float64)
+                   for name, values in floats.items()}
+        for name, values in texts.items():
+            columns[name] = InternedColumn.from_values(values)
+        return cls(x=np.frombuffer(coords['x'], dtype=np.float64),
+                   y=np.frombuffer(coords['y'], dtype=np.float64),
+                   z=np.frombuffer(coords['z'], dtype=np.float64),
+                   id=id_column,
+                   desc=InternedColumn.from_values(desc),
+                   station=station.codes,
+                   stations=station.labels,
+                   **columns)
+
+    @property
+    def has_z(self):
+        '''A boolean array, True for points with a z coordinate.'''
+
+        return ~np.isnan(self.z)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.feature(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('PointTable index out of range')
+        return self.feature(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.feature(index)
+
+    def feature(self, index):
+        '''Return the row at index as a :class:`formats.Feature`.'''
+
+        x = float(self.x[index])
+        y = float(self.y[index])
+        z = float(self.z[index])
+        if isnan(z):
+            point = Point(x, y)
+        else:
+            point = Point(x, y, z)
+        properties = {}
+        for name in TEXT_COLUMNS:
+            value = getattr(self, name)[index]
+            if value is not None:
+                properties[name] = value
+        for name in FLOAT_COLUMNS:
+            value = float(getattr(self, name)[index])
+            if not isnan(value):
+                properties[name] = value
+        station = self.station[index]
+        if station >= 0:
+            properties['station_name'] = self.stations[station]
+        pid = self.id[index]
+        if isinstance(pid, np.generic):
+            pid = pid.item()
+        return Feature(point,
+                       desc=self.desc[index],
+                       id=pid,
+                       **properties)
@@ -24,30 +24,30 @@
 
 import logging
 
-from .polar import BasePoint, PolarPoint
-from totalopenstation.formats.conversion import deg_to_gon
-from . import Feature
+from .polar import BasePoint, BatchReducer
+from totalopenstation.formats.conversion import convert
+from . import Feature, Parser, iter_split
 
 logger = logging.getLogger(__name__)
 
 
-class FormatParser:
+class FormatParser(Parser):
     '''A FormatParser for Topcon GTS polar format.
 
-    It doesn't inherit from the base Parser class because the internal
-    procedure is quite different, but it implements the same API so it
-    can work nicely with other parts of the library.'''
+    The internal procedure is quite different from the base Parser class,
+    as records are separated by commas and not by line breaks.'''
+
+    def split_points(self):
+        """Split records, which are separated by commas."""
 
-    def __init__(self, data):
         # workaround for (apparently) corrupt downloaded data
-        clean_data = ''.join([l[1:-5] for l in data.splitlines()])
-        self.rows = clean_data.split(',')
+        clean_lines = (l[1:-5] for l in self.rows)
+        return iter_split(clean_lines, ',')
 
-    @property
-    def points(self):
-        points = []
+    def iter_points(self):
         bp = BasePoint(x=0, y=0, z=0, ih=0, b_zero_st=0.0 )
-        for row in self.rows:
+        batch = BatchReducer()
+        for row in self.split_points():
             fs = row.split('+')
             try:
                 pid = fs[1][:-3]
@@ -60,22 +60,21 @@ class FormatParser:
                 continue
             coordorder = 'NEZ'
             dist = float(fs[2].split('m')[0])
-            angle = deg_to_gon(float(fs[3][:-1]) / 10000)
-            z_angle = deg_to_gon(float(fs[4][:-3]) / 10000)
-            p = PolarPoint(angle_unit='gon',
-                           z_angle_type='z',
-                           dist_type='s',
-                           dist=dist,
-                           angle=angle,
-                           z_angle=z_angle,
-                           th=th,
-                           base_point=bp,
-                           pid=pid,
-                           text=text,
-                           coordorder=coordorder)
-            f = Feature(p.to_point(),
+            angle = convert(float(fs[3][:-1]) / 10000, 'deg', 'gon')
+            z_angle = convert(float(fs[4][:-3]) / 10000, 'deg', 'gon')
+            f = Feature(None,
                         desc=text,
                         id=pid)
-            points.append(f)
-        logger.debug(points)
-        return points
+            batch.add_polar(f,
+                            angle_unit='gon',
+                            z_angle_type='z',
+                            dist_type='s',
+                            dist=dist,
+                            angle=angle,
+                            z_angle=z_angle,
+                            th=th,
+                            base_point=bp,
+                            coordorder=coordorder)
+            if batch.full:
+                yield from batch.flush()
+        yield from batch.flush()
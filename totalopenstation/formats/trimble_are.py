@@ -20,7 +20,7 @@
 # along with Total Open Station.  If not, see
 # <http://www.gnu.org/licenses/>.
 
-from . import Feature, Parser, Point
+from . import Feature, Parser, Point, iter_split
 
 
 class FormatParser(Parser):
@@ -60,5 +60,5 @@ class FormatParser(Parser):
             return f
 
     def split_points(self):
-        splitted_points = self.data.split('0=')
+        splitted_points = iter_split(self.rows.chunks(), '0=')
         return splitted_points
@@ -20,22 +20,16 @@
 
 import logging
 
-from . import Feature, Point
+from . import Feature, Parser, Point
 
 logger = logging.getLogger(__name__)
 
 
-class FormatParser:
+class FormatParser(Parser):
 
-    def __init__(self, data):
-        self.rows = (r for r in data.splitlines())
-
-    @property
-    def points(self):
+    def iter_points(self):
         '''Point features.'''
 
-        points = []
-
         def record(recstr):
             fields = recstr.split('|')
             record_fields = {}
@@ -77,6 +71,4 @@ class FormatParser:
                         feature = Feature(point,
                                           desc=rec['desc'],
                                           id=rec['id'])
-                        points.append(feature)
-        logger.debug(points)
-        return points
+                        yield feature
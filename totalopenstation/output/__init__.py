@@ -2,6 +2,71 @@
 
 __all__ = ["tops_csv", "tops_dxf", "tops_dat", "tops_sql", "tops_txt", "tops_geojson", "tops_landxml"]
 
+import io
+import os
+from contextlib import contextmanager
+
+# The size of the buffer of output files, in bytes
+BUFFER_SIZE = 1 << 20
+
+
+@contextmanager
+def text_stream(f, encoding='utf-8'):
+    """Use a text or binary file object as a text file object.
+
+    A binary file object is wrapped to encode the text, and left open at
+    the end; an unbuffered one is also buffered in chunks of
+    ``BUFFER_SIZE`` bytes.
+
+    Args:
+        f: A text or binary file object.
+        encoding (str): The encoding of text written to a binary file object.
+
+    Yields:
+        A text file object writing to f.
+    """
+
+    if not isinstance(f, (io.RawIOBase, io.BufferedIOBase)):
+        yield f
+        return
+    raw = isinstance(f, io.RawIOBase)
+    buffer = io.BufferedWriter(f, BUFFER_SIZE) if raw else f
+    text = io.TextIOWrapper(buffer, encoding=encoding, newline='')
+    try:
+        yield text
+    finally:
+        text.detach()
+        if raw:
+            buffer.detach()
+
+
+def write_file(builder, path):
+    """Write the output of a builder to a file.
+
+    The output is written to ``path + '.part'``, which replaces path once
+    complete: a failed conversion leaves neither a truncated file nor,
+    when overwriting, a lost one.
+
+    Args:
+        builder (:class:`Builder`): The builder of the output.
+        path (str): The path of the output file.
+
+    Returns:
+        int: The size of the file, in bytes.
+    """
+
+    part = path + '.part'
+    try:
+        with open(part, 'w', buffering=BUFFER_SIZE) as f:
+            builder.write_to(f)
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return os.path.getsize(path)
+
+
 class Builder:
 
     def __init__(self, data):
@@ -10,17 +75,35 @@ class Builder:
         
         Args:
         data (:class:`formats.Parser`): A list of :class:`formats.Feature`
+            or a :class:`formats.table.PointTable`. A PointTable is a sequence
+            of features, builders which only need coordinates read its
+            columns directly.
         """
 
         self.data = data
-    
+
+    def write_to(self, f):
+        """Action for writing the output to a file object.
+
+        This method **should** be overridden in the child class to write
+        the output as it is built, a piece at a time, so that the whole
+        output is never held in memory. Older builders overriding only
+        :meth:`process` get their output written at once.
+
+        Args:
+            f: A text or binary file object, see :func:`text_stream`.
+        """
+
+        if type(self).process is Builder.process:
+            raise NotImplementedError('%s must override write_to() or process()'
+                                      % type(self).__name__)
+        with text_stream(f) as f:
+            f.write(self.process())
+
     def process(self):
         """Action for building the output string.
-        
-        This method **must** be overridden in the child class
-        to have a working builder.
-        
-        Process the input data (processing data).
+
+        Process the input data (processing data) with :meth:`write_to`.
         This is because we want to keep the generation of output separated from
         saving it to disk.
 
@@ -28,13 +111,17 @@ class Builder:
             str: A string representing the value to output.
         """
 
-        pass
+        f = io.StringIO()
+        self.write_to(f)
+        return f.getvalue()
 
 
 BUILTIN_OUTPUT_FORMATS = {
     'dxf': ('tops_dxf', 'OutputFormat', 'DXF'),
+    'dxf_compact': ('tops_dxf', 'CompactOutputFormat', 'DXF (compact)'),
     'csv': ('tops_csv', 'OutputFormat', 'CSV'),
     'sql': ('tops_sql', 'OutputFormat', 'OGC-SQL'),
+    'sql_copy': ('tops_sql', 'CopyOutputFormat', 'PostGIS (COPY)'),
     'dat': ('tops_dat', 'OutputFormat', 'DAT'),
     'txt': ('tops_txt', 'OutputFormat', 'Text'),
     'geojson': ('tops_geojson', 'OutputFormat', 'GeoJSON'),
@@ -21,9 +21,11 @@
 # <http://www.gnu.org/licenses/>.
 
 import csv
-import io
 
-from . import Builder
+from . import Builder, text_stream
+
+FIELDNAMES = ['pid', 'type', 'point_name', 'x', 'y', 'z', 'angle', 'z_angle', 'distance',
+              'th', 'ih', 'circle', 'station']
 
 
 class OutputFormat(Builder):
@@ -36,42 +38,37 @@ class OutputFormat(Builder):
 
     def __init__(self, data):
         self.data = data
-        self.output = io.StringIO()
-        fieldnames = ['pid', 'type', 'point_name', 'x', 'y', 'z', 'angle', 'z_angle', 'distance',
-                      'th', 'ih', 'circle', 'station']
-        self.writer = csv.DictWriter(self.output, quoting=csv.QUOTE_NONNUMERIC, fieldnames=fieldnames)
-        self.writer.writeheader()
-
-    def process(self):
-
-        for feature in self.data:
-            row = {
-                'pid': feature.id,
-                'type': feature.desc,
-                'x' : feature.geometry.x,
-                'y': feature.geometry.y
-            }
-
-            try:  # not all input formats include z coordinates
-                row['z'] = feature.geometry.z
-            except ValueError:
-                row['z'] = ''
-
-            # a few cases with simple yes/no logic
-            for prop in ['point_name', 'ih', 'circle', 'z_angle', 'th']:
-                row[prop] = feature.properties.get(prop, '')  # empty string as default value
-
-            # not all input formats include azimuth/angle
-            row['angle'] = feature.properties.get('azimuth',
-                                                  feature.properties.get('angle', ''))
-
-            # not all input formats include distance
-            row['distance'] = feature.properties.get('slope_dist',
-                                                 feature.properties.get('horizontal_dist', ''))
-
-            # not all input formats include station name
-            row['station'] = feature.properties.get('st_name', '')
-
-            self.writer.writerow(row)
 
-        return self.output.getvalue()
+    def write_to(self, f):
+        with text_stream(f) as f:
+            writer = csv.DictWriter(f, quoting=csv.QUOTE_NONNUMERIC, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            for feature in self.data:
+                row = {
+                    'pid': feature.id,
+                    'type': feature.desc,
+                    'x' : feature.geometry.x,
+                    'y': feature.geometry.y
+                }
+
+                try:  # not all input formats include z coordinates
+                    row['z'] = feature.geometry.z
+                except ValueError:
+                    row['z'] = ''
+
+                # a few cases with simple yes/no logic
+                for prop in ['point_name', 'ih', 'circle', 'z_angle', 'th']:
+                    row[prop] = feature.properties.get(prop, '')  # empty string as default value
+
+                # not all input formats include azimuth/angle
+                row['angle'] = feature.properties.get('azimuth',
+                                                      feature.properties.get('angle', ''))
+
+                # not all input formats include distance
+                row['distance'] = feature.properties.get('slope_dist',
+                                                     feature.properties.get('horizontal_dist', ''))
+
+                # not all input formats include station name
+                row['station'] = feature.properties.get('st_name', '')
+
+                writer.writerow(row)
@@ -19,7 +19,9 @@
 # along with Total Open Station.  If not, see
 # <http://www.gnu.org/licenses/>.
 
-from . import Builder
+from totalopenstation.formats.table import PointTable
+
+from . import Builder, text_stream
 
 
 def to_dat(point):
@@ -27,18 +29,28 @@ def to_dat(point):
     return result
 
 
+def table_to_dat(table):
+    '''Generate DAT lines from the columns of a PointTable.'''
+
+    for pid, x, y in zip(table.id.tolist(), table.x.tolist(), table.y.tolist()):
+        yield "{0} {0} {1} {2}\r\n".format(pid, x, y)
+
+
 class OutputFormat(Builder):
 
     """
     Exports points data in DAT format suitable for use with Archis.
 
-    ``data`` must be an iterable containing Feature objects.
+    ``data`` must be an iterable containing Feature objects or a PointTable.
     """
 
     def __init__(self, data):
         self.data = data
 
-    def process(self):
-        lines = [to_dat(point) for point in self.data]
-        output = "".join(lines)
-        return output
+    def write_to(self, f):
+        if isinstance(self.data, PointTable):
+            lines = table_to_dat(self.data)
+        else:
+            lines = (to_dat(point) for point in self.data)
+        with text_stream(f) as f:
+            f.writelines(lines)
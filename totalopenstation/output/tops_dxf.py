@@ -19,8 +19,294 @@
 # along with Total Open Station.  If not, see
 # <http://www.gnu.org/licenses/>.
 
+from totalopenstation.formats.table import PointTable
 
-from . import Builder
+from . import Builder, text_stream
+
+HEADER = ('999\nDXF created from Total Open Station\n'
+          '  0\nSECTION\n'
+          '  2\nHEADER\n'
+          '  9\n$ACADVER\n'
+          '  1\nAC1009\n'  # R11
+          '  0\nENDSEC\n')
+
+# Compact mode uses lightweight polylines, which need R2000
+COMPACT_HEADER = HEADER.replace('AC1009', 'AC1015')
+
+LAYER = ('  0\nLAYER\n'         # start definition of LAYER
+         '  5\n10\n'            # LAYER handle
+         '  2\n%s\n'            # LAYER name
+         ' 70\n0\n'             # LAYER is not frozen
+         ' 62\n%s\n'            # LAYER color
+         '  6\nCONTINUOUS\n')   # LAYER linetype
+
+# A point and its ID number, by layer of the point, x, y, layer of the ID,
+# ID, x, y and text height
+POINT = ('  0\nPOINT\n'
+         '  8\n%s\n'
+         ' 10\n%s\n'
+         ' 20\n%s\n'
+         '  0\nTEXT\n'
+         '  1\n%s\n'
+         '  8\n%s\n'
+         ' 10\n%s\n'
+         ' 20\n%s\n'
+         ' 40\n%s\n'
+         ' 62\n256\n')
+
+# The Z value of a point as text, by Z, layer, x, y below the point and
+# text height
+Z_TEXT = ('  0\nTEXT\n'
+          '  1\n%s\n'
+          '  8\n%s\n'
+          ' 10\n%s\n'
+          ' 20\n%s\n'
+          ' 40\n%s\n'
+          ' 62\n256\n')
+
+POLYLINE = ('  0\nPOLYLINE\n'
+            '  8\n%s\n'
+            '  6\nCONTINUOUS\n'
+            ' 62\n256\n'
+            ' 66\n1\n'
+            ' 70\n0\n')
+
+VERTEX = ('  0\nVERTEX\n'
+          '  8\n%s\n'
+          ' 10\n%s\n'  # x
+          ' 20\n%s\n'  # y
+          ' 30\n%s\n')  # z
+
+# A line string in compact mode, by layer and number of vertices, then x
+# and y of each vertex
+LWPOLYLINE = ('  0\nLWPOLYLINE\n'
+              '100\nAcDbEntity\n'
+              '  8\n%s\n'
+              '100\nAcDbPolyline\n'
+              ' 90\n%d\n'
+              ' 70\n0\n')
+
+LWVERTEX = (' 10\n%s\n'
+            ' 20\n%s\n')
+
+# The block inserted for each point in compact mode: a point with its ID,
+# its Z value and its code as attributes, the Z below the ID, the code
+# invisible
+BLOCK_NAME = 'TOPS_POINT'
+BLOCKS = ('  0\nSECTION\n'
+          '  2\nBLOCKS\n'
+          '  0\nBLOCK\n'
+          '  8\n0\n'
+          '  2\n%(name)s\n'
+          ' 70\n2\n'            # the block has attributes
+          ' 10\n0.0\n'
+          ' 20\n0.0\n'
+          ' 30\n0.0\n'
+          '  3\n%(name)s\n'
+          '  0\nPOINT\n'
+          '  8\n0\n'
+          ' 10\n0.0\n'
+          ' 20\n0.0\n'
+          ' 30\n0.0\n'
+          '  0\nATTDEF\n'
+          '  8\n0\n'
+          ' 10\n0.0\n'
+          ' 20\n0.0\n'
+          ' 30\n0.0\n'
+          ' 40\n%(height)s\n'
+          '  1\n\n'             # default value
+          '  3\nID\n'           # prompt
+          '  2\nID\n'           # tag
+          ' 70\n0\n'
+          '  0\nATTDEF\n'
+          '  8\n0\n'
+          ' 10\n0.0\n'
+          ' 20\n%(offset)s\n'
+          ' 30\n0.0\n'
+          ' 40\n%(height)s\n'
+          '  1\n\n'
+          '  3\nZ\n'
+          '  2\nZ\n'
+          ' 70\n0\n'
+          '  0\nATTDEF\n'
+          '  8\n0\n'
+          ' 10\n0.0\n'
+          ' 20\n0.0\n'
+          ' 30\n0.0\n'
+          ' 40\n%(height)s\n'
+          '  1\n\n'
+          '  3\nCODE\n'
+          '  2\nCODE\n'
+          ' 70\n1\n'            # invisible
+          '  0\nENDBLK\n'
+          '  8\n0\n'
+          '  0\nENDSEC\n')
+
+# A point in compact mode, by layer, x, y, then the ID attribute by layer,
+# x, y, text height and ID
+INSERT = ('  0\nINSERT\n'
+          '  8\n%s\n'
+          ' 66\n1\n'            # attributes follow
+          '  2\n' + BLOCK_NAME + '\n'
+          ' 10\n%s\n'
+          ' 20\n%s\n'
+          '  0\nATTRIB\n'
+          '  8\n%s\n'
+          ' 10\n%s\n'
+          ' 20\n%s\n'
+          ' 40\n%s\n'
+          '  1\n%s\n'
+          '  2\nID\n'
+          ' 70\n0\n')
+
+# The Z attribute of a point in compact mode, by layer, x, y below the
+# point, text height and Z
+Z_ATTRIB = ('  0\nATTRIB\n'
+            '  8\n%s\n'
+            ' 10\n%s\n'
+            ' 20\n%s\n'
+            ' 40\n%s\n'
+            '  1\n%s\n'
+            '  2\nZ\n'
+            ' 70\n0\n')
+
+# The code attribute of a point in compact mode and the end of the
+# insert, by layer, x, y, text height, code and layer
+CODE_ATTRIB = ('  0\nATTRIB\n'
+               '  8\n%s\n'
+               ' 10\n%s\n'
+               ' 20\n%s\n'
+               ' 40\n%s\n'
+               '  1\n%s\n'
+               '  2\nCODE\n'
+               ' 70\n1\n'
+               '  0\nSEQEND\n'
+               '  8\n%s\n')
+
+
+def _point_layers(desc, separate_layers):
+    if separate_layers is True:
+        return "%s_POINTS" % desc, "%s_Z_COORD" % desc, "%s_LABELS" % desc
+    return desc, desc, desc
+
+
+def to_dxf(feature, text_height=0.05, separate_layers=True):
+    '''Generate the DXF entities of a feature.
+
+    A point is drawn with its ID and its Z value as texts, a line string as
+    a polyline.
+
+    Raises:
+        NotImplementedError: The geometry is not a Point or a LineString.
+    '''
+
+    p_layer = feature.desc
+    geom = feature.geometry
+    height = '%01.2f' % text_height
+    if geom.geom_type == 'Point':
+        layer_point, layer_z_text, layer_id_text = _point_layers(p_layer, separate_layers)
+        x = str(geom.x)
+        y = geom.y
+        result = POINT % (layer_point, x, y, feature.id, layer_id_text, x, y, height)
+        try:
+            z = geom.z
+        except ValueError:
+            pass
+        else:
+            # add Z value as string
+            p_yz = str(float(y) - (text_height * 1.2))
+            result += Z_TEXT % (z, layer_z_text, x, p_yz, height)
+        return result
+    elif geom.geom_type == 'LineString':
+        return _polyline(p_layer, geom)
+    else:
+        raise NotImplementedError
+
+
+def _polyline(layer, geom):
+    result = [POLYLINE % layer]
+    for v in geom.coords:
+        result.append(VERTEX % (layer, v[0], v[1], v[2] if len(v) > 2 else 0))
+    result.append('  0\nSEQEND\n')
+    return ''.join(result)
+
+
+def _lwpolyline(layer, geom):
+    coords = geom.coords
+    result = [LWPOLYLINE % (layer, len(coords))]
+    for v in coords:
+        result.append(LWVERTEX % (v[0], v[1]))
+    return ''.join(result)
+
+
+def table_to_dxf(table, text_height=0.05, separate_layers=True):
+    '''Generate the DXF entities of the points of a PointTable.'''
+
+    height = '%01.2f' % text_height
+    offset = text_height * 1.2
+    layers = {}
+    for pid, x, y, z, text in zip(table.id.tolist(), table.x.tolist(),
+                                  table.y.tolist(), table.z.tolist(), table.desc):
+        try:
+            layer_point, layer_z_text, layer_id_text = layers[text]
+        except KeyError:
+            layer_point, layer_z_text, layer_id_text = layers[text] = \
+                _point_layers(text, separate_layers)
+        x = str(x)
+        result = POINT % (layer_point, x, y, pid, layer_id_text, x, y, height)
+        if z == z:
+            result += Z_TEXT % (z, layer_z_text, x, str(y - offset), height)
+        yield result
+
+
+def to_compact_dxf(feature, text_height=0.05, precision=4):
+    '''Generate the DXF entities of a feature in compact mode.
+
+    A point is an insert of the point block, on the layer of its code, with
+    its ID, its Z value and its code as attributes. Coordinates are rounded
+    to precision decimals. A line string is a lightweight polyline, in 2D.
+
+    Raises:
+        NotImplementedError: The geometry is not a Point or a LineString.
+    '''
+
+    layer = feature.desc
+    geom = feature.geometry
+    height = '%01.2f' % text_height
+    if geom.geom_type == 'Point':
+        x = '%.*f' % (precision, float(geom.x))
+        y = float(geom.y)
+        y_text = '%.*f' % (precision, y)
+        result = INSERT % (layer, x, y_text, layer, x, y_text, height, feature.id)
+        try:
+            z = geom.z
+        except ValueError:
+            pass
+        else:
+            result += Z_ATTRIB % (layer, x, '%.*f' % (precision, y - text_height * 1.2),
+                                  height, '%.*f' % (precision, float(z)))
+        return result + CODE_ATTRIB % (layer, x, y_text, height, layer, layer)
+    elif geom.geom_type == 'LineString':
+        return _lwpolyline(layer, geom)
+    else:
+        raise NotImplementedError
+
+
+def table_to_compact_dxf(table, text_height=0.05, precision=4):
+    '''Generate the DXF entities of the points of a PointTable in compact
+    mode.'''
+
+    height = '%01.2f' % text_height
+    offset = text_height * 1.2
+    for pid, x, y, z, layer in zip(table.id.tolist(), table.x.tolist(),
+                                   table.y.tolist(), table.z.tolist(), table.desc):
+        x = '%.*f' % (precision, x)
+        y_text = '%.*f' % (precision, y)
+        result = INSERT % (layer, x, y_text, layer, x, y_text, height, pid)
+        if z == z:
+            result += Z_ATTRIB % (layer, x, '%.*f' % (precision, y - offset),
+                                  height, '%.*f' % (precision, z))
+        yield result + CODE_ATTRIB % (layer, x, y_text, height, layer, layer)
 
 
 class OutputFormat(Builder):
@@ -35,132 +321,87 @@ class OutputFormat(Builder):
     tuple) for each point. The default order is PID, x, y, z, TEXT.
 
     This is consistent with our current standard.
+
+    The drawing is written entity by entity with :meth:`write_to`. The
+    layers are read in a first pass over the data, so ``data`` must be
+    iterable twice, like a list or a PointTable.
+
+    In compact mode, the drawing is an R2000 one. Each point is a single
+    insert of a block, with its ID, its Z value and its code as attributes,
+    on one layer by code, line strings are lightweight polylines, and
+    coordinates are rounded to ``precision`` decimals. ``separate_layers``
+    is not used.
     """
 
-    def __init__(self, data, separate_layers=True):
+    def __init__(self, data, separate_layers=True, compact=False, precision=4):
 
         self.data = data
         self.separate_layers = separate_layers
+        self.compact = compact
+        self.precision = precision
         self.text_height = 0.05
 
-    def process(self):
-        '''Process the input data and return a string as output.
-
-        This is because we want to keep the generation of output
-        separated from saving it to disk.'''
-
-        result = ''
-
-        # header
-        result += '999\nDXF created from Total Open Station\n'
-        result += '  0\nSECTION\n'
-        result += '  2\nHEADER\n'
-        result += '  9\n$ACADVER\n'
-        result += '  1\nAC1009\n' # R11
-        result += '  0\nENDSEC\n'
-
-        # extract layer list
-        codes = set([p.desc for p in self.data])
-        codes = [c.replace('.','_') for c in codes]
-        layers = dict(enumerate(codes))
-        colors = dict((i, j % 255) for i, j in zip(list(layers.values()), list(layers.keys())))
-
-        # layer table
-        result += '  0\nSECTION\n  2\nTABLES\n  0\nTABLE\n  2\nLAYER\n'
-        for l in codes:
-            if self.separate_layers is True:
-                result += '  0\nLAYER\n'           # start definition of LAYER
-                result += '  5\n10\n'              # LAYER handle
-                result += '  2\n%s_POINTS\n' % l    # LAYER name
-                result += ' 70\n0\n'              # LAYER is not frozen
-                result += ' 62\n%s\n' % (int(colors[l]) + 1) # LAYER color
-                result += '  6\nCONTINUOUS\n'      # LAYER linetype
-
-                result += '  0\nLAYER\n'           # same as above
-                result += '  5\n10\n'
-                result += '  2\n%s_Z_COORDS\n' % l
-                result += ' 70\n0\n'
-                result += ' 62\n%s\n' % (int(colors[l]) + 1)
-                result += '  6\nCONTINUOUS\n'
-
-                result += '  0\nLAYER\n'           # ditto
-                result += '  5\n10\n'
-                result += '  2\n%s_LABELS\n' % l
-                result += ' 70\n0\n'
-                result += ' 62\n%s\n' % (int(colors[l]) + 1)
-                result += '  6\nCONTINUOUS\n'
-            else:
-                result += '  0\nLAYER\n'           # ditto
-                result += '  5\n10\n'
-                result += '  2\n%s\n' % l          # LAYER name w/o any suffix
-                result += ' 70\n0\n'
-                result += ' 62\n%s\n' % (int(colors[l]) + 1)
-                result += '  6\nCONTINUOUS\n'
-
-        result += '  0\nENDTAB\n  0\nENDSEC\n'
-
-        # drawing entities
-        result += '  0\nSECTION\n  2\nENTITIES\n'
-
-        for p in self.data:
-            p_layer = p.desc
-            geom = p.geometry
-            if geom.geom_type == 'Point':
-                if self.separate_layers is True:
-                    layer_point = "%s_POINTS" % p_layer
-                    layer_z_text = "%s_Z_COORD" % p_layer
-                    layer_id_text = "%s_LABELS" % p_layer
+    def layers(self):
+        '''Return the layer names, from the descriptions of the features.'''
+
+        if isinstance(self.data, PointTable):
+            codes = set(self.data.desc.labels)
+        else:
+            codes = set([p.desc for p in self.data])
+        return [c.replace('.','_') for c in codes]
+
+    def write_to(self, f):
+        '''Write the drawing to the text or binary file object f.'''
+
+        with text_stream(f) as f:
+            write = f.write
+            write(COMPACT_HEADER if self.compact else HEADER)
+
+            # layer table
+            codes = self.layers()
+            layers = dict(enumerate(codes))
+            colors = dict((i, j % 255) for i, j in zip(list(layers.values()), list(layers.keys())))
+            write('  0\nSECTION\n  2\nTABLES\n  0\nTABLE\n  2\nLAYER\n')
+            for l in codes:
+                color = int(colors[l]) + 1
+                if self.compact:
+                    write(LAYER % (l, color))
+                elif self.separate_layers is True:
+                    write(LAYER % ('%s_POINTS' % l, color))
+                    write(LAYER % ('%s_Z_COORDS' % l, color))
+                    write(LAYER % ('%s_LABELS' % l, color))
                 else:
-                    layer_point = layer_z_text = layer_id_text = p_layer
-                p_yz = str(float(geom.y) - (self.text_height * 1.2))
-
-                # add point
-                result += '  0\nPOINT\n'
-                result += '  8\n%s\n' % layer_point
-                result += ' 10\n%s\n' % geom.x
-                result += ' 20\n%s\n' % geom.y
-
-                # add ID number
-                result += '  0\nTEXT\n'
-                result += '  1\n%s\n' % p.id
-                result += '  8\n%s\n' % layer_id_text
-                result += ' 10\n%s\n' % geom.x
-                result += ' 20\n%s\n' % geom.y
-                result += ' 40\n%01.2f\n' % self.text_height
-                result += ' 62\n256\n'
-
-                try:
-                    geom.z
-                except ValueError:
-                    pass
+                    write(LAYER % (l, color))    # LAYER name w/o any suffix
+            write('  0\nENDTAB\n  0\nENDSEC\n')
+
+            if self.compact:
+                write(BLOCKS % {'name': BLOCK_NAME,
+                                'height': '%01.2f' % self.text_height,
+                                'offset': str(-self.text_height * 1.2)})
+
+            # drawing entities
+            write('  0\nSECTION\n  2\nENTITIES\n')
+            if isinstance(self.data, PointTable):
+                if self.compact:
+                    entities = table_to_compact_dxf(self.data, self.text_height, self.precision)
                 else:
-                    # add Z value as string
-                    result += '  0\nTEXT\n'
-                    result += '  1\n%s\n' % geom.z
-                    result += '  8\n%s\n' % layer_z_text
-                    result += ' 10\n%s\n' % geom.x
-                    result += ' 20\n%s\n' % p_yz
-                    result += ' 40\n%01.2f\n' % self.text_height
-                    result += ' 62\n256\n'
-
-            elif geom.geom_type == 'LineString':
-                result += '  0\nPOLYLINE\n'
-                result += '  8\n%s\n' % p_layer
-                result += '  6\nCONTINUOUS\n'
-                result += ' 62\n256\n'
-                result += ' 66\n1\n'
-                result += ' 70\n0\n'
-                for v in geom.coords:
-                    result += '  0\nVERTEX\n'
-                    result += '  8\n%s\n' % p_layer
-                    result += ' 10\n%s\n' % v[0] # x
-                    result += ' 20\n%s\n' % v[1] # y
-                    try:
-                        result += ' 30\n%s\n' % v[2] # z
-                    except IndexError:
-                        result += ' 30\n0\n'
-                result += '  0\nSEQEND\n'
+                    entities = table_to_dxf(self.data, self.text_height, self.separate_layers)
+                f.writelines(entities)
+            elif self.compact:
+                for p in self.data:
+                    write(to_compact_dxf(p, self.text_height, self.precision))
             else:
-                raise NotImplementedError
-        result += '  0\nENDSEC\n  0\nEOF\n'
-        return result
+                for p in self.data:
+                    write(to_dxf(p, self.text_height, self.separate_layers))
+            write('  0\nENDSEC\n  0\nEOF\n')
+
+
+class CompactOutputFormat(OutputFormat):
+
+    """
+    Exports points data in compact AutoCAD DXF format, see
+    :class:`OutputFormat`.
+    """
+
+    def __init__(self, data):
+        super().__init__(data, compact=True)
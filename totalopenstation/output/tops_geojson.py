@@ -20,9 +20,7 @@
 
 import json
 
-from totalopenstation.formats import FeatureCollection
-
-from . import Builder
+from . import Builder, text_stream
 
 
 class OutputFormat(Builder):
@@ -30,8 +28,27 @@ class OutputFormat(Builder):
 
     def __init__(self, data):
 
-        self.feature_collection = FeatureCollection(data)
-
-    def process(self):
-
-        return json.dumps(self.feature_collection.__geo_interface__)
+        # data may also be any other iterable, like a PointTable
+        self.data = data
+
+    def write_to(self, f):
+        '''Write the feature collection to f one feature at a time.
+
+        The bounding box of the collection is only known once all the
+        features are written, it is written after them.'''
+
+        bounds = None
+        with text_stream(f) as f:
+            f.write('{"type": "FeatureCollection", "features": [')
+            separator = ''
+            for feature in self.data:
+                minx, miny, maxx, maxy = feature.geometry.bounds[:4]
+                if bounds is None:
+                    bounds = [minx, miny, maxx, maxy]
+                else:
+                    bounds = [min(minx, bounds[0]), min(miny, bounds[1]),
+                              max(maxx, bounds[2]), max(maxy, bounds[3])]
+                f.write(separator)
+                f.write(json.dumps(feature.__geo_interface__))
+                separator = ', '
+            f.write('], "bbox": %s}' % json.dumps(bounds))
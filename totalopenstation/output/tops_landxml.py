@@ -19,8 +19,8 @@
 # along with Total Open Station.  If not, see
 # <http://www.gnu.org/licenses/>.
 
-from totalopenstation.formats.landxml import Survey, LandXML
-from . import Builder
+from totalopenstation.formats.landxml import SurveyWriter
+from . import Builder, text_stream
 
 class OutputFormat(Builder):
 
@@ -49,21 +49,21 @@ class OutputFormat(Builder):
 
         return kwargs
 
-    def process(self):
+    def write_to(self, f):
+        """Write the LandXML document to the text or binary file object f,
+        as the features are read."""
 
-        root = Survey()
+        with text_stream(f) as f:
+            root = SurveyWriter(f)
 
-        for feature in self.data:
-            kwargs = self._get_feature(feature)
+            for feature in self.data:
+                kwargs = self._get_feature(feature)
 
-            if feature.desc == "PO":
-                root.raw_observation(**kwargs)
-            if feature.desc == "PT":
-                root.cg_point(**kwargs)
-            if feature.desc == "ST":
-                root.setup(**kwargs)
+                if feature.desc == "PO":
+                    root.raw_observation(**kwargs)
+                if feature.desc == "PT":
+                    root.cg_point(**kwargs)
+                if feature.desc == "ST":
+                    root.setup(**kwargs)
 
-        xml = LandXML()
-        xml.append(root.survey)
-
-        return xml.to_string()
+            root.close()
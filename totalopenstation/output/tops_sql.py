@@ -19,7 +19,105 @@
 # along with Total Open Station.  If not, see
 # <http://www.gnu.org/licenses/>.
 
-from . import Builder
+import struct
+from itertools import islice
+
+from totalopenstation.formats.table import PointTable
+
+from . import Builder, text_stream
+
+# The columns filled for each point
+COLUMNS = '(point_id, point_geom, point_text)'
+
+# Ways of writing the points: one INSERT statement per point, one INSERT
+# statement per batch of points, or a COPY block
+MODES = ('insert', 'values', 'copy')
+
+# EWKB type of a point, and the flags of its Z coordinate and SRID
+WKB_POINT = 1
+EWKB_Z = 0x80000000
+EWKB_SRID = 0x20000000
+
+
+def quote_identifier(name):
+    '''Return name quoted as an SQL identifier.
+
+    A schema-qualified name like ``survey.points`` is quoted part by part.'''
+
+    return '.'.join('"%s"' % part.replace('"', '""') for part in name.split('.'))
+
+
+def quote_literal(value):
+    '''Return value quoted as an SQL string literal, NULL for None.'''
+
+    if value is None:
+        return 'NULL'
+    return "'%s'" % str(value).replace("'", "''")
+
+
+def copy_text(value):
+    '''Return value escaped for the text format of COPY, \\N for None.'''
+
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _id_literal(pid):
+    if isinstance(pid, int):
+        return str(pid)
+    return quote_literal(pid)
+
+
+def _wkt(x, y, z):
+    if z is None:
+        return 'POINT ({} {})'.format(x, y)
+    return 'POINT Z ({} {} {})'.format(x, y, z)
+
+
+def _hexewkb(x, y, z, srid):
+    '''Return the hex-encoded little endian EWKB of a point.'''
+
+    if z is None:
+        wkb_type, coords = WKB_POINT, (x, y)
+    else:
+        wkb_type, coords = WKB_POINT | EWKB_Z, (x, y, z)
+    if srid is None:
+        wkb = struct.pack('<BI', 1, wkb_type)
+    else:
+        wkb = struct.pack('<BII', 1, wkb_type | EWKB_SRID, srid)
+    wkb += struct.pack('<%dd' % len(coords), *coords)
+    return wkb.hex().upper()
+
+
+def _rows(data):
+    '''Yield the id, x, y, z and text of each point of data.
+
+    z is None for 2D points.'''
+
+    if isinstance(data, PointTable):
+        for pid, x, y, z, has_z, text in zip(data.id.tolist(), data.x.tolist(),
+                                             data.y.tolist(), data.z.tolist(),
+                                             data.has_z.tolist(), data.desc):
+            yield pid, x, y, (z if has_z else None), text
+    else:
+        for point in data:
+            try:
+                z = point.geometry.z
+            except ValueError:
+                z = None
+            yield point.id, point.geometry.x, point.geometry.y, z, point.desc
+
+
+def _values(pid, x, y, z, text, srid=None):
+    '''Return the values of a point for an INSERT statement.'''
+
+    if srid is None:
+        geom = "ST_GeomFromText('%s')" % _wkt(x, y, z)
+    else:
+        geom = "ST_GeomFromText('%s',%d)" % (_wkt(x, y, z), srid)
+    return '(%s,%s,%s)' % (_id_literal(pid), geom, quote_literal(text))
 
 
 def to_sql(point, tablename):
@@ -28,15 +126,8 @@ def to_sql(point, tablename):
     At this moment the column names are fixed, but they could change in the
     future. The default names are reasonable.'''
 
-    params = {
-        'wkt': to_wkt(point),
-        'tablename': tablename,
-        'pid': point.id,
-        'text': point.desc}
-    sql_string = "INSERT INTO %(tablename)s" % params
-    sql_string += "(point_id, point_geom, point_text) VALUES"
-    sql_string += "(%(pid)s,GeomFromText('%(wkt)s'),'%(text)s');\n" % params
-    return sql_string
+    row = next(_rows([point]))
+    return 'INSERT INTO %s%s VALUES%s;\n' % (quote_identifier(tablename), COLUMNS, _values(*row))
 
 
 def to_wkt(point):
@@ -56,19 +147,104 @@ class OutputFormat(Builder):
     """
     Exports points data in SQL format suitable for use with PostGIS & friends.
 
-    http://postgis.refractions.net/documentation/manual-1.3/ch04.html#id2986280
+    http://postgis.net/docs/manual-2.5/using_postgis_dbmanagement.html#loading_geometry_data
     has an example of loading an SQL file into a PostgreSQL database.
 
-    ``data`` must be an iterable containing Feature objects.
+    ``data`` must be an iterable containing Feature objects or a PointTable.
+
+    The points are written, in a single transaction, with one of the
+    ``MODES``:
+
+    - ``insert``: one INSERT statement per point
+    - ``values``: one INSERT statement per ``batch_size`` points
+    - ``copy``: a COPY block, the fastest way to load many points with psql;
+      geometries are written as EWKT, or as hex-encoded EWKB if ``hexewkb``
+
+    Args:
+        tablename (str): The name of the table, schema-qualified or not.
+        mode (str): One of ``MODES``.
+        batch_size (int): The number of points of each INSERT statement in
+            ``values`` mode.
+        srid (int): The spatial reference of the coordinates, if any.
+        hexewkb (bool): Write COPY geometries as hex-encoded EWKB.
+        create_table (bool): Create the table before loading the points and
+            a GiST index on the geometries after.
     """
 
-    def __init__(self, data, tablename='topsdata'):
+    def __init__(self, data, tablename='topsdata', mode='insert', batch_size=1000,
+                 srid=None, hexewkb=False, create_table=False):
+        if mode not in MODES:
+            raise ValueError('Unknown SQL mode: %s' % mode)
         self.data = data
         self.tablename = tablename
+        self.mode = mode
+        self.batch_size = batch_size
+        self.srid = srid
+        self.hexewkb = hexewkb
+        self.create_table = create_table
+
+    def _insert(self, table):
+        srid = self.srid
+        sql_string = 'INSERT INTO %s%s VALUES%%s;\n' % (table, COLUMNS)
+        for row in _rows(self.data):
+            yield sql_string % _values(*row, srid=srid)
 
-    def process(self):
-        lines = [to_sql(e, self.tablename) for e in self.data]
-        lines.insert(0, 'BEGIN;\n')
-        lines.append('COMMIT;\n')
-        output = "".join(lines)
-        return output
+    def _batches(self, table):
+        srid = self.srid
+        sql_string = 'INSERT INTO %s%s VALUES\n%%s;\n' % (table, COLUMNS)
+        values = (_values(*row, srid=srid) for row in _rows(self.data))
+        while True:
+            batch = list(islice(values, self.batch_size))
+            if not batch:
+                break
+            yield sql_string % ',\n'.join(batch)
+
+    def _copy(self, table):
+        srid = self.srid
+        yield 'COPY %s %s FROM STDIN;\n' % (table, COLUMNS)
+        for pid, x, y, z, text in _rows(self.data):
+            if self.hexewkb:
+                geom = _hexewkb(x, y, z, srid)
+            elif srid is None:
+                geom = _wkt(x, y, z)
+            else:
+                geom = 'SRID=%d;%s' % (srid, _wkt(x, y, z))
+            yield '%s\t%s\t%s\n' % (copy_text(pid), geom, copy_text(text))
+        yield '\\.\n'
+
+    def _script(self):
+        '''Generate the statements of the SQL script.'''
+
+        table = quote_identifier(self.tablename)
+        yield 'BEGIN;\n'
+        if self.create_table:
+            if self.srid is None:
+                geometry = 'geometry'
+            else:
+                geometry = 'geometry(Geometry,%d)' % self.srid
+            yield ('CREATE TABLE %s (point_id text, point_geom %s, point_text text);\n'
+                   % (table, geometry))
+        statements = {'insert': self._insert,
+                      'values': self._batches,
+                      'copy': self._copy}[self.mode]
+        yield from statements(table)
+        if self.create_table:
+            index = quote_identifier(self.tablename.split('.')[-1] + '_point_geom_idx')
+            yield 'CREATE INDEX %s ON %s USING GIST (point_geom);\n' % (index, table)
+        yield 'COMMIT;\n'
+
+    def write_to(self, f):
+        '''Write the SQL script to the text or binary file object f.'''
+
+        with text_stream(f) as f:
+            f.writelines(self._script())
+
+
+class CopyOutputFormat(OutputFormat):
+
+    """
+    Exports points data as a PostgreSQL COPY block, see :class:`OutputFormat`.
+    """
+
+    def __init__(self, data, tablename='topsdata'):
+        super().__init__(data, tablename, mode='copy')
@@ -20,7 +20,9 @@
 # along with Total Open Station.  If not, see
 # <http://www.gnu.org/licenses/>.
 
-from . import Builder
+from totalopenstation.formats.table import PointTable
+
+from . import Builder, text_stream
 
 
 def to_txt(d):
@@ -30,18 +32,33 @@ def to_txt(d):
         string = "{geom.x} {geom.y}\n".format(geom=d.geometry)
     return string
 
+
+def table_to_txt(table):
+    '''Generate TXT lines from the columns of a PointTable.'''
+
+    for x, y, z, has_z in zip(table.x.tolist(), table.y.tolist(),
+                              table.z.tolist(), table.has_z.tolist()):
+        if has_z:
+            yield "{} {} {}\n".format(x, y, z)
+        else:
+            yield "{} {}\n".format(x, y)
+
+
 class OutputFormat(Builder):
 
     """
     Exports points data in TXT (space-separated) format line by line.
 
-    ``data`` should be an iterable of Feature objects.
+    ``data`` should be an iterable of Feature objects or a PointTable.
     """
 
     def __init__(self, data):
         self.data = data
 
-    def process(self):
-        lines = [to_txt(e) for e in self.data]
-        output = "".join(lines)
-        return output
+    def write_to(self, f):
+        if isinstance(self.data, PointTable):
+            lines = table_to_txt(self.data)
+        else:
+            lines = (to_txt(e) for e in self.data)
+        with text_stream(f) as f:
+            f.writelines(lines)
@@ -1,4 +1,6 @@
 import importlib
+import io
+import re
 
 import pytest
 
@@ -22,3 +24,17 @@ class BaseTestOutput:
         mod, cls, name = tup
         outputclass = getattr(importlib.import_module('totalopenstation.output.' + mod), cls)
         assert outputclass(self.fp.points).process()
+
+    @pytest.mark.parametrize(
+        'output_format', [ of for of in BUILTIN_OUTPUT_FORMATS ]
+    )
+    def test_write_to(self, output_format, setup):
+        mod, cls, name = BUILTIN_OUTPUT_FORMATS[output_format]
+        outputclass = getattr(importlib.import_module('totalopenstation.output.' + mod), cls)
+        text, binary = io.StringIO(), io.BytesIO()
+        outputclass(self.fp.points).write_to(text)
+        outputclass(self.fp.points).write_to(binary)
+        # the date and time of LandXML documents
+        strip = lambda output: re.sub(r'\d{4}-\d\d-\d\d|\d\d:\d\d:\d\d', '', output)
+        assert strip(binary.getvalue().decode('utf-8')) == strip(text.getvalue())
+        assert strip(text.getvalue()) == strip(outputclass(self.fp.points).process())
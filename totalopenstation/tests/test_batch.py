@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from totalopenstation.formats import Feature, LineString, Point
+from totalopenstation.formats.leica_gsi import FormatParser
+from totalopenstation.utils.batch import (Stream, convert_files, drop_z, find_files, output_path,
+                                          output_paths, streams)
+
+GSI_DIR = 'sample_data/leica_gsi'
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        for name in os.listdir(GSI_DIR):
+            shutil.copy(os.path.join(GSI_DIR, name), self.dir)
+        with open(os.path.join(self.dir, 'bad.gsi'), 'wb') as f:
+            f.write(b'\xff\xfe\x00\x81')
+        self.files = find_files([self.dir])
+
+    def test_find_files(self):
+        os.mkdir(os.path.join(self.dir, 'sub'))
+        self.assertEqual([os.path.basename(f) for f in self.files],
+                         ['bad.gsi', 'leica_gsi16_gurob.gsi', 'leica_gsi8_ertola.gsi'])
+        pattern = os.path.join(self.dir, '*8*.gsi')
+        self.assertEqual(find_files([pattern, self.dir + '/bad.gsi']),
+                         [self.files[0], self.files[2]])
+
+    def test_output_path(self):
+        self.assertEqual(output_path('a/b.gsi', 'landxml'), os.path.join('a', 'b.xml'))
+        self.assertEqual(output_path('a/b.gsi', 'csv', 'out'), os.path.join('out', 'b.csv'))
+        self.assertEqual(output_path('a/b.gsi', 'csv', keep_extension=True), os.path.join('a', 'b.gsi.csv'))
+
+    def test_output_paths(self):
+        paths = output_paths(['a/b.gsi', 'a/b.raw', 'c/b.gsi', 'a/c.gsi'], 'csv', 'out')
+        self.assertEqual([outfile for infile, outfile, error in paths],
+                         [os.path.join('out', name) for name in ('b.gsi.csv', 'b.raw.csv', 'b.gsi.csv', 'c.csv')])
+        self.assertEqual([error is None for infile, outfile, error in paths], [True, True, False, True])
+        self.assertIn('a/b.gsi', paths[2][2])
+
+    def test_collision(self):
+        raw = os.path.join(self.dir, 'leica_gsi8_ertola.raw')
+        shutil.copy(self.files[2], raw)
+        for jobs in (1, 2):
+            results = list(convert_files([self.files[2], raw], 'leica_gsi', 'csv',
+                                         overwrite=True, jobs=jobs))
+            self.assertEqual([r.status for r in results], ['ok', 'ok'])
+            self.assertEqual([os.path.basename(r.outfile) for r in results],
+                             ['leica_gsi8_ertola.gsi.csv', 'leica_gsi8_ertola.raw.csv'])
+
+    def test_drop_z(self):
+        features = [Feature(Point(1, 2, 3), desc='PT', id=1),
+                    Feature(LineString([(1, 2, 3), (4, 5, 6)]), desc='LINE', id=2)]
+        drop_z(features)
+        self.assertEqual([f.geometry.wkt for f in features],
+                         ['POINT (1.0 2.0)', 'LINESTRING (1.0 2.0, 4.0 5.0)'])
+
+    def test_stream(self):
+        parser = FormatParser(self.files[2])
+        stream = Stream(parser)
+        self.assertEqual([f.id for f in stream], [f.id for f in parser.points])
+        self.assertEqual(list(stream), list(stream))
+        self.assertEqual(stream.count, len(parser.points))
+        self.assertIsNone(parser._records)
+        self.assertTrue(streams(parser))
+        self.assertFalse(streams(parser, xy_only=True))
+        self.assertFalse(streams(parser, cache=True))
+        with open(self.files[2]) as f:
+            self.assertFalse(streams(FormatParser(iter(f.readlines()))))
+
+    def check(self, jobs):
+
+        results = list(convert_files(self.files, 'leica_gsi', 'csv', jobs=jobs))
+        self.assertEqual([r.infile for r in results], self.files)
+        self.assertEqual([r.status for r in results], ['failed', 'ok', 'ok'])
+        self.assertIn('UnicodeDecodeError', results[0].error)
+        self.assertFalse(os.path.exists(results[0].outfile))
+        for result in results[1:]:
+            self.assertGreater(result.count, 0)
+            self.assertTrue(os.path.exists(result.outfile))
+        results = list(convert_files(self.files[1:], 'leica_gsi', 'csv', jobs=jobs))
+        self.assertEqual([r.status for r in results], ['skipped', 'skipped'])
+
+    def test_sequential(self):
+        self.check(1)
+
+    def test_jobs(self):
+        self.check(2)
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            list(convert_files(self.files, 'leica_gsi', 'nope', jobs=2))
+
+    def test_auto(self):
+        results = list(convert_files(self.files, 'auto', 'csv'))
+        self.assertEqual([r.status for r in results], ['failed', 'ok', 'ok'])
+        self.assertIn('could not be guessed', results[0].error)
+        self.assertEqual(results[1].informat, 'leica_gsi')
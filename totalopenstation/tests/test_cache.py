@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from totalopenstation.formats.carlson_rw5 import FormatParser as RW5Parser
+from totalopenstation.formats.leica_gsi import FormatParser as GSIParser
+from totalopenstation.utils.batch import convert_files
+from totalopenstation.utils.cache import ParseCache, digest_file, digest_text
+
+GSI_FILE = 'sample_data/leica_gsi/leica_gsi8_ertola.gsi'
+RW5_FILE = 'sample_data/carlson_rw5/Leica1200.rw5'
+
+
+def features(parsed):
+    return [(f.geometry.wkt, f.id, dict(f.properties)) for f in parsed]
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.cache = ParseCache(os.path.join(self.dir, 'cache'))
+
+    def test_round_trip(self):
+        for parser_class, path in ((GSIParser, GSI_FILE), (RW5Parser, RW5_FILE)):
+            for raw in (False, True):
+                parser = parser_class(open(path).read())
+                parsed = parser.raw_line if raw else parser.points
+                key = self.cache.key(digest_file(path), 'format', parser_class, raw)
+                self.assertIsNone(self.cache.load(key))
+                self.cache.store(key, parsed)
+                self.assertEqual(features(self.cache.load(key)), features(parsed))
+
+    def test_key(self):
+        digest = digest_file(GSI_FILE)
+        with open(GSI_FILE, 'rb') as f:
+            self.assertEqual(digest_text(f.read().decode()), digest)
+        keys = {self.cache.key(digest, 'leica_gsi', GSIParser),
+                self.cache.key(digest, 'leica_gsi', GSIParser, raw=True),
+                self.cache.key(digest, 'other', GSIParser),
+                self.cache.key(digest, 'leica_gsi', RW5Parser),
+                self.cache.key(digest_text(''), 'leica_gsi', GSIParser)}
+        self.assertEqual(len(keys), 5)
+
+    def test_parse(self):
+        calls = []
+
+        def parse():
+            calls.append(1)
+            return GSIParser(open(GSI_FILE).read()).points
+
+        digest = digest_file(GSI_FILE)
+        first = self.cache.parse(GSIParser, 'leica_gsi', digest, parse)
+        second = self.cache.parse(GSIParser, 'leica_gsi', digest, parse)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(features(first), features(second))
+
+    def test_evict(self):
+        parsed = GSIParser(open(GSI_FILE).read()).points
+        self.cache.store('a', parsed)
+        size = os.path.getsize(self.cache._file('a'))
+        self.cache.max_size = size * 2
+        self.cache.store('b', parsed)
+        # a is used again, b is now the least recently used
+        past = time.time() - 10
+        os.utime(self.cache._file('b'), (past, past))
+        self.assertIsNotNone(self.cache.load('a'))
+        self.cache.store('c', parsed)
+        self.assertEqual(sorted(os.listdir(self.cache.path)),
+                         ['a.features', 'c.features'])
+
+    def test_damaged(self):
+        os.makedirs(self.cache.path)
+        with open(self.cache._file('x'), 'wb') as f:
+            f.write(b'not a cache file')
+        self.assertIsNone(self.cache.load('x'))
+        self.assertFalse(os.path.exists(self.cache._file('x')))
+
+    def test_unusable(self):
+        # the cache directory is below a file
+        with open(os.path.join(self.dir, 'file'), 'w'):
+            pass
+        cache = ParseCache(os.path.join(self.dir, 'file', 'cache'))
+        digest = digest_file(GSI_FILE)
+        parse = lambda: GSIParser(open(GSI_FILE).read()).points
+        with self.assertLogs('totalopenstation.utils.cache', 'WARNING'):
+            parsed = cache.parse(GSIParser, 'leica_gsi', digest, parse)
+        self.assertEqual(features(parsed), features(parse()))
+        cache.evict()
+
+    def test_convert_files(self):
+        cache_dir = os.path.join(self.dir, 'cache')
+        outputs = []
+        for i in range(2):
+            outdir = os.path.join(self.dir, str(i))
+            os.mkdir(outdir)
+            result, = convert_files([GSI_FILE], 'leica_gsi', 'csv', outdir=outdir,
+                                    cache_dir=cache_dir)
+            self.assertEqual(result.status, 'ok')
+            with open(result.outfile) as f:
+                outputs.append(f.read())
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertEqual(outputs[0], outputs[1])
@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+
+from totalopenstation.formats import conversion
+from totalopenstation.formats.conversion import (ANGLE_UNITS, convert, dms_to_deg,
+                                                 gon_to_dms, gon_to_rad, mil_to_deg,
+                                                 rad_to_gon, to_rad, vertical_to_zenithal)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestConvert(unittest.TestCase):
+
+    def test_scalar(self):
+        self.assertAlmostEqual(convert(35.4510, 'dms', 'deg'), dms_to_deg(35.4510))
+        self.assertAlmostEqual(convert(123.456, 'gon', 'rad'), gon_to_rad(123.456))
+        self.assertAlmostEqual(convert(1.2, 'rad', 'gon'), rad_to_gon(1.2))
+        self.assertAlmostEqual(convert(1600, 'mil', 'deg'), mil_to_deg(1600))
+        self.assertAlmostEqual(convert(100, 'grads', 'deg'), 90.0)
+        self.assertIsInstance(convert(1, 'deg', 'gon'), float)
+
+    def test_dms(self):
+        self.assertAlmostEqual(convert(0.995, 'deg', 'dms'), 0.5942)
+        self.assertAlmostEqual(convert(-35.4510, 'dms', 'deg'), -dms_to_deg(35.4510))
+        self.assertAlmostEqual(convert(100, 'gon', 'dms'), gon_to_dms(100))
+        for unit in ANGLE_UNITS:
+            angle = convert(123.4521, 'dms', unit)
+            self.assertAlmostEqual(convert(angle, unit, 'dms'), 123.4521)
+
+    def test_sequence(self):
+        angles = [0.0, 35.4510, 359.5959, -61.5811]
+        result = convert(angles, 'dms', 'gon')
+        self.assertEqual(len(result), len(angles))
+        for angle, value in zip(angles, result):
+            self.assertAlmostEqual(value, convert(angle, 'dms', 'gon'))
+
+    @unittest.skipIf(np is None, 'NumPy is not installed')
+    def test_array(self):
+        angles = np.linspace(0, 400, 1001)
+        result = convert(angles, 'gon', 'dms')
+        self.assertIsInstance(result, np.ndarray)
+        np.testing.assert_allclose(convert(result, 'dms', 'gon'), angles, atol=1e-9)
+
+    def test_without_numpy(self):
+        with mock.patch.object(conversion, 'np', None):
+            result = convert((35.4510, 100), 'dms', 'deg')
+        self.assertIsInstance(result, list)
+        self.assertAlmostEqual(result[0], dms_to_deg(35.4510))
+
+    def test_zenithal(self):
+        self.assertAlmostEqual(vertical_to_zenithal(89.1807, 'dms'), 0.4153)
+        self.assertAlmostEqual(vertical_to_zenithal(91.4848, 'dms'), -1.4848)
+        self.assertAlmostEqual(vertical_to_zenithal(10, 'grads'), 90)
+        self.assertAlmostEqual(vertical_to_zenithal(10, 'deg'), 80)
+
+    def test_unknown_unit(self):
+        with self.assertRaises(ValueError):
+            convert(1, 'deg', 'turn')
+        with self.assertRaises(ValueError):
+            to_rad(1, 'turn')
@@ -1,7 +1,8 @@
+import io
 import unittest
 
 from totalopenstation.formats import Feature, LineString, Point
-from totalopenstation.output.tops_dxf import OutputFormat
+from totalopenstation.output.tops_dxf import CompactOutputFormat, OutputFormat
 
 class TestCSVOutput(unittest.TestCase):
 
@@ -27,3 +28,62 @@ class TestCSVOutput(unittest.TestCase):
         self.assertEqual(self.output.splitlines()[103], 'TESTPOINT2')
         self.assertEqual(self.output.splitlines()[139], 'TESTLINE')
         self.assertEqual(self.output.splitlines()[183], 'EOF')
+
+    def test_write_to(self):
+        f = io.StringIO()
+        OutputFormat(self.data).write_to(f)
+        self.assertEqual(f.getvalue(), OutputFormat(self.data).process())
+
+    def test_layers(self):
+        self.data.append(Feature(Point(1.0, 2.0), desc='TEST.2D', id=4))
+        output = OutputFormat(self.data).process().splitlines()
+        self.assertEqual(sorted(OutputFormat(self.data).layers()),
+                         ['TESTLINE', 'TESTPOINT', 'TESTPOINT2', 'TEST_2D'])
+        self.assertIn('TEST_2D_Z_COORDS', output)
+        # a 2D point has no Z text
+        self.assertEqual(output[-26:-4], [
+            '  0', 'POINT', '  8', 'TEST.2D_POINTS', ' 10', '1.0', ' 20', '2.0',
+            '  0', 'TEXT', '  1', '4', '  8', 'TEST.2D_LABELS', ' 10', '1.0', ' 20', '2.0',
+            ' 40', '0.05', ' 62', '256'])
+        self.assertEqual(output[-4:], ['  0', 'ENDSEC', '  0', 'EOF'])
+
+    def test_compact(self):
+        self.data.append(Feature(Point(1.0, 2.0), desc='TESTPOINT', id=4))
+        output = CompactOutputFormat(self.data).process().splitlines()
+        pairs = list(zip(output[::2], output[1::2]))
+        self.assertEqual(len(output) % 2, 0)
+        self.assertIn(('  1', 'AC1015'), pairs)
+        entities = [v for c, v in pairs if c == '  0']
+        self.assertEqual(entities.count('INSERT'), 3)
+        self.assertNotIn('POLYLINE', entities)
+        self.assertIn(('  2', 'BLOCKS'), pairs)
+        self.assertEqual([v for c, v in pairs if c == '  2'].count('CODE'), 4)
+        # one layer by code
+        names = [v for c, v in pairs if c == '  2']
+        layers = names[names.index('LAYER') + 1:names.index('BLOCKS')]
+        self.assertEqual(sorted(layers), ['TESTLINE', 'TESTPOINT', 'TESTPOINT2'])
+        start = pairs.index(('  0', 'INSERT'))
+        self.assertEqual(pairs[start:start + 31], [
+            ('  0', 'INSERT'), ('  8', 'TESTPOINT'), (' 66', '1'), ('  2', 'TOPS_POINT'),
+            (' 10', '12.8000'), (' 20', '76.3000'),
+            ('  0', 'ATTRIB'), ('  8', 'TESTPOINT'), (' 10', '12.8000'), (' 20', '76.3000'),
+            (' 40', '0.05'), ('  1', '1'), ('  2', 'ID'), (' 70', '0'),
+            ('  0', 'ATTRIB'), ('  8', 'TESTPOINT'), (' 10', '12.8000'), (' 20', '76.2400'),
+            (' 40', '0.05'), ('  1', '56.2000'), ('  2', 'Z'), (' 70', '0'),
+            ('  0', 'ATTRIB'), ('  8', 'TESTPOINT'), (' 10', '12.8000'), (' 20', '76.3000'),
+            (' 40', '0.05'), ('  1', 'TESTPOINT'), ('  2', 'CODE'), (' 70', '1'),
+            ('  0', 'SEQEND')])
+        # a lightweight polyline, in 2D
+        start = pairs.index(('  0', 'LWPOLYLINE'))
+        self.assertEqual(pairs[start:start + 12], [
+            ('  0', 'LWPOLYLINE'), ('100', 'AcDbEntity'), ('  8', 'TESTLINE'),
+            ('100', 'AcDbPolyline'), (' 90', '3'), (' 70', '0'),
+            (' 10', '17.8'), (' 20', '26.0'), (' 10', '18.8'), (' 20', '26.6'),
+            (' 10', '24.8'), (' 20', '26.9')])
+        # a 2D point has no Z attribute
+        self.assertEqual(pairs[-20:-2], [
+            ('  0', 'ATTRIB'), ('  8', 'TESTPOINT'), (' 10', '1.0000'), (' 20', '2.0000'),
+            (' 40', '0.05'), ('  1', '4'), ('  2', 'ID'), (' 70', '0'),
+            ('  0', 'ATTRIB'), ('  8', 'TESTPOINT'), (' 10', '1.0000'), (' 20', '2.0000'),
+            (' 40', '0.05'), ('  1', 'TESTPOINT'), ('  2', 'CODE'), (' 70', '1'),
+            ('  0', 'SEQEND'), ('  8', 'TESTPOINT')])
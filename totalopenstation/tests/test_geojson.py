@@ -20,3 +20,11 @@ class TestGeoJSONOutput(unittest.TestCase):
         self.output = OutputFormat(self.data).process()
         ref_output = '''{"type": "FeatureCollection", "bbox": [12.8, 26.3, 56.2, 19.8], "features": [{"bbox": [12.8, 76.3, 56.2, 12.8, 76.3, 56.2], "geometry": {"type": "Point", "coordinates": [12.8, 76.3, 56.2]}, "type": "Feature", "properties": {"desc": "TEST POINT"}, "id": 1}, {"bbox": [19.8, 26.3, 46.2, 19.8, 26.3, 46.2], "geometry": {"type": "Point", "coordinates": [19.8, 26.3, 46.2]}, "type": "Feature", "properties": {"desc": "TEST POINT #2"}, "id": 2}]}'''
         self.assertEqual(json.loads(self.output), json.loads(ref_output))
+
+    def test_stream(self):
+        # features are written as they are read, in one pass
+        output = OutputFormat(feature for feature in self.data).process()
+        self.assertEqual(json.loads(output),
+                         json.loads(json.dumps(FeatureCollection(self.data).__geo_interface__)))
+        self.assertEqual(json.loads(OutputFormat([]).process()),
+                         {'type': 'FeatureCollection', 'features': [], 'bbox': None})
@@ -0,0 +1,86 @@
+import unittest
+
+from unittest import mock
+
+from totalopenstation.formats.incremental import IncrementalParser
+from totalopenstation.formats.carlson_rw5 import FormatParser as RW5Parser
+from totalopenstation.formats.leica_gsi import FormatParser as GSIParser
+from totalopenstation.formats.zeiss_rec_500 import FormatParser as Rec500Parser
+
+GSI_FILE = 'sample_data/leica_gsi/leica_gsi8_ertola.gsi'
+
+
+def features(parsed):
+    return [(f.geometry.wkt, dict(f.properties)) for f in parsed]
+
+
+class TestIncrementalParser(unittest.TestCase):
+
+    def setUp(self):
+        with open(GSI_FILE) as f:
+            self.text = f.read()
+        self.lines = self.text.splitlines()
+
+    def check(self, parser_class, text, parsed):
+        self.assertEqual(features(parsed.points), features(parser_class(text).points))
+        self.assertEqual(features(parsed.raw_line), features(parser_class(text).raw_line))
+
+    def test_update(self):
+        parsed = IncrementalParser(GSIParser, self.text)
+        self.assertTrue(parsed.resumes)
+        self.check(GSIParser, self.text, parsed)
+        # edit, insert and delete lines
+        self.lines[100] = self.lines[101]
+        self.lines.insert(300, self.lines[10])
+        del self.lines[500:502]
+        text = '\n'.join(self.lines)
+        parsed.update(text)
+        self.check(GSIParser, text, parsed)
+        self.assertEqual(parsed.update(text), (len(self.lines), len(self.lines), 0))
+
+    def test_edit_station(self):
+        parsed = IncrementalParser(GSIParser, self.text)
+        parsed.points
+        stations = parsed.stations()
+        self.assertGreater(len(stations), 2)
+        # remove a station setup, then put it back
+        lines = self.lines[:stations[1]] + self.lines[stations[1] + 1:]
+        parsed.update('\n'.join(lines))
+        self.check(GSIParser, '\n'.join(lines), parsed)
+        parsed.update(self.text)
+        self.assertEqual(parsed.stations(), stations)
+        self.check(GSIParser, self.text, parsed)
+
+    def test_dirty_segment(self):
+        parsed = IncrementalParser(GSIParser, self.text)
+        parsed.points
+        stations = parsed.stations()
+        line = stations[1] + 1
+        self.assertLess(line + 1, stations[2])
+        self.lines[line] = self.lines[line + 1]
+        with mock.patch.object(GSIParser, 'iter_points', autospec=True,
+                               side_effect=GSIParser.iter_points) as iter_points:
+            parsed.update('\n'.join(self.lines))
+            parsed.points
+        self.assertEqual(iter_points.call_count, 1)
+        self.assertEqual(len(iter_points.call_args[0][0]._records),
+                         stations[2] - stations[1])
+
+    def test_no_resume(self):
+        with open('sample_data/carlson_rw5/Leica1200.rw5') as f:
+            lines = f.read().splitlines()
+        parsed = IncrementalParser(RW5Parser, '\n'.join(lines))
+        self.assertFalse(parsed.resumes)
+        del lines[20]
+        parsed.update('\n'.join(lines))
+        self.check(RW5Parser, '\n'.join(lines), parsed)
+
+    def test_no_tokenize(self):
+        with open('sample_data/zeiss_elta_r55/zeiss_elta_r55-REC_500.tops') as f:
+            lines = f.read().splitlines()
+        parsed = IncrementalParser(Rec500Parser, '\n'.join(lines))
+        self.assertFalse(parsed.tokenizes)
+        del lines[5]
+        parsed.update('\n'.join(lines))
+        self.assertEqual(features(parsed.points),
+                         features(Rec500Parser('\n'.join(lines)).points))
@@ -1,9 +1,20 @@
+import io
+import re
 import unittest
+import xml.etree.ElementTree as xml
 
 from totalopenstation.formats import Feature, Point
-from totalopenstation.formats.landxml import FormatParser
+from totalopenstation.formats.landxml import FormatParser, LandXML, Survey, SurveyWriter, _SurveyTarget
 from totalopenstation.output.tops_landxml import OutputFormat
 
+
+class _Pipe(io.StringIO):
+    """Text which can be read only once."""
+
+    def seekable(self):
+        return False
+
+
 class TestLandXMLParser(unittest.TestCase):
 
     def setUp(self):
@@ -27,6 +38,108 @@ class TestLandXMLParser(unittest.TestCase):
         self.assertAlmostEqual(self.ls.coords[2][0], 449.72036753)
 
 
+class TestLandXMLStream(unittest.TestCase):
+
+    def setUp(self):
+        with open('sample_data/landxml.xml') as testdata:
+            self.data = testdata.read()
+        # a surface before the survey, and elements the parser does not use
+        surface = ('<Surfaces><Surface name="tin"><Definition><Pnts>'
+                   '<P id="1">1 2 3</P></Pnts></Definition></Surface></Surfaces>')
+        self.big = self.data.replace('<Survey>', surface + '<Survey><Equipment />')
+
+    def test_skipped(self):
+        target = _SurveyTarget()
+        parser = xml.XMLParser(target=target)
+        parser.feed(self.big)
+        parser.close()
+        self.assertEqual([kind for kind, element in target.elements],
+                         ['units', 'cgpoint', 'cgpoint', 'feature', 'feature',
+                          'setup', 'setup', 'group', 'group'])
+
+    def test_same(self):
+        expected = [(f.id, f.point_name, f.geometry.coords, f.properties)
+                    for f in FormatParser(self.data).raw_line]
+        for data in (self.big, io.StringIO(self.big)):
+            parsed = [(f.id, f.point_name, f.geometry.coords, f.properties)
+                      for f in FormatParser(data).raw_line]
+            self.assertEqual(parsed, expected)
+
+    def test_cgpoint_streamed(self):
+        # the Features of the CgPoints are read ahead
+        first = next(FormatParser(self.data).iter_raw())
+        self.assertEqual(first.point_name, 'STAZLIB3')
+        self.assertEqual(first.properties['attrib'], [''])
+
+    def test_cgpoint_pipe(self):
+        raw = FormatParser(_Pipe(self.data)).iter_raw()
+        first = next(raw)
+        # given before its Feature is read, filled in when it is
+        self.assertEqual(first.properties['attrib'], [])
+        second = next(raw)
+        self.assertEqual(second.point_name, 'STAZLIB4')
+        next(raw)
+        self.assertEqual(first.properties['attrib'], [''])
+        self.assertEqual(second.properties['attrib'], [''])
+
+    def test_attrib_reset(self):
+        # a point without featureRef after one with attributes
+        data = self.data.replace('<CgPoint featureRef="featureSTAZLIB4" name="STAZLIB4">',
+                                 '<CgPoint name="STAZLIB4">')
+        data = data.replace('<Property label="attrib1" value="" />',
+                            '<Property label="attrib1" value="CTRL" />', 1)
+        raw = FormatParser(data).raw_line
+        self.assertEqual(raw[0].properties['attrib'], ['CTRL'])
+        self.assertEqual(raw[1].properties['attrib'], [])
+
+    def test_document_order(self):
+        # a setup after the observations of the first one
+        start = self.data.index('\t\t<InstrumentSetup id="setup1"')
+        end = self.data.index('\t\t<ObservationGroup')
+        setup = self.data[start:end]
+        data = self.data[:start] + self.data[end:]
+        data = data.replace('\t\t<ObservationGroup id="o1">', setup + '\t\t<ObservationGroup id="o1">')
+        self.assertEqual([f.desc for f in FormatParser(data).raw_line],
+                         ['PT', 'PT', 'ST', 'PO', 'ST', 'PO', 'PO'])
+        self.assertEqual(len(FormatParser(data).points), 5)
+
+
+class TestLandXMLReferences(unittest.TestCase):
+
+    def setUp(self):
+        with open('sample_data/landxml.xml') as testdata:
+            data = testdata.read()
+        data = data.replace(
+            '<Feature name="featureSTAZLIB4">\n\t\t\t\t<Property label="attrib1" value="" />',
+            '<Feature name="featureSTAZLIB4">\n\t\t\t\t<Property label="attrib1" value="CTRL" />')
+        # the second setup is on the point of the first one
+        data = data.replace('stationName="STAZLIB4">\n\t\t\t<InstrumentPoint />',
+                            'stationName="STAZLIB4">\n\t\t\t<InstrumentPoint pntRef="STAZLIB3" />')
+        data = data.replace('<TargetPoint desc="901">515.429 442.66 -1.734</TargetPoint>',
+                            '<TargetPoint pntRef="STAZLIB4" />')
+        self.raw = FormatParser(data).raw_line
+
+    def test_feature_ref(self):
+        self.assertEqual(self.raw[0].properties['attrib'], [''])
+        self.assertEqual(self.raw[1].properties['attrib'], ['CTRL'])
+
+    def test_instrument_point(self):
+        self.assertEqual(self.raw[3].point_name, 'STAZLIB4')
+        self.assertEqual(self.raw[3].geometry.coords, self.raw[0].geometry.coords)
+
+    def test_target_point(self):
+        self.assertEqual(self.raw[5].point_name, 'STAZLIB4')
+        self.assertEqual(self.raw[5].geometry.coords, self.raw[1].geometry.coords)
+        self.assertEqual(self.raw[6].point_name, '902')
+
+    def test_missing_ref(self):
+        with open('sample_data/landxml.xml') as testdata:
+            data = testdata.read().replace('<TargetPoint desc="850">449.72 444.915 1.932</TargetPoint>',
+                                           '<TargetPoint pntRef="NONE" />')
+        with self.assertRaises(KeyError):
+            FormatParser(data).raw_line
+
+
 class TestLandXMLOutput(unittest.TestCase):
 
     def setUp(self):
@@ -71,3 +184,70 @@ class TestLandXMLOutput(unittest.TestCase):
         self.assertIn('zenithAngle="90.585"', self.output.splitlines()[16])
         self.assertIn('slopeDistance="1718.28"', self.output.splitlines()[16])
         self.assertEqual(self.output.splitlines()[17], '\t\t\t\t<TargetPoint desc="TEST POINT #3">6385.4 4201.6 943.1</TargetPoint>')
+
+
+class TestLandXMLSurvey(unittest.TestCase):
+
+    def test_order(self):
+        survey = Survey()
+        # an observation before any setup gets a setup of its own
+        survey.raw_observation(point_name='1', x=1, y=2, attrib=['a'])
+        survey.cg_point(point_name='A', x=1, y=2, z=3, attrib=['b'])
+        survey.setup(point_name='A', ih=1.5, attrib=['c'])
+        survey.cg_point(point_name='B', x=4, y=5)
+        survey.raw_observation(point_name='2', x=1, y=2, ih=1.5)
+        children = list(survey.survey)
+        self.assertEqual([child.tag for child in children],
+                         ['SurveyHeader', 'CgPoints', 'InstrumentSetup', 'InstrumentSetup',
+                          'ObservationGroup', 'ObservationGroup'])
+        self.assertEqual([child.tag for child in children[1]], ['CgPoint', 'CgPoint', 'Feature'])
+        self.assertEqual([len(group) for group in children[4:]], [1, 1])
+        self.assertEqual(children[5].get('setupID'), 'setup1')
+        self.assertEqual(children[5][0][1][0].get('label'), 'instrumentHeight')
+
+    def test_read(self):
+        # the features of the CgPoints stay after them when read in between
+        survey = Survey()
+        survey.cg_point(point_name='A', x=1, y=2, attrib=['a'])
+        self.assertEqual([child.tag for child in survey.survey[1]], ['CgPoint', 'Feature'])
+        survey.cg_point(point_name='B', x=1, y=2, attrib=['b'])
+        self.assertEqual([child.get('name') for child in survey.survey[1]],
+                         ['A', 'B', 'featureA', 'featureB'])
+
+
+def _add(survey):
+    survey.raw_observation(point_name='1', x=1, y=2, attrib=['a'])
+    survey.cg_point(point_name='A', x=1, y=2, z=3, attrib=['b'])
+    survey.setup(point_name='A', ih=1.5, circle=0.5, attrib=['c'])
+    survey.setup(point_name='B', ih=1.5)
+    survey.cg_point(point_name='B <&>', x=4, y=5)
+    survey.raw_observation(point_name='2', x=1, y=2, ih=1.5, ppm=0, prism_constant=0)
+    survey.raw_observation(point_name='3', x=1, y=2, attrib=['caf\xe9'])
+
+
+class TestLandXMLWriter(unittest.TestCase):
+
+    def setUp(self):
+        survey = Survey()
+        _add(survey)
+        document = LandXML()
+        document.append(survey.survey)
+        self.expected = self._strip(document.to_string())
+
+    def _strip(self, document):
+        return re.sub(r'\d{4}-\d\d-\d\d|\d\d:\d\d:\d\d', '', document)
+
+    def test_same(self):
+        for spool_size in (1, 1 << 20):
+            f = io.StringIO()
+            writer = SurveyWriter(f, spool_size)
+            _add(writer)
+            writer.close()
+            self.assertEqual(self._strip(f.getvalue()), self.expected)
+
+    def test_empty(self):
+        f = io.StringIO()
+        SurveyWriter(f).close()
+        document = LandXML()
+        document.append(Survey().survey)
+        self.assertEqual(self._strip(f.getvalue()), self._strip(document.to_string()))
@@ -70,3 +70,55 @@ class TestLeicaGSI8Output(BaseTestOutput):
     def setup(self):
         with open('sample_data/leica_gsi/leica_gsi16_gurob.gsi') as testdata:
             self.fp = FormatParser(testdata.read())
+
+
+class TestLeicaGSITokenizer(unittest.TestCase):
+
+    def setUp(self):
+        self.fp = FormatParser('')
+
+    def test_gsi8(self):
+        record = self.fp.tokenize('110001+00000001 21.322+03496940 31..00+00030485 '
+                                  '51..1.+0012-034 87..10+00001500 71....+00000007 ')
+        self.assertEqual(sorted(record), ['11', '21', '31', '51', '71', '87'])
+        self.assertEqual(self.fp._get_units(record), ('gon', 'meter'))
+        self.assertAlmostEqual(self.fp._get_value(record, '21'), 34.9694)
+        self.assertAlmostEqual(self.fp._get_value(record, '31'), 30.485)
+        self.assertIsNone(self.fp._get_value(record, '32'))
+        self.assertEqual(self.fp._get_edm_accuracy(record), (12.0, -34.0))
+        self.assertEqual(self.fp._get_attrib(record), ['7'])
+
+    def test_gsi16(self):
+        record = self.fp.tokenize('*110002+00000000GDEM5415 *21.024+0000000003545100 '
+                                  '84...8-0000000000123456 85...8+0000000001000000 '
+                                  '86...8+0000000000000000')
+        self.assertEqual(record['11'][7:].lstrip('0'), 'GDEM5415')
+        self.assertEqual(self.fp._get_units(record), ('dms', 'mmeter'))
+        self.assertAlmostEqual(self.fp._get_value(record, '21'), 35.451)
+        self.assertEqual(self.fp._get_coordinates(record, '84'), (-1.23456, 10.0, 0.0))
+        self.assertEqual(self.fp._get_coordinates(record, '81'), (None, None, None))
+
+    def test_layout_shared(self):
+        first = self.fp.tokenize('110001+00000001 21.322+03496940 31..00+00030485 ')
+        second = self.fp.tokenize('110002+00000002 21.322+02179330 31..00+00030596')
+        self.assertIs(first.slices, second.slices)
+        self.assertEqual(second['11'], '110002+00000002')
+        self.assertAlmostEqual(self.fp._get_value(second, '31'), 30.596)
+
+    def test_irregular(self):
+        record = self.fp.tokenize('110001+00000001  21.322+03496940 31..00+00030485')
+        self.assertEqual(list(record), ['11', '21', '31'])
+        self.assertAlmostEqual(self.fp._get_value(record, '21'), 34.9694)
+        self.assertAlmostEqual(self.fp._get_value(record, '31'), 30.485)
+
+    def test_empty_line(self):
+        self.assertIsNone(self.fp.tokenize(''))
+        self.assertIsNone(self.fp.tokenize('   '))
+
+    def test_records_shared(self):
+        with open('sample_data/leica_gsi/leica_gsi8_ertola.gsi') as testdata:
+            fp = FormatParser(iter(testdata.readlines()))
+        fp.points
+        records = fp._records
+        fp.raw_line
+        self.assertIs(fp._records, records)
@@ -29,6 +29,40 @@ class TestNikonParser(unittest.TestCase):
         self.assertEqual(self.fp.points[3].desc, 'PT')
 
 
+class TestNikonRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.fp = FormatParser('')
+
+    def test_comments(self):
+        tokenize = self.fp.tokenize
+        self.assertEqual(tokenize('CO,Angle Units: Gons'), ('CO', 'angle_unit', 'gon'))
+        self.assertEqual(tokenize('CO,Coord Order: NEZ'), ('CO', 'coordorder', 'NEZ'))
+        self.assertEqual(tokenize('CO,TI  HOLD          Hz         0.0000 grd').kind, 'circle')
+        self.assertEqual(tokenize('CO,TI  INPUT   th   1.250 m    ih   1.500 m').value, '1.500')
+        self.assertIsNone(tokenize('CO,TI  INPUT   th   2.000 m').value)
+        self.assertIsNone(tokenize('CO,Zero VA: Zenith'))
+        self.assertIsNone(tokenize('CO,Temp:26C Press:1010hPa'))
+
+    def test_records(self):
+        rec = self.fp.tokenize('SS,21,1.500,,123.4560,88.1230,10:00:00,TREE')
+        self.assertEqual(rec, ('SS', '21', 1.5, 0.0, 123.456, 88.123, ['TREE']))
+        rec = self.fp.tokenize('ST,1,,2,,1.550,45.0000,0.0000')
+        self.assertEqual((rec.name, rec.ih, rec.backsight, rec.azimuth), ('1', 1.55, '2', '45.0000'))
+        self.assertEqual(self.fp.tokenize('UP,5,,10.0,20.0,3.5,CTRL').z, 3.5)
+        self.assertIsNone(self.fp.tokenize('XY,unknown'))
+
+    def test_trimble(self):
+        with open('sample_data/trimble/051012-1.RAW', encoding='latin-1') as testdata:
+            fp = FormatParser(testdata.read())
+        stations = [f for f in fp.points if f.desc == 'ST']
+        self.assertEqual([f.point_name for f in stations[:3]], ['st0', 'st1', 'st2'])
+        self.assertEqual(stations[0].properties['ih'], '1.500')
+        # an input without instrument height keeps the last one
+        self.assertEqual([f.properties['ih'] for f in fp.raw_line if f.desc == 'ST'],
+                         [f.properties['ih'] for f in stations])
+
+
 class TestNikonRAWOutput(BaseTestOutput):
 
     @pytest.fixture
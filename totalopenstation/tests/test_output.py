@@ -0,0 +1,66 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from totalopenstation.formats import Feature, Point
+from totalopenstation.output import Builder, write_file
+from totalopenstation.output.tops_txt import OutputFormat
+
+
+class ProcessOutput(Builder):
+    '''A builder overriding only process().'''
+
+    def process(self):
+        return 'caf\xe9\n'
+
+
+class FailingOutput(Builder):
+
+    def write_to(self, f):
+        f.write('partial\n')
+        raise ValueError('build failed')
+
+
+class TestBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.data = [Feature(Point(12.8, 76.3, 56.2), desc='PT', id=1),
+                     Feature(Point(19.8, 26.3), desc='PT', id=2)]
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def test_process(self):
+        self.assertEqual(OutputFormat(self.data).process(), '12.8 76.3 56.2\n19.8 26.3\n')
+
+    def test_process_only(self):
+        f = io.BytesIO()
+        ProcessOutput(self.data).write_to(f)
+        self.assertEqual(f.getvalue(), 'caf\xe9\n'.encode('utf-8'))
+        with self.assertRaises(NotImplementedError):
+            Builder(self.data).write_to(io.StringIO())
+
+    def test_raw(self):
+        path = os.path.join(self.dir, 'points.txt')
+        with open(path, 'wb', buffering=0) as f:
+            OutputFormat(self.data).write_to(f)
+            self.assertFalse(f.closed)
+        with open(path) as f:
+            self.assertEqual(f.read(), OutputFormat(self.data).process())
+
+    def test_write_file(self):
+        path = os.path.join(self.dir, 'points.txt')
+        self.assertEqual(write_file(OutputFormat(self.data), path), 25)
+        with open(path) as f:
+            self.assertEqual(f.read(), OutputFormat(self.data).process())
+
+    def test_failed(self):
+        path = os.path.join(self.dir, 'points.txt')
+        with open(path, 'w') as f:
+            f.write('old\n')
+        with self.assertRaises(ValueError):
+            write_file(FailingOutput(self.data), path)
+        with open(path) as f:
+            self.assertEqual(f.read(), 'old\n')
+        self.assertEqual(os.listdir(self.dir), ['points.txt'])
@@ -0,0 +1,128 @@
+import io
+import os
+import pathlib
+import tempfile
+import unittest
+
+from totalopenstation.formats import MappedFile, RawData, iter_split
+from totalopenstation.formats.leica_gsi import FormatParser
+
+GSI_FILE = 'sample_data/leica_gsi/leica_gsi8_ertola.gsi'
+
+
+class TestRawData(unittest.TestCase):
+
+    def test_lines(self):
+        data = 'a\r\nb\rc\n\nd'
+        self.assertEqual(list(RawData(data)), data.splitlines())
+        self.assertEqual(list(RawData(io.StringIO(data, newline=None))), data.splitlines())
+
+    def test_reiterate(self):
+        rows = RawData(io.StringIO('a\nb\n'))
+        self.assertEqual(list(rows), ['a', 'b'])
+        self.assertEqual(list(rows), ['a', 'b'])
+
+    def test_chunks(self):
+        data = 'x0=y' * 100
+        self.assertEqual(''.join(RawData(data).chunks(7)), data)
+        self.assertEqual(list(iter_split(RawData(data).chunks(7), '0=')), data.split('0='))
+
+
+class TestMappedFile(unittest.TestCase):
+
+    def mapped(self, data):
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, path)
+        return MappedFile(path, encoding='utf-8')
+
+    def test_lines(self):
+        data = 'a\r\nb\rc\n\nd\xe9'
+        self.assertEqual(list(self.mapped(data.encode('utf-8')).lines()), data.splitlines())
+        self.assertEqual(list(RawData(self.mapped(b'a\nb\n'))), ['a', 'b'])
+
+    def test_empty(self):
+        rows = RawData(self.mapped(b''))
+        self.assertEqual(list(rows), [])
+        self.assertEqual(rows.read(), '')
+
+    def test_chunks(self):
+        data = '\xe9t\xe9 0=' * 100
+        mapped = self.mapped(data.encode('utf-8'))
+        # Chunks split multibyte characters
+        self.assertEqual(''.join(mapped.chunks(7)), data)
+        self.assertEqual(RawData(mapped).read(), data)
+
+
+class TestStreamingParser(unittest.TestCase):
+
+    def setUp(self):
+        with open(GSI_FILE) as testdata:
+            self.expected = FormatParser(testdata.read()).points
+
+    def assertSamePoints(self, points):
+        self.assertEqual(len(points), len(self.expected))
+        for p, e in zip(points, self.expected):
+            self.assertEqual(p.id, e.id)
+            self.assertEqual(p.geometry.coords, e.geometry.coords)
+
+    def test_file_object(self):
+        with open(GSI_FILE) as testdata:
+            fp = FormatParser(testdata)
+            self.assertSamePoints(list(fp.iter_points()))
+            self.assertTrue(fp.raw_line)
+
+    def test_path(self):
+        fp = FormatParser(pathlib.Path(GSI_FILE))
+        self.assertSamePoints(fp.points)
+
+    def test_mapped_file(self):
+        fp = FormatParser(MappedFile(GSI_FILE))
+        self.assertSamePoints(fp.points)
+
+    def test_iter_points(self):
+        with open(GSI_FILE) as testdata:
+            points = FormatParser(testdata).iter_points()
+            first = next(points)
+        self.assertEqual(first.id, self.expected[0].id)
+
+
+class TestParseOnce(unittest.TestCase):
+
+    def setUp(self):
+        with open(GSI_FILE) as testdata:
+            self.fp = FormatParser(testdata.read())
+
+    def test_points_cached(self):
+        self.assertIs(self.fp.points, self.fp.points)
+        self.assertIs(self.fp.raw_line, self.fp.raw_line)
+
+    def test_records_not_kept(self):
+        self.fp.points
+        self.fp.raw_line
+        self.assertIsNone(self.fp._records)
+
+    def test_records_shared(self):
+        with open(GSI_FILE) as testdata:
+            fp = FormatParser(iter(testdata.readlines()))
+        self.assertTrue(fp.rows.once)
+        fp.points
+        records = fp._records
+        self.assertIsNotNone(records)
+        fp.raw_line
+        self.assertIs(fp._records, records)
+
+    def test_invalidate(self):
+        points = self.fp.points
+        self.fp._cache_records()
+        self.fp.invalidate()
+        self.assertIsNone(self.fp._records)
+        self.assertIsNot(self.fp.points, points)
+        self.assertEqual(len(self.fp.points), len(points))
+
+    def test_non_seekable_source(self):
+        with open(GSI_FILE) as testdata:
+            fp = FormatParser(iter(testdata.readlines()))
+        self.assertTrue(fp.points)
+        self.assertTrue(fp.raw_line)
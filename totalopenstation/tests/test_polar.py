@@ -1,7 +1,11 @@
+import itertools
+import random
 import unittest
+from unittest import mock
 
-from totalopenstation.formats import Point
-from totalopenstation.formats.polar import BasePoint, PolarPoint
+from totalopenstation.formats import Feature, Point
+from totalopenstation.formats import polar
+from totalopenstation.formats.polar import BasePoint, BatchReducer, PolarPoint
 
 
 class TestPolar(unittest.TestCase):
@@ -61,3 +65,87 @@ class TestPolar(unittest.TestCase):
         self.assertAlmostEqual(self.p2.to_point().x, p2_test.x)
         self.assertAlmostEqual(self.p2.to_point().y, p2_test.y)
         self.assertAlmostEqual(self.p2.to_point().z, p2_test.z)
+
+
+class TestBatchReducer(unittest.TestCase):
+
+    KINDS = list(itertools.product(('deg', 'gon', 'dms'),
+                                   ('z', 'v', 'dh'),
+                                   ('s', 'h'),
+                                   ('ENZ', 'NEZ')))
+
+    def setUp(self):
+        rnd = random.Random(42)
+        self.stations = [BasePoint(x=rnd.uniform(-1000, 1000),
+                                   y=rnd.uniform(-1000, 1000),
+                                   z=rnd.uniform(0, 100),
+                                   ih=rnd.uniform(1, 2),
+                                   b_zero_st=rnd.uniform(0, 90))
+                         for i in range(5)]
+        self.observations = []
+        for pid in range(500):
+            angle_unit, z_angle_type, dist_type, coordorder = rnd.choice(self.KINDS)
+            dist = rnd.uniform(1, 500)
+            if z_angle_type == 'dh':
+                z_angle = rnd.uniform(-0.5, 0.5) * dist
+            elif angle_unit == 'dms':
+                z_angle = 80 + rnd.randrange(20) + rnd.randrange(60) / 100 + rnd.randrange(60) / 10000
+            else:
+                z_angle = rnd.uniform(80, 100)
+            self.observations.append(dict(angle_unit=angle_unit,
+                                          z_angle_type=z_angle_type,
+                                          dist_type=dist_type,
+                                          dist=dist,
+                                          angle=rnd.uniform(0, 300),
+                                          z_angle=z_angle,
+                                          th=rnd.uniform(0, 2),
+                                          base_point=self.stations[pid // 100],
+                                          coordorder=coordorder))
+
+    def reduce(self, size):
+        batch = BatchReducer(size=size)
+        features = []
+        for pid, obs in enumerate(self.observations):
+            batch.add_polar(Feature(None, desc='PT', id=pid), **obs)
+            if batch.full:
+                features.extend(batch.flush())
+        features.extend(batch.flush())
+        return features
+
+    def check(self, features):
+        self.assertEqual([f.id for f in features], list(range(len(self.observations))))
+        for f, obs in zip(features, self.observations):
+            expected = PolarPoint(pid=f.id, text='', **obs).to_point()
+            self.assertAlmostEqual(f.geometry.x, expected.x, delta=1e-9)
+            self.assertAlmostEqual(f.geometry.y, expected.y, delta=1e-9)
+            self.assertAlmostEqual(f.geometry.z, expected.z, delta=1e-9)
+
+    def test_batch(self):
+        self.check(self.reduce(size=64))
+
+    def test_batch_without_numpy(self):
+        with mock.patch.object(polar, 'np', None):
+            self.check(self.reduce(size=64))
+
+    def test_order(self):
+        batch = BatchReducer()
+        direct = Feature(Point(1, 2, 3), desc='PT', id=1)
+        computed = Feature(None, desc='PT', id=2)
+        batch.add_polar(computed, **self.observations[0])
+        batch.append(direct)
+        self.assertEqual(batch.flush(), [computed, direct])
+        self.assertIsNotNone(computed.geometry)
+        self.assertEqual(len(batch), 0)
+
+    def test_base_point_changes(self):
+        bp = BasePoint(x=0, y=0, z=0, ih=0, b_zero_st=0)
+        first = Feature(None, desc='PT', id=1)
+        second = Feature(None, desc='PT', id=2)
+        obs = dict(angle_unit='deg', z_angle_type='z', dist_type='s', dist=10,
+                   angle=0, z_angle=90, th=0, base_point=bp, coordorder='ENZ')
+        batch = BatchReducer()
+        batch.add_polar(first, **obs)
+        bp.ih = 1.5
+        batch.add_polar(second, **obs)
+        self.assertAlmostEqual(batch.geometry(first).z, 0.0)
+        self.assertAlmostEqual(second.geometry.z, 1.5)
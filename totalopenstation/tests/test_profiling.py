@@ -0,0 +1,113 @@
+import json
+import os
+import pstats
+import tempfile
+import unittest
+
+from totalopenstation.formats.leica_gsi import FormatParser
+from totalopenstation.utils import profiling
+
+
+class Clock:
+    '''A clock moving one second at each reading.'''
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_inactive(self):
+        self.assertIsNone(profiling.active())
+        lines = ['a', 'b']
+        self.assertIs(profiling.iterate('read', lines), lines)
+        self.assertIs(profiling.wrap('tokenize', len), len)
+        with profiling.stage('build'):
+            profiling.count('build', 1)
+
+    def test_nested(self):
+        with profiling.Profiler(clock=Clock()) as profiler:
+            self.assertIs(profiling.active(), profiler)
+            with profiling.stage('outer'):
+                with profiling.stage('inner'):
+                    pass
+            profiling.count('outer', 10, 100)
+        self.assertIsNone(profiling.active())
+        stages = profiler.stages
+        # clock readings: start 1, outer 2, inner 3-4, outer 5, end 6
+        self.assertEqual(stages['inner'].seconds, 1.0)
+        self.assertEqual(stages['outer'].seconds, 2.0)
+        self.assertEqual(profiler.seconds, 5.0)
+        self.assertEqual((stages['outer'].records, stages['outer'].size), (10, 100))
+        self.assertEqual([e['name'] for e in profiler.events], ['inner', 'outer'])
+        report = profiler.report().splitlines()
+        self.assertEqual([line.split()[0] for line in report],
+                         ['stage', 'outer', 'inner', 'other', 'total'])
+
+    def test_iterate_wrap(self):
+        with profiling.Profiler() as profiler:
+            lines = list(profiling.iterate('read', ['ab', 'cde'], len))
+            tokens = list(map(profiling.wrap('tokenize', str.upper), lines))
+        self.assertEqual(tokens, ['AB', 'CDE'])
+        read = profiler.stages['read']
+        self.assertEqual((read.calls, read.records, read.size), (3, 2, 5))
+        self.assertEqual(profiler.stages['tokenize'].records, 2)
+        # steps of lines are not trace events
+        self.assertEqual(profiler.events, [])
+
+    def test_iterate_error(self):
+        def lines():
+            yield 'ab'
+            raise ValueError('bad line')
+
+        with profiling.Profiler(clock=Clock()) as profiler:
+            with profiling.stage('parse'):
+                with self.assertRaises(ValueError):
+                    list(profiling.iterate('read', lines()))
+                # the read stage is closed, the parse stage goes on
+                self.assertEqual([stage[0].name for stage in profiler._stack], ['parse'])
+        read = profiler.stages['read']
+        self.assertEqual((read.calls, read.records, read.seconds), (2, 1, 2.0))
+
+    def test_parser(self):
+        with open('sample_data/leica_gsi/leica_gsi8_ertola.gsi') as f:
+            data = f.read()
+        with profiling.Profiler() as profiler:
+            points = FormatParser(data).points
+        self.assertEqual(profiler.stages['read'].records, len(data.splitlines()))
+        self.assertEqual(profiler.stages['tokenize'].records, len(data.splitlines()))
+        # only polar observations are reduced
+        self.assertTrue(0 < profiler.stages['reduce'].records < len(points))
+
+    def test_memory(self):
+        with profiling.Profiler(memory=True) as profiler:
+            with profiling.stage('read'):
+                lines = ['%08d' % i for i in range(10000)]
+            with profiling.stage('build'):
+                output = ''.join(lines)
+            profiling.count('read', len(lines))
+        read, build = profiler.stages['read'], profiler.stages['build']
+        self.assertGreater(read.allocated, 10000 * len(lines[0]))
+        self.assertGreater(build.allocated, len(output))
+        self.assertLess(build.allocated, read.allocated)
+        self.assertGreaterEqual(profiler.peak, read.allocated + build.allocated)
+        self.assertGreaterEqual(build.peak, read.allocated)
+        report = profiler.memory_report().splitlines()
+        self.assertEqual(report[1].split()[0], 'read')
+        self.assertEqual(float(report[1].split()[-1]), round(read.allocated / 10000))
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = os.path.join(tmp, 'run.pstats')
+            trace = os.path.join(tmp, 'run.json')
+            with profiling.Profiler(pstats=stats, trace=trace):
+                with profiling.stage('build'):
+                    sorted(range(1000))
+            self.assertGreater(pstats.Stats(stats).total_calls, 0)
+            with open(trace) as f:
+                events = json.load(f)['traceEvents']
+            self.assertEqual([(e['name'], e['ph']) for e in events], [('build', 'X')])
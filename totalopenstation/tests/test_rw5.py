@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 
 import pytest
 
@@ -28,6 +29,40 @@ class TestCarlsonRW5Parser(unittest.TestCase):
         self.assertEqual(self.pts[3].desc, 'PT')
 
 
+class TestRW5Records(unittest.TestCase):
+    def setUp(self):
+        with open('sample_data/carlson_rw5/Leica1200.rw5') as testdata:
+            self.fp = FormatParser(testdata.read())
+
+    def test_observation(self):
+        rec = self.fp.tokenize('SS,OP111,FP101,AR55.05521,ZE0.00014,SD3.3566,--LIGHT POLE')
+        self.assertEqual((rec.name, rec.azimuth, rec.angle, rec.angle_type),
+                         ('101', None, 55.05521, 'AR'))
+        self.assertEqual((rec.z_angle_type, rec.dist_type, rec.note), ('z', 's', 'LIGHT POLE'))
+        rec = self.fp.tokenize('TR,OP1,FP2,AZ10.0000,VA2.0000,HD5.0')
+        self.assertEqual((rec.azimuth, rec.angle, rec.angle_type), (10.0, None, None))
+        self.assertEqual((rec.z_angle_type, rec.dist_type), ('v', 'h'))
+        self.assertIsNone(self.fp.tokenize('JB,NMMY RW5 JOB'))
+        self.assertIsNone(self.fp.tokenize('-- comment'))
+
+    def test_streamed(self):
+        with mock.patch.object(FormatParser, 'tokenize', autospec=True,
+                               side_effect=FormatParser.tokenize) as tokenize:
+            self.fp.points
+            self.fp.raw_line
+        self.assertEqual(tokenize.call_count, 2 * len(list(self.fp.rows)))
+        self.assertIsNone(self.fp._records)
+
+    def test_shared(self):
+        with mock.patch.object(FormatParser, 'tokenize', autospec=True,
+                               side_effect=FormatParser.tokenize) as tokenize:
+            self.fp._cache_records()
+            self.fp.points
+            self.fp.raw_line
+        self.assertEqual(tokenize.call_count, len(list(self.fp.rows)))
+        self.assertEqual([rec.type for rec in self.fp._records].count('SS'), 10)
+
+
 
 class TestRW5Output(BaseTestOutput):
 
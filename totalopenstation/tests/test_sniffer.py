@@ -0,0 +1,42 @@
+import unittest
+
+from totalopenstation.formats.sniffer import guess_format, read_head, sniff, sniff_file
+
+SAMPLES = {
+    'sample_data/carlson_rw5/Leica1200.rw5': 'carlson_rw5',
+    'sample_data/carlson_rw5/Trav_19leg.rw5': 'carlson_rw5',
+    'sample_data/landxml.xml': 'landxml',
+    'sample_data/leica_gsi/leica_gsi16_gurob.gsi': 'leica_gsi',
+    'sample_data/leica_gsi/leica_gsi8_ertola.gsi': 'leica_gsi',
+    'sample_data/leica_tcr_705': 'leica_tcr_705',
+    'sample_data/leica_tcr_1205': 'leica_tcr_1205',
+    'sample_data/nikon_raw_v200/nikon_dtm.tops': 'nikon_raw_v200',
+    'sample_data/nikon_raw_v200/nikon_raw_v200.tops': 'nikon_raw_v200',
+    'sample_data/sokkia_sdr33.tops': 'sokkia_sdr33',
+    'sample_data/topcon_gts_229': 'topcon_gts',
+    'sample_data/trimble/BSG-08-11-19.are': 'trimble_are',
+    'sample_data/zeiss_elta_r55/zeiss_elta_r55-R5.tops': 'zeiss_r5',
+    'sample_data/zeiss_elta_r55/zeiss_elta_r55-REC_500.tops': 'zeiss_rec_500',
+    }
+
+
+class TestSniffer(unittest.TestCase):
+
+    def test_samples(self):
+        for path, informat in SAMPLES.items():
+            with self.subTest(path=path):
+                guesses = sniff_file(path)
+                self.assertEqual(guesses[0].format, informat)
+                self.assertGreaterEqual(guesses[0].confidence, 0.9)
+                confidences = [guess.confidence for guess in guesses]
+                self.assertEqual(confidences, sorted(confidences, reverse=True))
+
+    def test_unknown(self):
+        self.assertEqual(sniff(''), [])
+        self.assertIsNone(guess_format('Hello, world!\nNothing to see here.\n'))
+
+    def test_read_head(self):
+        head = read_head('sample_data/leica_gsi/leica_gsi8_ertola.gsi', 1000)
+        self.assertLess(len(head), 1000)
+        with open('sample_data/leica_gsi/leica_gsi8_ertola.gsi', newline='') as f:
+            self.assertTrue(f.read().startswith(head + '\n'))
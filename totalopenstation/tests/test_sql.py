@@ -0,0 +1,117 @@
+import re
+import sqlite3
+import struct
+import unittest
+
+from totalopenstation.formats import Feature, Point
+from totalopenstation.formats.table import PointTable
+from totalopenstation.output.tops_sql import CopyOutputFormat, OutputFormat, quote_identifier
+
+
+def _load(script):
+    '''Run an SQL script in SQLite and return the loaded rows.
+
+    SQLite parses the INSERT statements like PostgreSQL; ST_GeomFromText
+    returns its WKT and SRID, the GiST index is left out.'''
+
+    db = sqlite3.connect(':memory:', isolation_level=None)
+    db.create_function('ST_GeomFromText', -1, lambda wkt, srid=None: '%s|%s' % (srid, wkt))
+    if 'CREATE TABLE' not in script:
+        db.execute('CREATE TABLE "topsdata" (point_id, point_geom, point_text)')
+    db.executescript(re.sub(r'(?m)^CREATE INDEX .* USING GIST .*$', '', script))
+    return db.execute('SELECT * FROM "topsdata"').fetchall()
+
+
+def _copy_rows(script):
+    '''Parse the COPY block of an SQL script, return its header and rows.'''
+
+    lines = script.splitlines()
+    start = next(i for i, line in enumerate(lines) if line.startswith('COPY '))
+    end = lines.index('\\.')
+    escapes = {'t': '\t', 'n': '\n', 'r': '\r'}
+    rows = []
+    for line in lines[start + 1:end]:
+        rows.append(tuple(None if field == '\\N' else
+                          re.sub(r'\\(.)', lambda m: escapes.get(m.group(1), m.group(1)), field)
+                          for field in line.split('\t')))
+    return lines[start], rows
+
+
+class TestSQLOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.data = [
+            Feature(Point(12.8, 76.3, 56.2),
+                    desc='PT',
+                    id=1),
+            Feature(Point(19.8, 26.3),
+                    desc="it's\ta \\ test",
+                    id='A-2'),
+            Feature(Point(7189.8, 5719.7, 972.6),
+                    desc=None,
+                    id=3),
+        ]
+        self.rows = [
+            (1, 'None|POINT Z (12.8 76.3 56.2)', 'PT'),
+            ('A-2', 'None|POINT (19.8 26.3)', "it's\ta \\ test"),
+            (3, 'None|POINT Z (7189.8 5719.7 972.6)', None),
+        ]
+
+    def test_quote(self):
+        self.assertEqual(quote_identifier('topsdata'), '"topsdata"')
+        self.assertEqual(quote_identifier('survey.my "points"'), '"survey"."my ""points"""')
+
+    def test_insert(self):
+        output = OutputFormat(self.data).process()
+        self.assertEqual(output.splitlines()[1],
+                         'INSERT INTO "topsdata"(point_id, point_geom, point_text) '
+                         "VALUES(1,ST_GeomFromText('POINT Z (12.8 76.3 56.2)'),'PT');")
+        self.assertEqual(_load(output), self.rows)
+
+    def test_values(self):
+        output = OutputFormat(self.data, mode='values', batch_size=2).process()
+        self.assertEqual(output.count('INSERT INTO'), 2)
+        self.assertEqual(_load(output), self.rows)
+
+    def test_srid(self):
+        output = OutputFormat(self.data, mode='values', srid=3003).process()
+        self.assertEqual(_load(output)[0][1], '3003|POINT Z (12.8 76.3 56.2)')
+
+    def test_create_table(self):
+        output = OutputFormat(self.data, tablename='survey.topsdata', create_table=True).process()
+        lines = output.splitlines()
+        self.assertEqual(lines[1], 'CREATE TABLE "survey"."topsdata" '
+                                   '(point_id text, point_geom geometry, point_text text);')
+        self.assertEqual(lines[-2], 'CREATE INDEX "topsdata_point_geom_idx" '
+                                    'ON "survey"."topsdata" USING GIST (point_geom);')
+        output = OutputFormat(self.data, create_table=True).process()
+        self.assertEqual(_load(output), [(str(pid), geom, text) for pid, geom, text in self.rows])
+
+    def test_copy(self):
+        output = CopyOutputFormat(self.data).process()
+        header, rows = _copy_rows(output)
+        self.assertEqual(header, 'COPY "topsdata" (point_id, point_geom, point_text) FROM STDIN;')
+        self.assertEqual(rows, [(str(pid), geom.split('|')[1], text) for pid, geom, text in self.rows])
+        self.assertEqual(output.splitlines()[-1], 'COMMIT;')
+
+    def test_copy_ewkt(self):
+        output = OutputFormat(self.data, mode='copy', srid=3003).process()
+        self.assertEqual(_copy_rows(output)[1][1][1], 'SRID=3003;POINT (19.8 26.3)')
+
+    def test_copy_hexewkb(self):
+        output = OutputFormat(self.data, mode='copy', srid=3003, hexewkb=True).process()
+        rows = _copy_rows(output)[1]
+        wkb = bytes.fromhex(rows[0][1])
+        self.assertEqual(struct.unpack('<BII3d', wkb), (1, 0xA0000001, 3003, 12.8, 76.3, 56.2))
+        wkb = bytes.fromhex(rows[1][1])
+        self.assertEqual(struct.unpack('<BII2d', wkb), (1, 0x20000001, 3003, 19.8, 26.3))
+
+    def test_table(self):
+        table = PointTable.from_features(self.data)
+        for mode in ('insert', 'values', 'copy'):
+            self.assertEqual(OutputFormat(table, mode=mode).process(),
+                             OutputFormat(self.data, mode=mode).process())
+
+    def test_mode(self):
+        with self.assertRaises(ValueError):
+            OutputFormat(self.data, mode='upsert')
@@ -0,0 +1,88 @@
+import unittest
+
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from totalopenstation.formats import Feature, Point
+from totalopenstation.formats.leica_gsi import FormatParser
+from totalopenstation.formats.table import PointTable
+from totalopenstation.output.tops_dat import OutputFormat as DatOutput
+from totalopenstation.output.tops_dxf import CompactOutputFormat as CompactDxfOutput
+from totalopenstation.output.tops_dxf import OutputFormat as DxfOutput
+from totalopenstation.output.tops_sql import OutputFormat as SqlOutput
+from totalopenstation.output.tops_txt import OutputFormat as TxtOutput
+
+from . import BaseTestOutput
+
+
+class TestPointTable(unittest.TestCase):
+
+    def setUp(self):
+        self.data = [
+            Feature(Point(12.8, 76.3, 56.2),
+                    desc='PT',
+                    point_name='TEST POINT',
+                    id=1),
+            Feature(Point(19.8, 26.3),
+                    desc='PT',
+                    point_name='TEST POINT #2',
+                    id=2),
+            Feature(Point(7189.8, 5719.7, 972.6),
+                    desc='PO',
+                    id=3,
+                    point_name='TEST POINT #3',
+                    angle=12.5,
+                    z_angle='90.585',
+                    dist=1718.28,
+                    station_name='STATION'),
+        ]
+        self.table = PointTable.from_features(self.data)
+
+    def test_columns(self):
+        self.assertEqual(self.table.x.dtype, np.float64)
+        self.assertEqual(self.table.id.tolist(), [1, 2, 3])
+        self.assertTrue(np.isnan(self.table.z[1]))
+        self.assertEqual(self.table.desc.labels, ['PT', 'PO'])
+        self.assertEqual(self.table.station.tolist(), [-1, -1, 0])
+        self.assertAlmostEqual(self.table.z_angle[2], 90.585)
+
+    def test_features(self):
+        self.assertEqual(len(self.table), 3)
+        feature = self.table[2]
+        self.assertEqual(feature.id, 3)
+        self.assertEqual(feature.desc, 'PO')
+        self.assertEqual(feature.point_name, 'TEST POINT #3')
+        self.assertEqual(feature.properties['station_name'], 'STATION')
+        self.assertEqual(feature.geometry.coords, self.data[2].geometry.coords)
+        self.assertEqual(self.table[1].geometry.coords, ((19.8, 26.3),))
+
+    def test_not_point(self):
+        # a raw observation without a target point
+        with self.assertRaises(TypeError):
+            PointTable.from_features(self.data + [Feature(None, desc='PO', id=4)])
+
+    def test_output(self):
+        for builder in (DatOutput, DxfOutput, CompactDxfOutput, SqlOutput, TxtOutput):
+            self.assertEqual(builder(self.table).process(),
+                             builder(self.data).process())
+
+    def test_parser(self):
+        with open('sample_data/leica_gsi/leica_gsi8_ertola.gsi') as testdata:
+            fp = FormatParser(testdata.read())
+        table = fp.point_table()
+        self.assertEqual(len(table), len(fp.points))
+        self.assertAlmostEqual(table.x[0], fp.points[0].geometry.x)
+        raw = fp.point_table(raw=True)
+        self.assertEqual(len(raw), len(fp.raw_line))
+
+
+class TestPointTableOutput(BaseTestOutput):
+
+    @pytest.fixture
+    def setup(self):
+        with open('sample_data/leica_gsi/leica_gsi16_gurob.gsi') as testdata:
+            table = FormatParser(testdata.read()).point_table()
+        self.fp = SimpleNamespace(points=table)
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+# filename: utils/batch.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+'''Convert many files at once, optionally in a pool of processes.'''
+
+import glob
+import importlib
+import logging
+import os
+import pathlib
+import time
+
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import totalopenstation.formats
+import totalopenstation.output
+
+from totalopenstation.formats import MappedFile
+from totalopenstation.formats.sniffer import AUTO, sniff_file
+from totalopenstation.output import write_file
+from totalopenstation.utils import profiling
+from totalopenstation.utils.cache import ParseCache, digest_file
+
+logger = logging.getLogger(__name__)
+
+# File extension of each output format
+EXTENSIONS = {
+    'dxf': 'dxf',
+    'dxf_compact': 'dxf',
+    'csv': 'csv',
+    'sql': 'sql',
+    'sql_copy': 'sql',
+    'dat': 'dat',
+    'txt': 'txt',
+    'geojson': 'geojson',
+    'landxml': 'xml',
+    }
+
+Result = namedtuple('Result', 'infile outfile status count seconds error informat')
+Result.__doc__ = '''The result of the conversion of a file.
+
+status is one of 'ok', 'skipped' or 'failed', count is the number of
+features written, error the error message of a failed conversion and
+informat the input format used.'''
+
+
+def input_class(name):
+    '''Return the parser class of a builtin input format.
+
+    Raises:
+        ValueError: The format does not exist.
+    '''
+
+    try:
+        mod, cls, desc = totalopenstation.formats.BUILTIN_INPUT_FORMATS[name]
+    except KeyError:
+        raise ValueError('%s is not a valid input format' % name)
+    return getattr(importlib.import_module('totalopenstation.formats.' + mod), cls)
+
+
+def output_class(name):
+    '''Return the builder class of a builtin output format.
+
+    Raises:
+        ValueError: The format does not exist.
+    '''
+
+    try:
+        mod, cls, desc = totalopenstation.output.BUILTIN_OUTPUT_FORMATS[name]
+    except KeyError:
+        raise ValueError('%s is not a valid output format' % name)
+    return getattr(importlib.import_module('totalopenstation.output.' + mod), cls)
+
+
+def drop_z(features):
+    '''Replace the geometry of features with its 2D version, in place.'''
+
+    for feature in features:
+        geom_cls = getattr(totalopenstation.formats, feature.geometry.geom_type)
+        try:
+            feature.geometry = geom_cls(feature.geometry.x, feature.geometry.y)
+        except AttributeError:
+            feature.geometry = geom_cls([(p.x, p.y) for p in feature.geometry.geoms])
+
+
+class Stream:
+    '''The features of a parser, yielded as they are parsed.
+
+    Each iteration parses the source again, so that builders walking
+    through their data twice (the DXF output collects its layers first)
+    get the same features without a list of them in memory. The source
+    must be one which can be walked through more than once.
+
+    Args:
+        parser (:class:`formats.Parser`): The parser.
+        raw (bool): Yield raw data instead of points.
+
+    Attributes:
+        count (int): The number of features of the last iteration.
+    '''
+
+    def __init__(self, parser, raw=False):
+        self.parser = parser
+        self.raw = raw
+        self.count = 0
+
+    def __iter__(self):
+        features = self.parser.iter_raw() if self.raw else self.parser.iter_points()
+        if features is None:
+            raise ValueError('the input format has no raw data')
+        self.count = 0
+        for feature in profiling.iterate('parse', features):
+            self.count += 1
+            yield feature
+
+
+def streams(parser, xy_only=False, cache=False):
+    '''Return True if the features of parser can be given as a
+    :class:`Stream`, False if a list of them is needed.
+
+    The 2D conversion changes features in a list and the cache stores one,
+    a source which can be walked through only once is parsed in a list.
+    '''
+
+    return not (xy_only or cache or parser.rows.once)
+
+
+def find_files(paths):
+    '''Expand directories and glob patterns to a sorted list of files.
+
+    Args:
+        paths (list): Files, directories or glob patterns. Only the files
+            directly inside a directory are taken.
+    '''
+
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            names = (os.path.join(path, name) for name in os.listdir(path))
+        elif glob.has_magic(path):
+            names = glob.glob(path)
+        else:
+            names = [path]
+        files.update(name for name in names if not os.path.isdir(name))
+    return sorted(files)
+
+
+def output_path(infile, outformat, outdir=None, keep_extension=False):
+    '''Return the path of the output file of infile.
+
+    The output file has the name of the input file with the extension of
+    the output format, in outdir or next to the input file. With
+    keep_extension, the extension of the input file is kept before the
+    extension of the output format.
+    '''
+
+    name = os.path.basename(infile)
+    if not keep_extension:
+        name = os.path.splitext(name)[0]
+    name += '.' + EXTENSIONS.get(outformat, outformat)
+    return os.path.join(outdir or os.path.dirname(infile), name)
+
+
+def output_paths(infiles, outformat, outdir=None):
+    '''Return the output file of each input file, without collisions.
+
+    Input files which would have the same output file, like ``a.gsi`` and
+    ``a.raw`` written to the same directory, keep their extension in the
+    name of their output file. An output file which would still be the
+    output of an earlier input file is given with an error.
+
+    Returns:
+        A list of (infile, outfile, error) tuples, error being None for
+        files which can be converted.
+    '''
+
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    outfiles = [output_path(infile, outformat, outdir) for infile in infiles]
+    counts = Counter(key(outfile) for outfile in outfiles)
+    paths = []
+    seen = {}
+    for infile, outfile in zip(infiles, outfiles):
+        if counts[key(outfile)] > 1:
+            outfile = output_path(infile, outformat, outdir, keep_extension=True)
+        if key(outfile) in seen:
+            error = 'output file %s is also the output of %s' % (outfile, seen[key(outfile)])
+        else:
+            error = None
+            seen[key(outfile)] = infile
+        paths.append((infile, outfile, error))
+    return paths
+
+
+class Converter:
+    '''Convert files from an input format to an output format.
+
+    Format classes are imported once, when the converter is created, so a
+    converter is meant to be used for many files.
+
+    Args:
+        informat (str): The name of the input format, ``'auto'`` to guess
+            the format of each file.
+        outformat (str): The name of the output format.
+        raw (bool): Convert raw data instead of points.
+        xy_only (bool): Output only 2D data.
+        overwrite (bool): Overwrite existing output files.
+        mmap (bool): Read input files through a memory map.
+        cache_dir (str): The directory of a :class:`utils.cache.ParseCache`,
+            None to parse every file.
+    '''
+
+    def __init__(self, informat, outformat, raw=False, xy_only=False, overwrite=False, mmap=False,
+                 cache_dir=None):
+        self.informat = informat
+        self.inputclasses = {}
+        if informat != AUTO:
+            self.inputclasses[informat] = input_class(informat)
+        self.outputclass = output_class(outformat)
+        self.raw = raw
+        self.xy_only = xy_only
+        self.overwrite = overwrite
+        self.mmap = mmap
+        self.cache = ParseCache(cache_dir) if cache_dir else None
+
+    def __call__(self, infile, outfile):
+        '''Convert a file, errors are given back in the result.
+
+        Returns:
+            A :class:`Result`.
+        '''
+
+        start = time.perf_counter()
+        informat = self.informat
+        if os.path.exists(outfile) and not self.overwrite:
+            return Result(infile, outfile, 'skipped', 0, 0.0, 'output file already exists', informat)
+        try:
+            with profiling.stage('parse'):
+                informat = self._guess(infile)
+                inputclass = self.inputclasses[informat]
+                parser = inputclass(MappedFile(infile) if self.mmap else pathlib.Path(infile))
+                if streams(parser, self.xy_only, self.cache is not None):
+                    # parsed as the output is written
+                    features = Stream(parser, self.raw)
+                elif self.cache is None:
+                    features = self._parse(parser)
+                else:
+                    features = self.cache.parse(inputclass, informat, digest_file(infile),
+                                                lambda: self._parse(parser),
+                                                raw=self.raw)
+            if not isinstance(features, Stream):
+                profiling.count('parse', len(features))
+            if self.xy_only:
+                with profiling.stage('2d'):
+                    drop_z(features)
+                profiling.count('2d', len(features))
+            # the output is written as it is built
+            with profiling.stage('write'):
+                size = write_file(self.outputclass(features), outfile)
+            count = features.count if isinstance(features, Stream) else len(features)
+            profiling.count('write', count, size)
+        except Exception as error:
+            logger.debug('Conversion of %s failed', infile, exc_info=True)
+            return Result(infile, outfile, 'failed', 0, time.perf_counter() - start,
+                          '%s: %s' % (type(error).__name__, error), informat)
+        return Result(infile, outfile, 'ok', count, time.perf_counter() - start, None,
+                      informat)
+
+    def _guess(self, infile):
+        '''Return the input format of infile, importing its parser once.'''
+
+        informat = self.informat
+        if informat == AUTO:
+            guesses = sniff_file(infile)
+            if not guesses:
+                raise ValueError('the input format could not be guessed')
+            informat = guesses[0].format
+            if informat not in self.inputclasses:
+                self.inputclasses[informat] = input_class(informat)
+        return informat
+
+    def _parse(self, parser):
+        return parser.raw_line if self.raw else parser.points
+
+
+# The converter of a worker process, and its options
+_converter = None
+_options = None
+
+
+def _convert(task):
+    '''Convert a file in a worker process, creating its converter once.'''
+
+    global _converter, _options
+    options, infile, outfile = task
+    if options != _options:
+        _converter = Converter(*options)
+        _options = options
+    return _converter(infile, outfile)
+
+
+def convert_files(infiles, informat, outformat, outdir=None, jobs=1,
+                  raw=False, xy_only=False, overwrite=False, mmap=False, cache_dir=None):
+    '''Convert many files, one result at a time.
+
+    With more than one job, files are converted in a pool of processes,
+    each one importing the format classes once. A file which can not be
+    converted does not stop the others.
+
+    Args:
+        infiles (list): The input files.
+        informat (str): The name of the input format, or ``'auto'``.
+        outformat (str): The name of the output format.
+        outdir (str): The directory of output files, next to input files
+            if None. Output files are named by :func:`output_paths`.
+        jobs (int): The number of processes.
+
+    Other arguments are those of :class:`Converter`.
+
+    Yields:
+        A :class:`Result` for each file, in the order of infiles.
+
+    Raises:
+        ValueError: A format does not exist.
+    '''
+
+    options = (informat, outformat, raw, xy_only, overwrite, mmap, cache_dir)
+    paths = output_paths(infiles, outformat, outdir)
+    tasks = [(options, infile, outfile) for infile, outfile, error in paths if error is None]
+    if jobs <= 1 or len(tasks) <= 1:
+        converter = Converter(*options)
+        results = (converter(infile, outfile) for options, infile, outfile in tasks)
+        yield from _merge(paths, results, informat)
+        return
+    # Check formats before starting workers
+    if informat != AUTO:
+        input_class(informat)
+    output_class(outformat)
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(jobs) as executor:
+        yield from _merge(paths, executor.map(_convert, tasks, chunksize=chunksize), informat)
+
+
+def _merge(paths, results, informat):
+    '''Yield the results of converted files and of colliding files, in order.'''
+
+    for infile, outfile, error in paths:
+        if error is None:
+            yield next(results)
+        else:
+            yield Result(infile, outfile, 'failed', 0, 0.0, error, informat)
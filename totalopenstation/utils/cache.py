@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+# filename: utils/cache.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+'''An on-disk cache of parsed features, keyed by the content of the input.'''
+
+import gc
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import tempfile
+import zlib
+
+import totalopenstation
+import totalopenstation.formats
+
+from totalopenstation.utils import profiling
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = '~/.totalopenstation/cache'
+
+# Maximum size of the cache directory, in bytes
+CACHE_SIZE = 256 * 1024 * 1024
+
+# Version of the layout of cache files
+CACHE_VERSION = 1
+
+SUFFIX = '.features'
+
+# Modules whose source is part of the version of every parser
+COMMON_MODULES = ('totalopenstation.formats',
+                  'totalopenstation.formats.polar',
+                  'totalopenstation.formats.conversion')
+
+_versions = {}
+
+
+def digest_file(path, size=1 << 20):
+    '''Return the SHA-256 hex digest of the bytes of a file.'''
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def digest_text(text):
+    '''Return the SHA-256 hex digest of a text, encoded as UTF-8.'''
+
+    return hashlib.sha256(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def parser_version(parser_class):
+    '''Return the version of a parser class.
+
+    The version changes with the Total Open Station version and with the
+    source code of the parser module and of the modules shared by parsers,
+    so that a changed parser never reads results of its older self.
+    '''
+
+    module = parser_class.__module__
+    if module not in _versions:
+        sha = hashlib.sha256(totalopenstation.__version__.encode())
+        for name in COMMON_MODULES + (module,):
+            __import__(name)
+            path = getattr(sys.modules[name], '__file__', None)
+            try:
+                with open(path, 'rb') as f:
+                    sha.update(f.read())
+            except (OSError, TypeError):
+                # frozen application, the version is enough
+                pass
+        _versions[module] = sha.hexdigest()
+    return _versions[module]
+
+
+def _encode(features):
+    rows = []
+    for feature in features:
+        properties = dict(feature.properties)
+        desc = properties.pop('desc')
+        geometry = feature.geometry
+        rows.append((geometry.geom_type, geometry.coords, feature.id, desc, properties))
+    return zlib.compress(marshal.dumps((CACHE_VERSION, rows)), 1)
+
+
+def _decode(data):
+    version, rows = marshal.loads(zlib.decompress(data))
+    if version != CACHE_VERSION:
+        raise ValueError('cache version %s' % version)
+    Feature = totalopenstation.formats.Feature
+    Point = totalopenstation.formats.Point
+    features = []
+    append = features.append
+    for geom_type, coords, fid, desc, properties in rows:
+        if geom_type == 'Point':
+            geometry = Point(*coords[0])
+        else:
+            geometry = getattr(totalopenstation.formats, geom_type)(coords)
+        append(Feature(geometry, desc, id=fid, **properties))
+    return features
+
+
+class ParseCache:
+    '''A directory of parsed features, with least recently used eviction.
+
+    Entries are keyed by the digest of the input data, the input format,
+    the version of the parser and the parsing options, and hold features
+    in a compact binary form (compressed marshal data of plain tuples), so
+    that a hit skips tokenizing and polar reduction. Files are written
+    atomically and several processes can share a directory.
+
+    Args:
+        path (str): The cache directory, created when needed.
+        max_size (int): The maximum size of the directory, in bytes.
+    '''
+
+    def __init__(self, path=CACHE_DIR, max_size=CACHE_SIZE):
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+
+    def key(self, digest, informat, parser_class, raw=False):
+        '''Return the key of parsed data.
+
+        Args:
+            digest (str): The digest of the input data, see
+                :func:`digest_file` and :func:`digest_text`.
+            informat (str): The name of the input format.
+            parser_class (class): The parser of the input format.
+            raw (bool): True for raw data, False for points.
+        '''
+
+        parts = (digest, informat, parser_version(parser_class), 'raw' if raw else 'points',
+                 str(CACHE_VERSION), str(marshal.version))
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key + SUFFIX)
+
+    def load(self, key):
+        '''Return the features of a key, None if they are not cached.'''
+
+        path = self._file(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            logger.warning('Cache file %s can not be read: %s', path, error)
+            return None
+        enabled = gc.isenabled()
+        # many small objects are created and none is garbage
+        gc.disable()
+        try:
+            features = _decode(data)
+        except (ValueError, EOFError, TypeError, zlib.error):
+            logger.warning('Removing damaged cache file %s', path)
+            self._remove(path)
+            return None
+        finally:
+            if enabled:
+                gc.enable()
+        try:
+            # the entry is now the most recently used
+            os.utime(path)
+        except OSError:
+            pass
+        return features
+
+    def store(self, key, features):
+        '''Store the features of a key, then evict old entries if needed.
+
+        Features which can not be written are not cached, the conversion
+        goes on without the cache.'''
+
+        try:
+            data = _encode(features)
+        except (ValueError, AttributeError) as error:
+            logger.info('Features can not be cached: %s', error)
+            return
+        temp = None
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp, self._file(key))
+        except OSError as error:
+            logger.warning('Features can not be written to the cache %s: %s', self.path, error)
+            if temp is not None:
+                self._remove(temp)
+            return
+        self.evict()
+
+    def evict(self):
+        '''Remove the least recently used entries above the maximum size.'''
+
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if entry.name.endswith(SUFFIX):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+        except FileNotFoundError:
+            return
+        except OSError as error:
+            logger.warning('Cache %s can not be read: %s', self.path, error)
+            return
+        if total <= self.max_size:
+            return
+        entries.sort()
+        try:
+            for mtime, size, path in entries:
+                self._remove(path)
+                total -= size
+                if total <= self.max_size:
+                    break
+        except OSError as error:
+            logger.warning('Cache %s can not be cleaned: %s', self.path, error)
+
+    def clear(self):
+        '''Remove all entries.'''
+
+        for name in os.listdir(self.path):
+            if name.endswith(SUFFIX):
+                self._remove(os.path.join(self.path, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def parse(self, parser_class, informat, digest, parse, raw=False):
+        '''Return cached features, or parse and store them.
+
+        Args:
+            parser_class (class): The parser of the input format.
+            informat (str): The name of the input format.
+            digest (str): The digest of the input data.
+            parse (callable): Called without arguments on a miss, returns
+                the features.
+            raw (bool): True for raw data, False for points.
+        '''
+
+        key = self.key(digest, informat, parser_class, raw)
+        with profiling.stage('cache'):
+            features = self.load(key)
+        if features is None:
+            features = parse()
+            if features is not None:
+                with profiling.stage('cache'):
+                    self.store(key, features)
+        else:
+            logger.info('Parsed data read from cache')
+        return features
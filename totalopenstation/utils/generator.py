@@ -0,0 +1,683 @@
+# -*- coding: utf-8 -*-
+# filename: utils/generator.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+'''Generate synthetic surveys of any size, in every input format.
+
+A :class:`Survey` is an open traverse: the first station is set up on a
+known point with a backsight to a control point, each station observes the
+next one on both faces and a number of coded sideshots, walking along
+fences, walls and other features. Every point has known ground truth
+coordinates.
+
+Surveys are generated lazily from a seed, setup by setup, and written in
+each input format by a writer function, so files of several GB can be
+written with little memory. Writers put values where the parsers of Total
+Open Station read them, so that parsing a written survey gives back the
+ground truth coordinates, within the precision of the format:
+
+- formats without an orientation record (Leica GSI, Carlson RW5, LandXML)
+  hold the readings of an instrument oriented to the north;
+- Nikon RAW vertical angles are measured from the horizon;
+- coordinate formats (Leica TCR, Sokkia SDR33, Trimble ARE, Zeiss) hold the
+  coordinates computed by the instrument.
+
+Topcon GTS data is written like the instrument records it, but its parser
+does not read it back to the ground truth, see :func:`write_topcon_gts`.
+'''
+
+import random
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+from math import atan2, ceil, cos, hypot, pi, sin
+
+# Feature codes of sideshots, at most 5 characters
+CODES = ('FENCE', 'WALL', 'TREE', 'EDGE', 'POLE', 'DITCH', 'CURB', 'MH')
+
+# Codes of the control point and of traverse stations
+CONTROL = 'CTRL'
+STATION = 'STN'
+
+# Usual target heights, in meters
+TARGET_HEIGHTS = (1.3, 1.5, 1.5, 1.5, 1.8, 2.0)
+
+Mark = namedtuple('Mark', 'name x y z code')
+Mark.__doc__ = '''A point of the survey, with its ground truth coordinates.'''
+
+Setup = namedtuple('Setup', 'index station ih orientation backsight foresight')
+Setup.__doc__ = '''A station setup.
+
+station, backsight and foresight are :class:`Mark`, ih is the instrument
+height and orientation the azimuth of the zero of the horizontal circle, in
+gon.'''
+
+Observation = namedtuple('Observation', 'target hz zenith dist th face kind')
+Observation.__doc__ = '''An observation of a target from a setup.
+
+hz is the reading of the horizontal circle and zenith the zenith angle, in
+gon, dist the slope distance and th the target height, in meters. face is 1
+or 2 and kind one of 'backsight', 'foresight' or 'sideshot'.'''
+
+
+def _to_gon(angle):
+    return angle * 200 / pi
+
+
+def _to_rad(angle):
+    return angle * pi / 200
+
+
+def _polar(station, ih, target, th):
+    '''Return the azimuth, zenith angle and slope distance of a target.'''
+
+    dx = target.x - station.x
+    dy = target.y - station.y
+    dz = target.z + th - station.z - ih
+    hd = hypot(dx, dy)
+    return _to_gon(atan2(dx, dy)) % 400, _to_gon(atan2(hd, dz)), hypot(hd, dz)
+
+
+def azimuth(setup, observation):
+    '''Return the azimuth of the horizontal reading of an observation.'''
+
+    return (observation.hz + setup.orientation) % 400
+
+
+class Survey:
+    '''A synthetic survey, generated from a seed.
+
+    The same arguments always give the same survey. Points are numbered
+    from 1: the control point, then the traverse stations, then sideshots.
+
+    Args:
+        points (int): The number of sideshots.
+        per_station (int): The number of sideshots of each setup.
+        seed: The seed of the random generator, any hashable value.
+        origin (tuple): The x, y, z coordinates of the first station.
+        face_pairs (float): The share of sideshots also observed on face 2.
+            Backsights and foresights are always observed on both faces.
+        start (datetime): The time of the first observation.
+    '''
+
+    def __init__(self, points=1000, per_station=50, seed=0, origin=(1000.0, 5000.0, 100.0),
+                 face_pairs=0.05, start=datetime(2026, 1, 12, 8, 0)):
+        if per_station < 1:
+            raise ValueError('per_station must be at least 1')
+        self.points = points
+        self.per_station = per_station
+        self.seed = seed
+        self.origin = origin
+        self.face_pairs = face_pairs
+        self.start = start
+        self.stations = max(1, ceil(points / per_station))
+        # control point, stations and the last foresight
+        self.first_sideshot = self.stations + 3
+
+    def __len__(self):
+        '''The number of distinct points.'''
+
+        return self.first_sideshot - 1 + self.points
+
+    def _random(self, *key):
+        return random.Random('%s-%s' % (self.seed, '-'.join(map(str, key))))
+
+    def terrain(self, x, y):
+        '''Return the height of the ground at x, y.'''
+
+        x0, y0, z0 = self.origin
+        return (z0 + 3.0 * sin((x - x0) / 60) + 2.0 * cos((y - y0) / 45) - 2.0
+                + 0.01 * (x - x0) - 0.004 * (y - y0))
+
+    def _mark(self, name, x, y, code):
+        return Mark(str(name), round(x, 3), round(y, 3), round(self.terrain(x, y), 3), code)
+
+    def traverse(self):
+        '''Yield the control point, then every traverse station.
+
+        The last station is only observed, as the foresight of the last
+        setup.
+        '''
+
+        rng = self._random('traverse')
+        x, y = self.origin[:2]
+        bearing = rng.uniform(0, 400)
+        back = _to_rad(bearing + 200)
+        length = rng.uniform(100, 150)
+        yield self._mark(1, x + length * sin(back), y + length * cos(back), CONTROL)
+        for name in range(2, self.stations + 3):
+            yield self._mark(name, x, y, STATION)
+            bearing = (bearing + rng.gauss(0, 40)) % 400
+            length = rng.uniform(80, 200)
+            x += length * sin(_to_rad(bearing))
+            y += length * cos(_to_rad(bearing))
+
+    def setups(self):
+        '''Yield every :class:`Setup`, in order.'''
+
+        traverse = self.traverse()
+        backsight = next(traverse)
+        station = next(traverse)
+        for index, foresight in enumerate(traverse):
+            rng = self._random('setup', index)
+            yield Setup(index, station, round(rng.uniform(1.35, 1.7), 3),
+                        round(rng.uniform(0, 400), 4), backsight, foresight)
+            backsight, station = station, foresight
+
+    def _sideshots(self, setup, rng):
+        '''Yield the sideshot targets of a setup, in runs of the same code.'''
+
+        first = self.first_sideshot + setup.index * self.per_station
+        last = min(first + self.per_station, self.first_sideshot + self.points)
+        name = first
+        while name < last:
+            code = rng.choice(CODES)
+            th = rng.choice(TARGET_HEIGHTS)
+            direction = rng.uniform(0, 2 * pi)
+            distance = rng.uniform(5, 80)
+            x = setup.station.x + distance * sin(direction)
+            y = setup.station.y + distance * cos(direction)
+            heading = rng.uniform(0, 2 * pi)
+            for i in range(min(rng.randint(3, 12), last - name)):
+                step = rng.uniform(1, 5)
+                heading += rng.gauss(0, 0.2)
+                x += step * sin(heading)
+                y += step * cos(heading)
+                if hypot(x - setup.station.x, y - setup.station.y) < 2:
+                    x += 3.0
+                yield self._mark(name, x, y, code), th
+                name += 1
+
+    def observations(self, setup):
+        '''Return the list of :class:`Observation` of a setup.
+
+        The backsight is observed first, then sideshots, then the foresight.
+        '''
+
+        rng = self._random('observations', setup.index)
+        bs_th = rng.choice(TARGET_HEIGHTS)
+        fs_th = rng.choice(TARGET_HEIGHTS)
+        observations = []
+
+        def observe(target, th, kind, faces):
+            az, zenith, dist = _polar(setup.station, setup.ih, target, th)
+            hz = (az - setup.orientation) % 400
+            observations.append(Observation(target, hz, zenith, dist, th, 1, kind))
+            if faces == 2:
+                observations.append(Observation(target, (hz + 200) % 400, 400 - zenith, dist,
+                                                th, 2, kind))
+
+        observe(setup.backsight, bs_th, 'backsight', 2)
+        for target, th in self._sideshots(setup, rng):
+            observe(target, th, 'sideshot', 2 if rng.random() < self.face_pairs else 1)
+        observe(setup.foresight, fs_th, 'foresight', 2)
+        return observations
+
+    def marks(self):
+        '''Yield the ground truth of every point, once, in order of names.'''
+
+        yield from self.traverse()
+        for setup in self.setups():
+            for observation in self.observations(setup):
+                if observation.kind == 'sideshot' and observation.face == 1:
+                    yield observation.target
+
+    def times(self):
+        '''Yield the time of successive observations.'''
+
+        rng = self._random('times')
+        time = self.start
+        while True:
+            yield time
+            time += timedelta(seconds=rng.randint(15, 90))
+
+
+# Writers, one per dialect. Each one writes a survey to a text file object.
+
+
+def _gsi_word(wi, info, value, width):
+    '''Return a GSI word, value is an int or a text.'''
+
+    if isinstance(value, str):
+        return '%s%s+%s' % (wi, info, value[-width:].rjust(width, '0'))
+    sign = '-' if value < 0 else '+'
+    return '%s%s%s%0*d' % (wi, info, sign, width, abs(value))
+
+
+def _gsi_writer(width):
+    '''Return the writer of GSI8 or GSI16 data.'''
+
+    prefix = '*' if width == 16 else ''
+    limit = 10 ** width
+
+    def mm(value):
+        value = round(value * 1000)
+        if abs(value) >= limit:
+            raise ValueError('%.3f does not fit in a GSI%d word' % (value / 1000, width))
+        return value
+
+    def write(survey, f):
+        block = 0
+
+        def line(name, *words):
+            nonlocal block
+            block = block % 9999 + 1
+            return prefix + ' '.join((_gsi_word('11', '%04d' % block, name, width),) + words) + ' \n'
+
+        def angle(value):
+            return round(value * 100000) % (400 * 100000)
+
+        traverse = survey.traverse()
+        for mark in (next(traverse), next(traverse)):
+            f.write(line(mark.name,
+                         _gsi_word('81', '..10', mm(mark.x), width),
+                         _gsi_word('82', '..10', mm(mark.y), width),
+                         _gsi_word('83', '..10', mm(mark.z), width),
+                         _gsi_word('71', '....', mark.code, width)))
+        for setup in survey.setups():
+            station = setup.station
+            lines = [line(station.name,
+                          _gsi_word('84', '..10', mm(station.x), width),
+                          _gsi_word('85', '..10', mm(station.y), width),
+                          _gsi_word('86', '..10', mm(station.z), width),
+                          _gsi_word('88', '..10', mm(setup.ih), width))]
+            for obs in survey.observations(setup):
+                lines.append(line(obs.target.name,
+                                  _gsi_word('21', '.322', angle(azimuth(setup, obs)), width),
+                                  _gsi_word('22', '.322', angle(obs.zenith), width),
+                                  _gsi_word('31', '..00', mm(obs.dist), width),
+                                  _gsi_word('87', '..10', mm(obs.th), width),
+                                  _gsi_word('71', '....', obs.target.code, width)))
+            f.writelines(lines)
+
+    return write
+
+
+write_leica_gsi8 = _gsi_writer(8)
+write_leica_gsi8.__doc__ = '''Write a survey as Leica GSI8 data.'''
+write_leica_gsi16 = _gsi_writer(16)
+write_leica_gsi16.__doc__ = '''Write a survey as Leica GSI16 data.'''
+
+
+def write_nikon_raw_v200(survey, f):
+    '''Write a survey as Nikon RAW v2.00 data.'''
+
+    times = survey.times()
+    f.write('CO,Nikon RAW data format V2.00\n'
+            'CO,SYNTH%s\n'
+            'CO,Description: synthetic survey\n'
+            'CO,Dist Units: Metres\n'
+            'CO,Angle Units: Gons\n'
+            'CO,Zero azimuth: North\n'
+            'CO,Zero VA: Horizontal\n'
+            'CO,Coord Order: ENZ\n'
+            'CO,HA Raw data: Circle\n' % survey.seed)
+    traverse = survey.traverse()
+    for mark in (next(traverse), next(traverse)):
+        f.write('MP,%s,,%.3f,%.3f,%.3f,%s\n' % mark)
+    for setup in survey.setups():
+        observations = survey.observations(setup)
+        bs = observations[0]
+        time = next(times)
+        lines = ['CO,Temp:20C Press:760mmHg Prism:0 %s\n' % time.strftime('%d-%b-%Y %H:%M:%S'),
+                 'ST,%s,,%s,,%.3f,%.4f,%.4f\n' % (setup.station.name, bs.target.name, setup.ih,
+                                                 azimuth(setup, bs), bs.hz)]
+        for obs in observations:
+            record = 'SS' if obs.kind == 'sideshot' else 'F%d' % obs.face
+            lines.append('%s,%s,%.3f,%.3f,%.4f,%.4f,%s,%s\n' % (
+                record, obs.target.name, obs.th, obs.dist, obs.hz, (100 - obs.zenith) % 400,
+                next(times).strftime('%H:%M:%S'), obs.target.code))
+        f.writelines(lines)
+
+
+def _dms(angle):
+    '''Return an angle in gon as a DDD.MMSSs string.'''
+
+    tenths = round(angle * 0.9 * 36000) % (360 * 36000)
+    degrees, tenths = divmod(tenths, 36000)
+    minutes, tenths = divmod(tenths, 600)
+    return '%d.%02d%03d' % (degrees, minutes, tenths)
+
+
+def write_carlson_rw5(survey, f):
+    '''Write a survey as Carlson RW5 data, in meters and DMS angles.'''
+
+    f.write('JB,NMSYNTH%s,DT%s,TM%s\n'
+            'MO,AD0,UN1,SF1.00000000,EC0,EO0.0,AU0\n'
+            '--Synthetic survey\n' % (survey.seed, survey.start.strftime('%m-%d-%Y'),
+                                      survey.start.strftime('%H:%M:%S')))
+    traverse = survey.traverse()
+    for mark in (next(traverse), next(traverse)):
+        f.write('SP,PN%s,N %.4f,E %.4f,EL%.4f,--%s\n' % (mark.name, mark.y, mark.x, mark.z,
+                                                         mark.code))
+    records = {('backsight', 1): 'BD', ('backsight', 2): 'BR',
+               ('foresight', 1): 'FD', ('foresight', 2): 'FR',
+               ('sideshot', 1): 'SS', ('sideshot', 2): 'SS'}
+    for setup in survey.setups():
+        station = setup.station
+        observations = survey.observations(setup)
+        bs = observations[0]
+        th = bs.th
+        lines = ['OC,OP%s,N %.5f,E %.5f,EL%.3f,--%s\n' % (station.name, station.y, station.x,
+                                                          station.z, station.code),
+                 'LS,HI%.3f,HR%.3f\n' % (setup.ih, th),
+                 'BK,OP%s,BP%s,BS%s,BC%s\n' % (station.name, bs.target.name,
+                                               _dms(azimuth(setup, bs)),
+                                               _dms(azimuth(setup, bs)))]
+        for obs in observations:
+            if obs.th != th:
+                th = obs.th
+                lines.append('LS,HI%.3f,HR%.3f\n' % (setup.ih, th))
+            lines.append('%s,OP%s,FP%s,AZ%s,ZE%s,SD%.3f,--%s\n' % (
+                records[obs.kind, obs.face], station.name, obs.target.name,
+                _dms(azimuth(setup, obs)), _dms(obs.zenith), obs.dist, obs.target.code))
+        f.writelines(lines)
+
+
+def write_landxml(survey, f):
+    '''Write a survey as LandXML 1.2 raw observations.
+
+    Traverse stations are written as CgPoints, so the traverse is generated
+    twice and the observations once.
+    '''
+
+    stamp = survey.start.strftime('%Y-%m-%dT%H:%M:%S')
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<LandXML xmlns="http://www.landxml.org/schema/LandXML-1.2" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+            'date="%s" time="%s" version="1.2" '
+            'xsi:schemaLocation="http://www.landxml.org/schema/LandXML-1.2 '
+            'http://www.landxml.org/schema/LandXML-1.2/LandXML-1.2.xsd">\n'
+            '\t<Units>\n'
+            '\t\t<Metric angularUnit="grads" areaUnit="squareMeter" directionUnit="grads" '
+            'linearUnit="meter" pressureUnit="milliBars" temperatureUnit="celsius" '
+            'volumeUnit="cubicMeter" />\n'
+            '\t</Units>\n'
+            '\t<Project name="SYNTH%s" />\n'
+            '\t<Application desc="TOPS" manufacturer="" manufacturerURL="http://tops.iosa.it/" '
+            'name="TotalOpen Station" timeStamp="%s" version="" />\n'
+            '\t<Survey>\n'
+            '\t\t<SurveyHeader name="synthetic survey" />\n'
+            '\t\t<CgPoints>\n' % (stamp[:10], stamp[11:], survey.seed, stamp))
+    marks = list(survey.traverse())
+    f.writelines('\t\t\t<CgPoint featureRef="feature%s" name="%s">%.3f %.3f %.3f</CgPoint>\n'
+                 % (mark.name, mark.name, mark.x, mark.y, mark.z) for mark in marks)
+    f.writelines('\t\t\t<Feature name="feature%s">\n'
+                 '\t\t\t\t<Property label="attrib1" value="%s" />\n'
+                 '\t\t\t</Feature>\n' % (mark.name, mark.code) for mark in marks)
+    f.write('\t\t</CgPoints>\n')
+    for setup in survey.setups():
+        f.write('\t\t<InstrumentSetup id="setup%d" instrumentHeight="%.3f" '
+                'orientationAzimuth="0.0" stationName="%s">\n'
+                '\t\t\t<Feature>\n'
+                '\t\t\t\t<Property label="attrib1" value="%s" />\n'
+                '\t\t\t</Feature>\n'
+                '\t\t\t<InstrumentPoint />\n'
+                '\t\t</InstrumentSetup>\n' % (setup.index, setup.ih, setup.station.name,
+                                              setup.station.code))
+    for setup in survey.setups():
+        lines = ['\t\t<ObservationGroup id="o%d" setupID="setup%d">\n' % (setup.index,
+                                                                           setup.index)]
+        for obs in survey.observations(setup):
+            target = obs.target
+            lines.append('\t\t\t<RawObservation horizAngle="%.5f" slopeDistance="%.3f" '
+                         'targetHeight="%.3f" zenithAngle="%.5f">\n'
+                         '\t\t\t\t<TargetPoint desc="%s">%.3f %.3f %.3f</TargetPoint>\n'
+                         '\t\t\t\t<Feature>\n'
+                         '\t\t\t\t\t<Property label="attrib1" value="%s" />\n'
+                         '\t\t\t\t</Feature>\n'
+                         '\t\t\t</RawObservation>\n' % (
+                             azimuth(setup, obs), obs.dist, obs.th, obs.zenith,
+                             target.name, target.x, target.y, target.z, target.code))
+        lines.append('\t\t</ObservationGroup>\n')
+        f.writelines(lines)
+    f.write('\t</Survey>\n</LandXML>\n')
+
+
+def _computed(survey):
+    '''Yield each setup with the targets of its observations.
+
+    This is what instruments recording coordinates store: the station,
+    then the coordinates of every observed point, once for each face.
+    '''
+
+    for setup in survey.setups():
+        yield setup, [obs.target for obs in survey.observations(setup)]
+
+
+def write_zeiss_r5(survey, f):
+    '''Write a survey as Zeiss R5 data.
+
+    Point numbers are cut to their last 4 digits and codes to 3
+    characters, like on the instrument.
+    '''
+
+    adr = 0
+
+    def line(reco, *values):
+        nonlocal adr
+        adr += 1
+        fields = ['%s%13.3f m   ' % value for value in values]
+        fields += [' ' * 19] * (3 - len(fields))
+        return 'For R5|Adr %04d|%-10s|%s|\n' % (adr, reco, '|'.join(fields))
+
+    def point(mark):
+        return line('KR %-3s%4s' % (mark.code[:3], mark.name[-4:]),
+                    ('X', mark.x), ('Y', mark.y), ('Z', mark.z))
+
+    traverse = survey.traverse()
+    f.write(line('TR OR.COOR'))
+    f.write(point(next(traverse)))
+    for setup, targets in _computed(survey):
+        lines = [line('TR POLAR'), point(setup.station),
+                 line('TR INPUT', ('i', setup.ih))]
+        lines.extend(point(target) for target in targets)
+        f.writelines(lines)
+
+
+def write_zeiss_rec_500(survey, f):
+    '''Write a survey as Zeiss REC 500 data.
+
+    The X column holds northings and the Y column eastings.
+    '''
+
+    sequence = 0
+
+    def line(text):
+        nonlocal sequence
+        sequence = sequence % 9999999 + 1
+        return '%7s %s\n' % ('%04d' % sequence, text)
+
+    def point(mark):
+        return line('%19s%-5s    X %12.3f Y %13.3f Z %11.3f ' % (
+            mark.name, mark.code[:5], mark.y, mark.x, mark.z))
+
+    traverse = survey.traverse()
+    f.write(line('OR.COOR'))
+    f.write(point(next(traverse)))
+    for setup, targets in _computed(survey):
+        lines = [line('POLAR'), point(setup.station)]
+        lines.extend(point(target) for target in targets)
+        f.writelines(lines)
+
+
+def write_leica_tcr_705(survey, f):
+    '''Write a survey as Leica TCR 705 coordinates.'''
+
+    f.write('Total Open Station synthetic survey.\n \n'
+            'JOB      SYNTH%s\nOPERATOR     TOPS\nDATE %s\nINS. NO.    000000\n'
+            'INS. TYPE.    TCR705\n\n' % (survey.seed, survey.start.strftime('%d/%m/%y')))
+    for setup, targets in _computed(survey):
+        lines = ['\nSETUP SN %9s\n' % setup.station.name,
+                 'IH %9.3f\n\n' % setup.ih,
+                 'Orientation Station %10s\n' % setup.backsight.name,
+                 '- ' * 19 + '-\n']
+        lines.extend('%10s, %10.3f, %10.3f, %10.3f, %s --------\n' % target
+                     for target in targets)
+        f.writelines(lines)
+
+
+def write_leica_tcr_1205(survey, f):
+    '''Write a survey as Leica System 1200 data export.'''
+
+    rule = '+' * 96 + '\n'
+    f.write(' ' * 30 + 'System 1200 Data Export - File Begin\n' + rule +
+            '\n\nJob\n---\nDate/Time:\t\t: %s\nJob\t\t\t: SYNTH%-10s\n'
+            'Creator \t\t: TOPS\nInstrument Type\t\t: TCRP1205\n\n\n'
+            % (survey.start.strftime('%d.%m.%y, %H:%M:%S'), survey.seed))
+    header = ('Point ID                  E                N                H'
+              '                  Class       Point Code\n')
+    for setup in survey.setups():
+        station = setup.station
+        observations = survey.observations(setup)
+        lines = ['\nTPS Station\n-----------\n',
+                 'Station ID                E                N                H'
+                 '                hi\n',
+                 '%-18s %14.3f %16.3f %16.3f %16.3f\n\n' % (station.name, station.x,
+                                                           station.y, station.z, setup.ih),
+                 '\nTPS Measurements\n----------------\n',
+                 'Point ID                  Hz                V                SD'
+                 '               hr\n']
+        lines.extend('%-18s %14.4f %16.4f %16.3f %16.3f\n' % (
+            obs.target.name, obs.hz, obs.zenith, obs.dist, obs.th) for obs in observations)
+        lines.append('\nPoints\n------\n' + header)
+        lines.extend('%-18s %14.3f %16.3f %16.3f %18s %17s\n' % (
+            obs.target.name, obs.target.x, obs.target.y, obs.target.z, 'MEAS',
+            obs.target.code) for obs in observations)
+        f.writelines(lines)
+    f.write('\n\n\n' + rule + ' ' * 30 + 'System 1200 Data Export - File End\n')
+
+
+def _fit(value, width, decimals=8):
+    '''Format a number in width characters, with as many decimals as fit.'''
+
+    text = '%*.*f' % (width, decimals, value)
+    while len(text) > width and decimals > 0:
+        decimals -= 1
+        text = '%*.*f' % (width, decimals, value)
+    return text
+
+
+def write_sokkia_sdr33(survey, f):
+    '''Write a survey as Sokkia SDR33 data.
+
+    Point numbers have at most 8 digits.
+    '''
+
+    def point(record, mark):
+        return '%sTP        %08d%s%s%s' % (record, int(mark.name), _fit(mark.y, 12),
+                                           _fit(mark.x, 16), _fit(mark.z, 15))
+
+    f.write('00NMSDR33 V04-04.02     %s 211111\n'
+            '10NMSYNTH%-11s121111\n'
+            '06NM1.00000000      \n' % (survey.start.strftime('%d-%b-%y %H:%M'), survey.seed))
+    for setup, targets in _computed(survey):
+        th = None
+        observations = survey.observations(setup)
+        lines = [point('02', setup.station) + '%s%8s\n' % (_fit(setup.ih, 15),
+                                                           setup.station.code)]
+        for obs in observations:
+            if obs.th != th:
+                th = obs.th
+                lines.append('03NM%s      \n' % _fit(th, 10))
+            lines.append(point('08', obs.target) + '%7s              \n' % obs.target.code[:6])
+        f.writelines(lines)
+
+
+def write_trimble_are(survey, f):
+    '''Write a survey as Trimble ARE data.'''
+
+    for setup in survey.setups():
+        station = setup.station
+        observations = survey.observations(setup)
+        bs = observations[0]
+        lines = ['0=Station\n2=%s\n37=%.3f\n38=%.3f\n39=%.3f\n'
+                 '62=%s\n37=%.3f\n38=%.3f\n39=%.3f\n21=%.4f\n11=0.000\n3=%.3f\n' % (
+                     station.name, station.y, station.x, station.z,
+                     bs.target.name, bs.target.y, bs.target.x, bs.target.z,
+                     azimuth(setup, bs), setup.ih)]
+        lines.extend('0=Measured point\n5=%s\n4=%s\n6=%.3f\n7=%.4f\n8=%.4f\n9=%.3f\n'
+                     '37=%.3f\n38=%.3f\n39=%.3f\n' % (
+                         obs.target.name, obs.target.code, obs.th, obs.hz, obs.zenith,
+                         obs.dist, obs.target.y, obs.target.x, obs.target.z)
+                     for obs in observations)
+        f.writelines(lines)
+
+
+def write_topcon_gts(survey, f):
+    '''Write a survey as Topcon GTS data.
+
+    Records hold the target height, the point number, the slope distance in
+    mm, the zenith angle and the horizontal reading in 1/10000 gon and the
+    horizontal distance in mm, one record per line followed by a checksum.
+    The topcon_gts parser reads these fields with other units and from a
+    station at the origin, so it does not give back the ground truth.
+    '''
+
+    def record(obs):
+        text = '%.3f_+%s_ ?+%08dm%07d+%07dg+%08dt**+00+%-5.5s_' % (
+            obs.th, obs.target.name, round(obs.dist * 1000), round(obs.zenith * 10000),
+            round(obs.hz * 10000) % 4000000,
+            round(obs.dist * abs(sin(_to_rad(obs.zenith))) * 1000), obs.target.code)
+        return '_,%s*%04d\n' % (text, sum(text.encode()) % 10000)
+
+    for setup in survey.setups():
+        f.writelines(record(obs) for obs in survey.observations(setup))
+
+
+# name: (input format, writer, description)
+DIALECTS = {
+    'carlson_rw5': ('carlson_rw5', write_carlson_rw5, 'Carlson RW5'),
+    'landxml': ('landxml', write_landxml, 'LandXML'),
+    'leica_gsi8': ('leica_gsi', write_leica_gsi8, 'Leica GSI8'),
+    'leica_gsi16': ('leica_gsi', write_leica_gsi16, 'Leica GSI16'),
+    'leica_tcr_705': ('leica_tcr_705', write_leica_tcr_705, 'Leica TCR 705'),
+    'leica_tcr_1205': ('leica_tcr_1205', write_leica_tcr_1205, 'Leica TCR 1205'),
+    'nikon_raw_v200': ('nikon_raw_v200', write_nikon_raw_v200, 'Nikon RAW v2.00'),
+    'sokkia_sdr33': ('sokkia_sdr33', write_sokkia_sdr33, 'Sokkia SDR33'),
+    'topcon_gts': ('topcon_gts', write_topcon_gts, 'Topcon GTS'),
+    'trimble_are': ('trimble_are', write_trimble_are, 'Trimble ARE'),
+    'zeiss_r5': ('zeiss_r5', write_zeiss_r5, 'Zeiss R5'),
+    'zeiss_rec_500': ('zeiss_rec_500', write_zeiss_rec_500, 'Zeiss REC 500'),
+    }
+
+
+def write_survey(survey, dialect, f):
+    '''Write a survey in a dialect to a text file object.
+
+    Returns:
+        The name of the input format to parse the written data.
+
+    Raises:
+        ValueError: The dialect does not exist.
+    '''
+
+    try:
+        informat, writer, desc = DIALECTS[dialect]
+    except KeyError:
+        raise ValueError('%s is not a valid dialect' % dialect)
+    writer(survey, f)
+    return informat
+
+
+def write_truth(survey, f):
+    '''Write the ground truth of a survey as CSV: name, x, y, z, code.'''
+
+    f.write('name,x,y,z,code\n')
+    f.writelines('%s,%.3f,%.3f,%.3f,%s\n' % mark for mark in survey.marks())
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+# filename: utils/profiling.py
+# Copyright 2026 Total Open Station authors
+
+# This file is part of Total Open Station.
+
+# Total Open Station is free software: you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+
+# Total Open Station is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with Total Open Station.  If not, see
+# <http://www.gnu.org/licenses/>.
+
+'''Time the stages of a conversion: read, tokenize, reduce, build, write.
+
+Parsers, the polar reduction and the command line programs call the hooks
+of this module, :func:`stage`, :func:`iterate` and :func:`wrap`. They do
+nothing unless a :class:`Profiler` is active::
+
+    with Profiler(pstats='parse.pstats', trace='parse.json') as profiler:
+        features = parser.points
+    print(profiler.report())
+
+Stages are nested: the time of a stage does not include the time of the
+stages run inside it, so the times of all stages add up to the total.
+
+With ``memory=True``, allocations are traced with :mod:`tracemalloc` and
+:meth:`Profiler.memory_report` gives the memory allocated and the peak of
+each stage. Tracing makes the run several times slower.
+'''
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+
+# The active profiler, None when profiling is off
+_profiler = None
+
+# Only in Python 3.9 and later
+_reset_peak = getattr(tracemalloc, 'reset_peak', None)
+
+
+class Stage:
+    '''The totals of a stage.
+
+    Attributes:
+        name (str): The name of the stage.
+        seconds (float): The time spent in the stage, without nested
+            stages.
+        calls (int): The number of times the stage was entered.
+        records (int): The number of records handled by the stage.
+        size (int): The number of bytes (or characters) handled by the stage.
+        allocated (int): The memory allocated and not freed by the stage,
+            without nested stages, when tracing memory.
+        peak (int): The highest memory traced while the stage, or a stage
+            nested in it, was running.
+    '''
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.records = 0
+        self.size = 0
+        self.allocated = 0
+        self.peak = 0
+
+    def __repr__(self):
+        return '<Stage %s: %.6f s, %d records, %d bytes>' % (
+            self.name, self.seconds, self.records, self.size)
+
+
+class Profiler:
+    '''Time stages, optionally under cProfile, as a context manager.
+
+    Args:
+        pstats (str): Run cProfile and dump its statistics to this file,
+            to be read with :mod:`pstats`.
+        trace (str): Write the stages to this file as Chrome trace events,
+            to be opened in ``chrome://tracing`` or https://ui.perfetto.dev.
+        clock (callable): The clock, in seconds.
+        memory (bool): Trace memory allocations with :mod:`tracemalloc`.
+            Python 3.9 or later is needed for the peak of each stage,
+            otherwise it is the peak since the start of the run.
+
+    Attributes:
+        stages (dict): The :class:`Stage` of each name, in order of first
+            use.
+        events (list): The trace events of the stages.
+        allocated (int): The memory allocated and not freed by the run.
+        peak (int): The highest memory traced during the run.
+    '''
+
+    def __init__(self, pstats=None, trace=None, clock=time.perf_counter, memory=False):
+        self.pstats = pstats
+        self.trace = trace
+        self.clock = clock
+        self.memory = memory
+        self.stages = {}
+        self.events = []
+        self.seconds = 0.0
+        self.allocated = 0
+        self.peak = 0
+        # [stage, start of the stage, start of its current slice,
+        #  memory traced at the start of the slice]
+        self._stack = []
+        self._previous = None
+        self._cprofile = None
+        self._start = None
+        self._memory = 0
+        self._tracing = False
+
+    def __enter__(self):
+        global _profiler
+        self._previous = _profiler
+        _profiler = self
+        if self.memory:
+            self._tracing = not tracemalloc.is_tracing()
+            if self._tracing:
+                tracemalloc.start()
+            self._memory = self._traced()
+        if self.pstats:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._start = self.clock()
+        return self
+
+    def __exit__(self, *exc):
+        global _profiler
+        self.seconds += self.clock() - self._start
+        if self.memory:
+            self.allocated += self._traced() - self._memory
+            if self._tracing:
+                tracemalloc.stop()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.pstats)
+            self._cprofile = None
+        _profiler = self._previous
+        if self.trace:
+            self.write_trace(self.trace)
+        return False
+
+    def _stage(self, name):
+        try:
+            return self.stages[name]
+        except KeyError:
+            stage = self.stages[name] = Stage(name)
+            return stage
+
+    def _traced(self):
+        '''Return the memory traced now, keeping track of the peaks.'''
+
+        current, peak = tracemalloc.get_traced_memory()
+        if peak > self.peak:
+            self.peak = peak
+        for stage in self._stack:
+            if peak > stage[0].peak:
+                stage[0].peak = peak
+        if _reset_peak is not None:
+            _reset_peak()
+        return current
+
+    def enter(self, name):
+        '''Start a stage, pausing the current one.'''
+
+        now = self.clock()
+        memory = self._traced() if self.memory else 0
+        if self._stack:
+            outer = self._stack[-1]
+            outer[0].seconds += now - outer[2]
+            outer[0].allocated += memory - outer[3]
+        stage = self._stage(name)
+        stage.calls += 1
+        self._stack.append([stage, now, now, memory])
+
+    def exit(self, records=0, size=0, event=True):
+        '''End the current stage, resuming the one it was started in.
+
+        Args:
+            records (int): Records handled by the stage.
+            size (int): Bytes handled by the stage.
+            event (bool): Add a trace event, False for fine grained
+                stages like the reading of each line.
+        '''
+
+        now = self.clock()
+        memory = self._traced() if self.memory else 0
+        stage, start, resumed, allocated = self._stack.pop()
+        stage.seconds += now - resumed
+        stage.allocated += memory - allocated
+        stage.records += records
+        stage.size += size
+        if self._stack:
+            self._stack[-1][2] = now
+            self._stack[-1][3] = memory
+        if event:
+            self.events.append({
+                'name': stage.name,
+                'ph': 'X',
+                'ts': (start - self._start) * 1e6,
+                'dur': (now - start) * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {'records': records, 'bytes': size},
+                })
+
+    def count(self, name, records=0, size=0):
+        '''Add records and bytes to a stage.'''
+
+        stage = self._stage(name)
+        stage.records += records
+        stage.size += size
+
+    @contextmanager
+    def stage(self, name):
+        '''Run a block as a stage.'''
+
+        self.enter(name)
+        try:
+            yield self
+        finally:
+            self.exit()
+
+    def iterate(self, name, iterable, size=None):
+        '''Yield the items of iterable, timing each step as a stage.
+
+        Args:
+            size (callable): Gives the size of an item, in bytes.
+        '''
+
+        iterator = iter(iterable)
+        enter = self.enter
+        exit = self.exit
+        while True:
+            enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                exit(event=False)
+                return
+            except BaseException:
+                exit(event=False)
+                raise
+            exit(1, size(item) if size else 0, event=False)
+            yield item
+
+    def wrap(self, name, function):
+        '''Return function, timing each call as a stage.'''
+
+        enter = self.enter
+        exit = self.exit
+
+        def wrapper(*args, **kwargs):
+            enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                exit(1, event=False)
+
+        return wrapper
+
+    def report(self):
+        '''Return a table of wall time, records/s and MB/s by stage.
+
+        Time of the profiled run outside of any stage is shown as other.
+        '''
+
+        staged = sum(stage.seconds for stage in self.stages.values())
+        total = max(self.seconds, staged)
+        rows = [(stage.name, stage.seconds, stage.records, stage.size)
+                for stage in self.stages.values()]
+        if total > staged:
+            rows.append(('other', total - staged, 0, 0))
+        lines = ['%-12s %10s %7s %12s %14s %10s %10s' % (
+            'stage', 'seconds', 'share', 'records', 'records/s', 'MB', 'MB/s')]
+        for name, seconds, records, size in rows:
+            lines.append('%-12s %10.3f %6.1f%% %12d %14s %10.2f %10s' % (
+                name, seconds, 100 * seconds / total if total else 0.0, records,
+                '%.0f' % (records / seconds) if seconds and records else '-',
+                size / 1e6,
+                '%.2f' % (size / 1e6 / seconds) if seconds and size else '-'))
+        lines.append('%-12s %10.3f' % ('total', total))
+        return '\n'.join(lines) + '\n'
+
+    def memory_report(self, points=None):
+        '''Return a table of memory allocated, peak and bytes/record by stage.
+
+        Memory allocated by the run outside of any stage is shown as other.
+        Allocations are negative for stages freeing more memory than they
+        allocate, like the memory allocated by a nested stage.
+
+        Args:
+            points (int): The number of points converted, to add the peak
+                in bytes/point.
+        '''
+
+        rows = [(stage.name, stage.allocated, stage.peak, stage.records)
+                for stage in self.stages.values()]
+        other = self.allocated - sum(stage.allocated for stage in self.stages.values())
+        if other:
+            rows.append(('other', other, 0, 0))
+        lines = ['%-12s %12s %10s %12s %12s' % ('stage', 'MB', 'peak MB', 'records', 'bytes/record')]
+        for name, allocated, peak, records in rows:
+            lines.append('%-12s %12.2f %10s %12d %12s' % (
+                name, allocated / 1e6, '%.2f' % (peak / 1e6) if peak else '-', records,
+                '%.0f' % (allocated / records) if records else '-'))
+        lines.append('%-12s %12.2f %10.2f' % ('total', self.allocated / 1e6, self.peak / 1e6))
+        if points:
+            lines.append('peak bytes/point: %.0f' % (self.peak / points))
+        return '\n'.join(lines) + '\n'
+
+    def write_trace(self, path):
+        '''Write the stages as a Chrome trace event file.'''
+
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+def peak_rss():
+    '''Return the peak resident set size of this process, in bytes.
+
+    Returns:
+        The peak RSS, None where the :mod:`resource` module is missing
+        (Windows).
+    '''
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes, but bytes on macOS
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+@contextmanager
+def idle():
+    '''A context manager doing nothing, used when profiling is off.
+
+    Like :func:`contextlib.nullcontext`, which needs Python 3.7.'''
+
+    yield
+
+
+def active():
+    '''Return the active :class:`Profiler`, None when profiling is off.'''
+
+    return _profiler
+
+
+def stage(name):
+    '''Return a context manager running a block as a stage of the active
+    profiler, or doing nothing.'''
+
+    if _profiler is None:
+        return idle()
+    return _profiler.stage(name)
+
+
+def count(name, records=0, size=0):
+    '''Add records and bytes to a stage of the active profiler.'''
+
+    if _profiler is not None:
+        _profiler.count(name, records, size)
+
+
+def iterate(name, iterable, size=None):
+    '''Return iterable, with each step timed by the active profiler.'''
+
+    if _profiler is None:
+        return iterable
+    return _profiler.iterate(name, iterable, size)
+
+
+def wrap(name, function):
+    '''Return function, with each call timed by the active profiler.'''
+
+    if _profiler is None:
+        return function
+    return _profiler.wrap(name, function)